@@ -3,6 +3,14 @@ import streamlit as st
 # Import authentication services (database-backed)
 from app.services.user_service import register_user, login_user
 
+# Server-side session tokens (hashed, with expiry)
+from app.services.sessions import create_session
+
+# Benchmark the host once per process to pick the bcrypt cost
+from app.services.password_policy import get_policy
+
+get_policy()
+
 
 # -------------------------------------------------
 # Page configuration
@@ -74,12 +82,15 @@ with tab_login:
 
     # Attempt login when button is pressed
     if st.button("Log in", type="primary", use_container_width=True):
-        success, msg = login_user(login_username, login_password)
+        success, msg = login_user(
+            login_username, login_password, source=st.context.ip_address
+        )
 
         if success:
             # Save login state in session
             st.session_state.logged_in = True
             st.session_state.username = login_username
+            st.session_state.session_token = create_session(login_username)
 
             st.success(msg)
             st.switch_page("pages/1_Dashboard.py")
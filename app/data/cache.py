@@ -0,0 +1,311 @@
+"""
+cache.py
+---------
+Shared query-result cache for read-heavy pages.
+
+Results are kept in one process-wide cache, so every Streamlit session
+(and every rerun) asking the same question shares one database read.
+
+- Keys are the normalized SQL text plus its parameters.
+- Entries expire after a TTL and are evicted least-recently-used once
+  the entry count or the approximate memory cap is exceeded.
+- Writes invalidate results: the CRUD functions call
+  `mark_tables_changed()`, which bumps a per-table change counter that
+  is part of every key.
+- Writes from other processes (e.g. main2.py) are caught per table: one
+  sentinel connection per database polls `PRAGMA data_version`, and
+  only when it moves are the queried tables' fingerprints re-read (see
+  `_check_external_writes`).
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from app.data.db import connect_database
+
+# Defaults for the shared cache
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_TTL_SECONDS = 300
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def estimate_size(value):
+    """
+    Rough size in bytes of a cached value (used for the memory cap).
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True, index=True).sum())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class QueryCache:
+    """
+    Thread-safe TTL + LRU cache with an entry limit and a memory cap.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL_SECONDS,
+                 max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+        self._entries = OrderedDict()      # key -> (value, size, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Look up a key.
+
+        Returns:
+            tuple: (True, value) on a hit, (False, None) on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None or entry[2] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return False, None
+
+            # Most recently used entries live at the end
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def put(self, key, value):
+        """
+        Store a value, evicting old entries to stay within the limits.
+        """
+        size = estimate_size(value)
+
+        with self._lock:
+            # Values bigger than the whole cache are not worth keeping
+            if size > self.max_bytes:
+                return
+
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (value, size, time.monotonic() + self.ttl)
+            self._bytes += size
+
+            while (len(self._entries) > self.max_entries
+                   or self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """
+        Drop one entry if present.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        """
+        Drop every entry (counters are kept).
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """
+        Return hit/miss counters and current size.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def _remove(self, key):
+        # Caller holds the lock
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+# -------------------------------------------------
+# Change tracking used for invalidation
+# -------------------------------------------------
+_versions_lock = threading.Lock()
+_table_versions = {}            # table name -> local write counter
+_local_writes = 0               # total mark_tables_changed() calls
+
+# Per database file (see _sentinel_for)
+_sentinels = {}                 # db path -> sentinel connection
+_seen_data_versions = {}        # db path -> data_version at the last poll
+_seen_local_writes = {}         # db path -> _local_writes at the last poll
+_external_epochs = {}           # db path -> bumped on unexplained writes
+_fingerprints = {}              # (db path, table) -> (data_version, fingerprint)
+_external_versions = {}         # (db path, table) -> external write counter
+
+
+def mark_tables_changed(*table_names):
+    """
+    Record that the given tables were written (called by CRUD functions).
+    """
+    global _local_writes
+    with _versions_lock:
+        _local_writes += 1
+        for name in table_names:
+            _table_versions[name] = _table_versions.get(name, 0) + 1
+
+
+def _database_path(conn):
+    # File behind the connection's main schema ("" for :memory:)
+    for _, name, path in conn.execute("PRAGMA database_list").fetchall():
+        if name == "main":
+            return path or ""
+    return ""
+
+
+def _sentinel_for(db_path):
+    # Caller holds _versions_lock. The sentinel never writes, so its
+    # data_version moves on *every* commit to the file - by the pool's
+    # connections or another process - and, unlike id(conn), its
+    # baseline cannot be inherited by an unrelated new connection.
+    sentinel = _sentinels.get(db_path)
+    if sentinel is None:
+        sentinel = connect_database(db_path, profile=None)
+        _sentinels[db_path] = sentinel
+    return sentinel
+
+
+def _table_fingerprint(conn, table_name):
+    # Cheap summary that changes when rows are added or removed
+    return conn.execute(f"SELECT COUNT(*), MAX(rowid) FROM {table_name}").fetchone()
+
+
+def _check_external_writes(conn, tables):
+    # Returns (db path, epoch, {table: external counter}) for the cache key.
+    #
+    # 1. Poll the sentinel. Unchanged data_version: nothing was committed
+    #    since the last poll, so no table needs checking.
+    # 2. Changed, and this process marked no writes in between: the
+    #    commit came from another process and could have touched any
+    #    table, so the epoch for this database is bumped.
+    # 3. Changed while local writes happened too: own writes are already
+    #    in the local counters, so only the queried tables are
+    #    fingerprinted and those whose rows were added or removed get
+    #    their external counter bumped. In-place updates by another
+    #    process in this window are left to the TTL.
+    db_path = _database_path(conn)
+    if not db_path:
+        return db_path, 0, {t: 0 for t in tables}
+
+    with _versions_lock:
+        version = _sentinel_for(db_path).execute("PRAGMA data_version").fetchone()[0]
+
+        last = _seen_data_versions.get(db_path)
+        if last is not None and last != version:
+            if _seen_local_writes.get(db_path) == _local_writes:
+                _external_epochs[db_path] = _external_epochs.get(db_path, 0) + 1
+        _seen_data_versions[db_path] = version
+        _seen_local_writes[db_path] = _local_writes
+
+        stale = [t for t in tables
+                 if _fingerprints.get((db_path, t), (None,))[0] != version]
+
+    # Fingerprints are read outside the lock; they only run after a commit
+    fresh = {t: _table_fingerprint(conn, t) for t in stale}
+
+    with _versions_lock:
+        for table_name, fingerprint in fresh.items():
+            key = (db_path, table_name)
+            previous = _fingerprints.get(key)
+            if previous is not None and previous[1] != fingerprint:
+                _external_versions[key] = _external_versions.get(key, 0) + 1
+            _fingerprints[key] = (version, fingerprint)
+
+        return (
+            db_path,
+            _external_epochs.get(db_path, 0),
+            {t: _external_versions.get((db_path, t), 0) for t in tables},
+        )
+
+
+def table_version(table_name):
+    """
+    Return the local write counter of a table (changes on every write).
+    """
+    with _versions_lock:
+        return _table_versions.get(table_name, 0)
+
+
+def _versions_for(tables):
+    with _versions_lock:
+        return tuple(_table_versions.get(name, 0) for name in tables)
+
+
+# Process-wide cache shared by all sessions
+query_cache = QueryCache()
+
+
+def cached_query(conn, sql, params=(), tables=(), loader=None):
+    """
+    Run a read query through the shared cache.
+
+    The returned object is shared between sessions - treat it as
+    read-only (DataFrame methods that return a new frame are fine).
+
+    Args:
+        conn: Active database connection (used on a miss)
+        sql (str): Query text
+        params (sequence): Bound parameters
+        tables (tuple): Tables the query reads (for invalidation)
+        loader (callable): loader(conn, sql, params) -> result; defaults
+                           to pandas.read_sql_query
+
+    Returns:
+        The (possibly cached) query result
+    """
+    db_path, epoch, external = _check_external_writes(conn, tables)
+
+    key = (
+        db_path,
+        " ".join(sql.split()),          # whitespace-insensitive SQL
+        tuple(params),
+        tuple(tables),
+        _versions_for(tables),
+        tuple(external[name] for name in tables),
+        epoch,
+    )
+
+    hit, value = query_cache.get(key)
+    if hit:
+        return value
+
+    if loader is None:
+        value = pd.read_sql_query(sql, conn, params=list(params))
+    else:
+        value = loader(conn, sql, params)
+
+    query_cache.put(key, value)
+    return value
+
+
+def cache_stats():
+    """
+    Return metrics for the shared query cache.
+    """
+    return query_cache.stats()
@@ -0,0 +1,200 @@
+"""
+chat_history.py
+----------------
+Persistent AI chat history for the Multi-Domain Intelligence Platform.
+
+The chat page used to keep the whole conversation in st.session_state,
+so it was lost on logout and every rerun re-rendered every message.
+Conversations are now stored per user in two tables (migration 3):
+
+- chat_conversations: one row per conversation (owner, mode, timestamps)
+- chat_messages:      one row per turn; append-only (triggers reject
+                      UPDATE and DELETE)
+
+Reads are paginated by message id (keyset), so loading the latest turns
+or an earlier page is one index seek on (conversation_id, id) no matter
+how long the conversation is.
+"""
+
+from app.data.db import get_connection
+from app.data.migrations import require_schema
+
+
+# Messages per "load earlier" page
+DEFAULT_HISTORY_PAGE = 20
+
+# Migration that creates the chat tables
+CHAT_SCHEMA_VERSION = 3
+
+
+def _ensure_schema(conn):
+    # Schema changes are not made from a page request: an old database
+    # fails with a "run migrations" error instead (PRAGMA user_version
+    # is a header read, cheap enough to check on every call)
+    require_schema(conn, CHAT_SCHEMA_VERSION, "AI chat history")
+
+
+def _to_messages(rows):
+    return [{"id": row[0], "role": row[1], "content": row[2]} for row in rows]
+
+
+def create_conversation(username, mode=None):
+    """
+    Start a new conversation for a user.
+
+    Parameters:
+    - username (str): Owner of the conversation
+    - mode (str): Chat mode it was started in (optional)
+
+    Returns:
+    - int: The new conversation id
+    """
+    with get_connection() as conn:
+        _ensure_schema(conn)
+        cursor = conn.execute(
+            "INSERT INTO chat_conversations (username, mode) VALUES (?, ?)",
+            (username, mode),
+        )
+        conn.commit()
+        return cursor.lastrowid
+
+
+def get_latest_conversation(username):
+    """
+    Return the id of the user's most recently used conversation.
+
+    Returns:
+    - int or None: Conversation id, or None if the user has none
+    """
+    with get_connection() as conn:
+        _ensure_schema(conn)
+        row = conn.execute(
+            """
+            SELECT id FROM chat_conversations
+            WHERE username = ?
+            ORDER BY updated_at DESC, id DESC
+            LIMIT 1
+            """,
+            (username,),
+        ).fetchone()
+
+    return row[0] if row else None
+
+
+def list_conversations(username, limit=DEFAULT_HISTORY_PAGE):
+    """
+    Return the user's conversations, most recently used first.
+
+    Returns:
+    - list: Dicts with id, mode, created_at and updated_at
+    """
+    with get_connection() as conn:
+        _ensure_schema(conn)
+        rows = conn.execute(
+            """
+            SELECT id, mode, created_at, updated_at FROM chat_conversations
+            WHERE username = ?
+            ORDER BY updated_at DESC, id DESC
+            LIMIT ?
+            """,
+            (username, limit),
+        ).fetchall()
+
+    return [
+        {"id": row[0], "mode": row[1], "created_at": row[2], "updated_at": row[3]}
+        for row in rows
+    ]
+
+
+def append_message(conversation_id, role, content):
+    """
+    Append one message to a conversation.
+
+    Parameters:
+    - conversation_id (int): Conversation to append to
+    - role (str): "user" or "assistant"
+    - content (str): Message text
+
+    Returns:
+    - int: The new message id
+    """
+    with get_connection() as conn:
+        _ensure_schema(conn)
+        cursor = conn.execute(
+            "INSERT INTO chat_messages (conversation_id, role, content) VALUES (?, ?, ?)",
+            (conversation_id, role, content),
+        )
+        # Keeps get_latest_conversation() pointing at the active chat
+        conn.execute(
+            "UPDATE chat_conversations SET updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+            (conversation_id,),
+        )
+        conn.commit()
+        return cursor.lastrowid
+
+
+def get_recent_messages(conversation_id, limit=DEFAULT_HISTORY_PAGE):
+    """
+    Return the newest messages of a conversation, oldest first.
+
+    Returns:
+    - list: Dicts with id, role and content
+    """
+    with get_connection() as conn:
+        _ensure_schema(conn)
+        rows = conn.execute(
+            """
+            SELECT id, role, content FROM chat_messages
+            WHERE conversation_id = ?
+            ORDER BY id DESC
+            LIMIT ?
+            """,
+            (conversation_id, limit),
+        ).fetchall()
+
+    return _to_messages(reversed(rows))
+
+
+def get_messages_before(conversation_id, before_id, limit=DEFAULT_HISTORY_PAGE):
+    """
+    Return the page of messages just before a message id, oldest first.
+
+    Parameters:
+    - conversation_id (int): Conversation to read
+    - before_id (int): Id of the oldest message already loaded
+    - limit (int): Page size
+
+    Returns:
+    - list: Dicts with id, role and content
+    """
+    with get_connection() as conn:
+        _ensure_schema(conn)
+        rows = conn.execute(
+            """
+            SELECT id, role, content FROM chat_messages
+            WHERE conversation_id = ? AND id < ?
+            ORDER BY id DESC
+            LIMIT ?
+            """,
+            (conversation_id, before_id, limit),
+        ).fetchall()
+
+    return _to_messages(reversed(rows))
+
+
+def has_messages_before(conversation_id, before_id):
+    """
+    Return True if the conversation has messages older than before_id.
+    """
+    with get_connection() as conn:
+        _ensure_schema(conn)
+        row = conn.execute(
+            """
+            SELECT EXISTS (
+                SELECT 1 FROM chat_messages WHERE conversation_id = ? AND id < ?
+            )
+            """,
+            (conversation_id, before_id),
+        ).fetchone()
+
+    return bool(row[0])
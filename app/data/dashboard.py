@@ -0,0 +1,193 @@
+"""
+dashboard.py
+-------------
+Query layer for pages/1_Dashboard.py.
+
+The dashboard used to read every row of every table into pandas on each
+Streamlit rerun and then filter/count in memory. These helpers turn the
+sidebar filter state into parameterized SQL instead, so the database
+does the filtering and grouping and the page only receives:
+
+- distinct values for the filter widgets,
+- counts and GROUP BY aggregates for the KPIs and charts,
+- the handful of rows shown in the "Recent ..." tables.
+
+Table and column names below come from this module only; user input is
+always passed as a bound parameter. Results go through the shared query
+cache (app.data.cache), so identical reads from different sessions hit
+the database once until a write invalidates them.
+
+Counts whose group and filter columns are all keys of a rollup table
+(app.data.rollups) are read from the rollup instead of the base table.
+"""
+
+from app.data.cache import cached_query
+from app.data.rollups import find_rollup, rollups_available
+
+
+# Columns shown in each domain's tables on the dashboard
+INCIDENT_COLUMNS = ["id", "date", "incident_type", "severity", "status", "description"]
+DATASET_COLUMNS = [
+    "id", "dataset_name", "category", "source", "last_updated",
+    "record_count", "file_size_mb",
+]
+TICKET_COLUMNS = [
+    "id", "priority", "status", "category", "subject", "description",
+    "created_date", "resolved_date", "assigned_to",
+]
+
+# Rows shown in the "Recent ..." tables
+RECENT_LIMIT = 50
+
+
+def _fetch_scalar(conn, sql, params):
+    # Loader for single-value queries such as COUNT(*)
+    return conn.execute(sql, params).fetchone()[0]
+
+
+def _fetch_strings(conn, sql, params):
+    # Loader for one-column queries returned as a list of strings
+    return [str(row[0]) for row in conn.execute(sql, params).fetchall()]
+
+
+def build_where(filters):
+    """
+    Build a WHERE clause from {column: [allowed values]} filters.
+
+    A column mapped to an empty list matches nothing (the same result
+    the page got from `Series.isin([])`). A column mapped to None is
+    not filtered.
+
+    Args:
+        filters (dict): {column name: list of values or None}
+
+    Returns:
+        tuple: (" WHERE ..." or "", list of parameters)
+    """
+    clauses = []
+    params = []
+
+    for column, values in (filters or {}).items():
+        if values is None:
+            continue
+        if not values:
+            clauses.append("0")
+            continue
+        placeholders = ", ".join("?" for _ in values)
+        clauses.append(f"{column} IN ({placeholders})")
+        params.extend(values)
+
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+
+def get_distinct_values(conn, table_name, column):
+    """
+    Return the sorted non-NULL values of a column (for filter widgets).
+    """
+    query = (
+        f"SELECT DISTINCT {column} FROM {table_name} "
+        f"WHERE {column} IS NOT NULL ORDER BY {column}"
+    )
+    return cached_query(conn, query, tables=(table_name,), loader=_fetch_strings)
+
+
+def _rollup_for(conn, table_name, columns):
+    # A rollup covering every column, if migration 4 has been applied
+    if not rollups_available(conn):
+        return None
+    return find_rollup(table_name, columns)
+
+
+def count_rows(conn, table_name, filters=None):
+    """
+    Return how many rows of a table match the filters.
+    """
+    where, params = build_where(filters)
+    rollup = _rollup_for(conn, table_name, list(filters or {}))
+    if rollup:
+        query = f"SELECT COALESCE(SUM(count), 0) FROM {rollup}{where}"
+    else:
+        query = f"SELECT COUNT(*) FROM {table_name}{where}"
+
+    # Rollups change only with their source table, so the cache key
+    # is still invalidated by writes to table_name
+    return cached_query(conn, query, params, tables=(table_name,), loader=_fetch_scalar)
+
+
+def count_by(conn, table_name, column, filters=None):
+    """
+    Count matching rows grouped by one column.
+
+    Returns:
+        DataFrame: columns [column, "count"], largest group first
+    """
+    where, params = build_where(filters)
+    rollup = _rollup_for(conn, table_name, [column] + list(filters or {}))
+    if rollup:
+        query = (
+            f"SELECT {column}, SUM(count) AS count FROM {rollup}{where} "
+            f"GROUP BY {column} ORDER BY count DESC"
+        )
+    else:
+        query = (
+            f"SELECT {column}, COUNT(*) AS count FROM {table_name}{where} "
+            f"GROUP BY {column} ORDER BY count DESC"
+        )
+    return cached_query(conn, query, params, tables=(table_name,))
+
+
+def get_recent_rows(conn, table_name, columns, filters=None, limit=RECENT_LIMIT):
+    """
+    Return the newest matching rows (highest id first), at most `limit`.
+    """
+    where, params = build_where(filters)
+    query = (
+        f"SELECT {', '.join(columns)} FROM {table_name}{where} "
+        f"ORDER BY id DESC LIMIT ?"
+    )
+    return cached_query(conn, query, params + [limit], tables=(table_name,))
+
+
+# -------------------------------------------------
+# Data Science domain (no sidebar filters)
+# -------------------------------------------------
+def get_total_dataset_records(conn):
+    """
+    Return the sum of record_count over all datasets.
+    """
+    query = "SELECT COALESCE(SUM(record_count), 0) FROM datasets_metadata"
+    total = cached_query(conn, query, tables=("datasets_metadata",), loader=_fetch_scalar)
+    return int(total)
+
+
+def get_top_datasets_by_records(conn, limit=10):
+    """
+    Return the datasets with the most records.
+
+    Returns:
+        DataFrame: columns [dataset_name, record_count]
+    """
+    query = """
+        SELECT dataset_name, COALESCE(record_count, 0) AS record_count
+        FROM datasets_metadata
+        ORDER BY record_count DESC
+        LIMIT ?
+    """
+    return cached_query(conn, query, (limit,), tables=("datasets_metadata",))
+
+
+def get_datasets_by_source(conn):
+    """
+    Count datasets per source ("Unknown" when the source is missing).
+
+    Returns:
+        DataFrame: columns [source, count]
+    """
+    query = """
+        SELECT COALESCE(source, 'Unknown') AS source, COUNT(*) AS count
+        FROM datasets_metadata
+        GROUP BY 1
+        ORDER BY count DESC
+    """
+    return cached_query(conn, query, tables=("datasets_metadata",))
@@ -1,8 +1,10 @@
 import pandas as pd
 from pathlib import Path
 
+from app.data.loaders import stream_csv_to_table
 
-def load_csv_to_table(conn, csv_path, table_name):
+
+def load_csv_to_table(conn, csv_path, table_name, chunksize=None, **stream_options):
     """
     Load a CSV file into a database table using pandas.
 
@@ -10,6 +12,9 @@ def load_csv_to_table(conn, csv_path, table_name):
         conn: Active database connection
         csv_path: Path to the CSV file
         table_name: Target database table name
+        chunksize: Optional rows per chunk; streams the file with bounded
+                   memory and resumable checkpoints instead of reading
+                   it whole (see app.data.loaders.stream_csv_to_table)
 
     Returns:
         int: Number of rows successfully inserted
@@ -25,6 +30,19 @@ def load_csv_to_table(conn, csv_path, table_name):
         print(f" CSV not found: {csv_path}")
         return 0
 
+    # -------------------------------------------------
+    # Step 1b: Large files - stream chunk by chunk
+    # -------------------------------------------------
+    if chunksize:
+        try:
+            return stream_csv_to_table(
+                conn, csv_path, table_name, chunksize=chunksize, **stream_options
+            )
+        except Exception as e:
+            # Committed chunks stay in place; a re-run resumes after them
+            print(f" Error streaming into table '{table_name}': {e}")
+            return 0
+
     # -------------------------------------------------
     # Step 2: Read the CSV file into a pandas DataFrame
     # -------------------------------------------------
@@ -1,4 +1,7 @@
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
 
 # Directory that stores the database file and CSV data
@@ -10,8 +13,135 @@ DATA_DIR.mkdir(exist_ok=True)
 # Full file path to the SQLite database
 DB_PATH = DATA_DIR / "intelligence_platform.db"
 
+# -------------------------------------------------
+# PRAGMA tuning profiles applied when a connection opens
+#
+# - oltp:      short reads/writes from the Streamlit pages
+# - analytics: large read-only scans for reports
+# - bulk-load: one-off CSV imports (durability traded for speed)
+#
+# All profiles use WAL so readers never block behind a writer.
+# -------------------------------------------------
+PRAGMA_PROFILES = {
+    "oltp": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 64 * 1024 * 1024,       # 64 MB memory-mapped I/O
+        "cache_size": -16000,                # ~16 MB page cache (negative = KiB)
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,                # ms to wait on a locked database
+    },
+    "analytics": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 10000,
+    },
+    "bulk-load": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -128000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 30000,
+    },
+}
 
-def connect_database(db_path=DB_PATH):
+# Profile used when the caller does not ask for one
+DEFAULT_PROFILE = "oltp"
+
+# SQLite reports these PRAGMAs as integers, so map names to numbers
+_PRAGMA_NUMERIC_VALUES = {
+    "synchronous": {"OFF": 0, "NORMAL": 1, "FULL": 2, "EXTRA": 3},
+    "temp_store": {"DEFAULT": 0, "FILE": 1, "MEMORY": 2},
+}
+
+# Maximum number of pooled connections open at the same time
+POOL_SIZE = 8
+
+# Seconds a thread waits for a free connection before giving up
+POOL_TIMEOUT = 10.0
+
+
+def apply_pragma_profile(conn, profile=DEFAULT_PROFILE):
+    """
+    Apply a named PRAGMA profile to an open connection.
+
+    Args:
+        conn: Active database connection
+        profile (str): One of the keys in PRAGMA_PROFILES
+
+    Raises:
+        ValueError: If the profile name is unknown
+    """
+    if profile not in PRAGMA_PROFILES:
+        raise ValueError(
+            f"Unknown PRAGMA profile '{profile}'. "
+            f"Choose from: {', '.join(PRAGMA_PROFILES)}"
+        )
+
+    # busy_timeout first, so switching journal_mode can wait for a lock
+    settings = PRAGMA_PROFILES[profile]
+    conn.execute(f"PRAGMA busy_timeout = {int(settings['busy_timeout'])}")
+
+    for name, value in settings.items():
+        if name == "busy_timeout":
+            continue
+        conn.execute(f"PRAGMA {name} = {value}")
+
+
+def check_pragma_profile(conn, profile=DEFAULT_PROFILE):
+    """
+    Compare the live PRAGMA values of a connection with a profile.
+
+    Args:
+        conn: Active database connection
+        profile (str): Profile the connection is expected to use
+
+    Returns:
+        dict: {pragma: (expected, actual, ok)} for every setting
+    """
+    report = {}
+
+    for name, expected in PRAGMA_PROFILES[profile].items():
+        actual = conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+        if name in _PRAGMA_NUMERIC_VALUES:
+            ok = actual == _PRAGMA_NUMERIC_VALUES[name][expected]
+        elif name == "journal_mode":
+            ok = str(actual).upper() == expected
+        elif name == "mmap_size":
+            # SQLite silently caps mmap_size at its compile-time limit
+            ok = 0 < actual <= expected
+        else:
+            ok = actual == expected
+
+        report[name] = (expected, actual, ok)
+
+    return report
+
+
+def report_pragma_profile(conn, profile=DEFAULT_PROFILE):
+    """
+    Print the PRAGMA check for a connection (used at startup).
+
+    Returns:
+        bool: True if every setting matches the profile
+    """
+    report = check_pragma_profile(conn, profile)
+    all_ok = all(ok for _, _, ok in report.values())
+
+    print(f"PRAGMA profile '{profile}': {'OK' if all_ok else 'MISMATCH'}")
+    for name, (expected, actual, ok) in report.items():
+        marker = "ok" if ok else "!!"
+        print(f"  [{marker}] {name:<13} expected={expected} actual={actual}")
+
+    return all_ok
+
+
+def connect_database(db_path=DB_PATH, profile=DEFAULT_PROFILE):
     """
     Create and return a connection to the SQLite database.
 
@@ -20,9 +150,264 @@ def connect_database(db_path=DB_PATH):
 
     Args:
         db_path (Path): Path to the SQLite database file
+        profile (str): PRAGMA profile to apply ("oltp", "analytics",
+                       "bulk-load"), or None to keep SQLite defaults
 
     Returns:
         sqlite3.Connection: Active database connection
     """
-    # Establish and return a connection to the database
-    return sqlite3.connect(str(db_path))
+    # Establish a connection to the database.
+    # check_same_thread=False lets the pool hand the connection to
+    # whichever thread checks it out next (one thread at a time).
+    timeout = 5.0
+    if profile is not None:
+        timeout = PRAGMA_PROFILES[profile]["busy_timeout"] / 1000
+
+    conn = sqlite3.connect(str(db_path), timeout=timeout, check_same_thread=False)
+
+    if profile is not None:
+        apply_pragma_profile(conn, profile)
+
+    return conn
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of SQLite connections.
+
+    - At most `size` connections exist at once; extra callers wait.
+    - A thread that already holds a connection gets the same one back
+      (nested `connection()` blocks do not deadlock or use two slots).
+    - Idle connections are health-checked before being handed out and
+      replaced if they no longer work.
+    - Every new connection is checked against the PRAGMA profile; a
+      mismatch (e.g. WAL unavailable) is printed once and reported by
+      stats() as profile_ok=False.
+    """
+
+    def __init__(self, db_path=DB_PATH, size=POOL_SIZE, timeout=POOL_TIMEOUT,
+                 profile=DEFAULT_PROFILE):
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self.profile = profile
+
+        self._idle = []                    # connections ready for checkout
+        self._created = 0                  # connections currently open
+        self._cond = threading.Condition()
+        self._local = threading.local()    # per-thread checkout state
+
+        # Counters exposed through stats()
+        self._checkouts = 0
+        self._waits = 0
+        self._in_use = 0
+        self._peak_in_use = 0
+        self._replaced = 0
+        self._profile_mismatch = None      # first failed PRAGMA check
+
+    # -------------------------------------------------
+    # Internal helpers
+    # -------------------------------------------------
+    def _is_healthy(self, conn):
+        # A cheap query tells us whether the connection is still usable
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _check_profile(self, conn):
+        # Verify that the profile actually took effect on a new connection
+        if self.profile is None:
+            return
+
+        report = check_pragma_profile(conn, self.profile)
+        failed = {name: (expected, actual)
+                  for name, (expected, actual, ok) in report.items() if not ok}
+        if not failed:
+            return
+
+        with self._cond:
+            first = self._profile_mismatch is None
+            if first:
+                self._profile_mismatch = failed
+
+        if first:
+            details = ", ".join(
+                f"{name} expected={expected} actual={actual}"
+                for name, (expected, actual) in failed.items()
+            )
+            print(f"WARNING: PRAGMA profile '{self.profile}' not applied to "
+                  f"{self.db_path}: {details}")
+
+    def _discard(self, conn):
+        # Close a broken connection and free its slot
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._cond:
+            self._created -= 1
+            self._replaced += 1
+            self._cond.notify()
+
+    def _reserve(self):
+        # Take an idle connection, or a free slot (returned as None).
+        # Only bookkeeping happens under the lock; connecting and health
+        # checks run outside it so slow I/O does not block other threads.
+        deadline = time.monotonic() + self.timeout
+        waited = False
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+
+                if self._created < self.size:
+                    self._created += 1
+                    return None
+
+                # Pool exhausted: wait for another thread to release one
+                if not waited:
+                    self._waits += 1
+                    waited = True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._cond.wait(timeout=remaining):
+                    raise TimeoutError(
+                        f"No database connection available after {self.timeout}s"
+                    )
+
+    def _acquire(self):
+        with self._cond:
+            self._checkouts += 1
+
+        while True:
+            conn = self._reserve()
+
+            if conn is None:
+                # Open a new connection in the slot we reserved
+                try:
+                    conn = connect_database(self.db_path, self.profile)
+                except BaseException:
+                    with self._cond:
+                        self._created -= 1
+                        self._cond.notify()
+                    raise
+                self._check_profile(conn)
+
+            elif not self._is_healthy(conn):
+                # Broken idle connection: replace it and try again
+                self._discard(conn)
+                continue
+
+            with self._cond:
+                self._in_use += 1
+                self._peak_in_use = max(self._peak_in_use, self._in_use)
+            return conn
+
+    def _release(self, conn):
+        # Roll back anything the caller forgot to commit so the next
+        # user does not inherit an open transaction. The slot is given
+        # back even if the rollback fails.
+        healthy = False
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            healthy = True
+        except sqlite3.Error:
+            pass
+        finally:
+            with self._cond:
+                self._in_use -= 1
+                if healthy:
+                    self._idle.append(conn)
+                    self._cond.notify()
+
+        if not healthy:
+            self._discard(conn)
+
+    # -------------------------------------------------
+    # Public API
+    # -------------------------------------------------
+    @contextmanager
+    def connection(self):
+        """
+        Check out a connection for the current thread.
+
+        Usage:
+            with pool.connection() as conn:
+                conn.execute(...)
+                conn.commit()
+        """
+        depth = getattr(self._local, "depth", 0)
+
+        # Nested checkout on the same thread: reuse the outer connection
+        if depth:
+            self._local.depth += 1
+            try:
+                yield self._local.conn
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self._acquire()
+        self._local.conn = conn
+        self._local.depth = 1
+        try:
+            yield conn
+        finally:
+            self._local.depth = 0
+            self._local.conn = None
+            self._release(conn)
+
+    def stats(self):
+        """
+        Return a snapshot of pool usage counters.
+
+        Returns:
+            dict: size, profile, profile_ok, open, idle, in_use,
+                  peak_in_use, checkouts, waits, replaced
+        """
+        with self._cond:
+            return {
+                "size": self.size,
+                "profile": self.profile,
+                "profile_ok": self._profile_mismatch is None,
+                "open": self._created,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "peak_in_use": self._peak_in_use,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "replaced": self._replaced,
+            }
+
+    def close_all(self):
+        """
+        Close every idle connection (connections in use are left alone).
+        """
+        with self._cond:
+            while self._idle:
+                self._idle.pop().close()
+                self._created -= 1
+
+
+# Shared pool used by all data-access modules
+_pool = ConnectionPool()
+
+
+def get_connection():
+    """
+    Check out a pooled connection as a context manager.
+
+    Returns:
+        context manager yielding sqlite3.Connection
+    """
+    return _pool.connection()
+
+
+def pool_stats():
+    """
+    Return usage counters for the shared connection pool.
+    """
+    return _pool.stats()
@@ -1,5 +1,9 @@
 import pandas as pd
 
+from app.data.cache import mark_tables_changed
+from app.data.pagination import DEFAULT_PAGE_SIZE, estimate_row_count, fetch_page
+from app.data.rollups import rollups_available
+
 
 def insert_incident(conn, date, incident_type, severity, status, description, reported_by=None):
     """
@@ -29,6 +33,9 @@ def insert_incident(conn, date, incident_type, severity, status, description, re
     # Save changes to the database
     conn.commit()
 
+    # Invalidate cached dashboard results that read this table
+    mark_tables_changed("cyber_incidents")
+
     # Return the ID of the newly inserted incident
     return cursor.lastrowid
 
@@ -44,6 +51,28 @@ def get_all_incidents(conn):
     )
 
 
+def get_incidents_page(conn, after=None, limit=DEFAULT_PAGE_SIZE, order_by="id"):
+    """
+    READ: Retrieve one page of incidents, newest first (keyset pagination).
+
+    Pass the cursor returned with a page as `after` to get the next one.
+    order_by is "id" or "date" (cursor is then a (date, id) pair).
+
+    Returns:
+        tuple: (DataFrame page, next cursor or None on the last page)
+    """
+    columns = ["id", "incident_id", "date", "incident_type", "severity",
+               "status", "description", "reported_by", "created_at"]
+    return fetch_page(conn, "cyber_incidents", columns, after, limit, order_by)
+
+
+def estimate_incident_count(conn):
+    """
+    READ: Approximate number of incidents without a full table count.
+    """
+    return estimate_row_count(conn, "cyber_incidents")
+
+
 def update_incident_status(conn, incident_id, new_status):
     """
     UPDATE: Change the status of an incident.
@@ -64,6 +93,9 @@ def update_incident_status(conn, incident_id, new_status):
     # Commit the update to the database
     conn.commit()
 
+    # Invalidate cached dashboard results that read this table
+    mark_tables_changed("cyber_incidents")
+
     # Return the number of rows updated (0 or 1)
     return cursor.rowcount
 
@@ -88,6 +120,9 @@ def delete_incident(conn, incident_id):
     # Commit deletion to the database
     conn.commit()
 
+    # Invalidate cached dashboard results that read this table
+    mark_tables_changed("cyber_incidents")
+
     # Return the number of rows deleted
     return cursor.rowcount
 
@@ -95,7 +130,17 @@ def delete_incident(conn, incident_id):
 def get_incidents_by_type_count(conn):
     """
     ANALYSIS: Count incidents grouped by incident type.
+
+    Reads the incident_type_counts rollup (one row per type) when it exists.
     """
+    if rollups_available(conn):
+        query = """
+        SELECT incident_type, count
+        FROM incident_type_counts
+        ORDER BY count DESC
+        """
+        return pd.read_sql_query(query, conn)
+
     # SQL query to group incidents by type and count them
     query = """
     SELECT incident_type, COUNT(*) AS count
@@ -111,7 +156,18 @@ def get_incidents_by_type_count(conn):
 def get_high_severity_by_status(conn):
     """
     ANALYSIS: Count HIGH severity incidents grouped by status.
+
+    Reads the incident_severity_status_counts rollup when it exists.
     """
+    if rollups_available(conn):
+        query = """
+        SELECT status, count
+        FROM incident_severity_status_counts
+        WHERE severity = 'High'
+        ORDER BY count DESC
+        """
+        return pd.read_sql_query(query, conn)
+
     # SQL query filtering only high-severity incidents
     query = """
     SELECT status, COUNT(*) AS count
@@ -128,7 +184,18 @@ def get_high_severity_by_status(conn):
 def get_incident_types_with_many_cases(conn, min_count=5):
     """
     ANALYSIS: Find incident types with more than a specified number of cases.
+
+    Reads the incident_type_counts rollup when it exists.
     """
+    if rollups_available(conn):
+        query = """
+        SELECT incident_type, count
+        FROM incident_type_counts
+        WHERE count > ?
+        ORDER BY count DESC
+        """
+        return pd.read_sql_query(query, conn, params=(min_count,))
+
     # SQL query using HAVING to filter groups by count
     query = """
     SELECT incident_type, COUNT(*) AS count
@@ -0,0 +1,313 @@
+"""
+ingest.py
+----------
+Bulk CSV ingest engine shared by the domain loaders.
+
+Instead of looping over `df.iterrows()` and calling `cursor.execute`
+once per row, a CSV is:
+
+1. mapped onto the table's columns with vectorized pandas operations,
+2. converted to plain Python tuples (NaN -> NULL) in one pass,
+3. inserted with `executemany` in fixed-size batches,
+4. all inside one explicit transaction.
+
+Loads upsert on the source key (UNIQUE since migration 2), so re-running
+a load only writes rows that are new or changed. `incremental_load_csv`
+loads one source; app.data.pipeline loads several in parallel.
+"""
+
+import time
+
+import pandas as pd
+
+from app.data.db import DATA_DIR
+from app.data.cache import mark_tables_changed
+
+
+# Rows passed to each executemany call
+DEFAULT_BATCH_SIZE = 10_000
+
+
+# -------------------------------------------------
+# CSV -> table column mappings for the three domains
+#
+# "columns" maps each table column to the CSV column it is filled from,
+# or to None to insert NULL. "key" is the table column holding the
+# source system's ID (UNIQUE, see migration 2) used for upserts.
+# -------------------------------------------------
+INCIDENTS_SOURCE = {
+    "csv": "cyber_incidents.csv",
+    "table": "cyber_incidents",
+    "key": "incident_id",
+    "columns": {
+        "incident_id": "incident_id",
+        "date": "timestamp",
+        "incident_type": "category",
+        "severity": "severity",
+        "status": "status",
+        "description": "description",
+        "reported_by": None,            # not provided by the CSV
+    },
+}
+
+DATASETS_SOURCE = {
+    "csv": "datasets_metadata.csv",
+    "table": "datasets_metadata",
+    "key": "dataset_id",
+    "columns": {
+        "dataset_id": "dataset_id",
+        "dataset_name": "name",
+        "category": None,               # category optional
+        "source": "uploaded_by",
+        "last_updated": "upload_date",
+        "record_count": "rows",
+        "file_size_mb": "columns",
+    },
+}
+
+TICKETS_SOURCE = {
+    "csv": "it_tickets.csv",
+    "table": "it_tickets",
+    "key": "ticket_id",
+    "columns": {
+        "ticket_id": "ticket_id",
+        "priority": "priority",
+        "status": "status",
+        "category": None,               # category not provided
+        "subject": "description",       # description reused as subject
+        "description": "description",
+        "created_date": "created_at",
+        "resolved_date": None,          # resolved_date initially NULL
+        "assigned_to": "assigned_to",
+    },
+}
+
+
+def map_columns(df, column_map):
+    """
+    Build a DataFrame shaped like the target table from a CSV DataFrame.
+
+    Args:
+        df (DataFrame): Rows as read from the CSV
+        column_map (dict): {table column: CSV column or None}
+
+    Returns:
+        DataFrame: One column per table column, NaN replaced by None
+
+    Raises:
+        KeyError: If a mapped CSV column is missing
+    """
+    missing = [c for c in column_map.values() if c is not None and c not in df.columns]
+    if missing:
+        raise KeyError(f"CSV is missing expected column(s): {', '.join(missing)}")
+
+    # Whole-column selection/renaming - no per-row Python work
+    mapped = pd.DataFrame(
+        {
+            table_col: df[csv_col] if csv_col is not None else None
+            for table_col, csv_col in column_map.items()
+        },
+        index=df.index,
+    )
+
+    # object dtype turns numpy scalars into Python ints/floats/strs that
+    # sqlite3 can bind; where() swaps NaN/NaT for None (SQL NULL)
+    return mapped.astype(object).where(mapped.notna(), None)
+
+
+def insert_dataframe(conn, df, table_name, batch_size=DEFAULT_BATCH_SIZE, commit=True):
+    """
+    Insert an already-mapped DataFrame with batched executemany calls.
+
+    The insert runs inside one explicit transaction. Pass commit=False
+    to leave it open so the caller can add more work (e.g. a checkpoint
+    row) before committing.
+
+    Args:
+        conn: Active database connection
+        df (DataFrame): Rows whose columns match the table's columns
+        table_name (str): Target table
+        batch_size (int): Rows per executemany call
+        commit (bool): Commit once all batches are inserted
+
+    Returns:
+        int: Number of rows inserted
+    """
+    columns = list(df.columns)
+    placeholders = ", ".join("?" for _ in columns)
+    sql = (
+        f"INSERT INTO {table_name} ({', '.join(columns)}) "
+        f"VALUES ({placeholders})"
+    )
+
+    rows = list(df.itertuples(index=False, name=None))
+
+    if not conn.in_transaction:
+        conn.execute("BEGIN")
+
+    try:
+        for start in range(0, len(rows), batch_size):
+            conn.executemany(sql, rows[start:start + batch_size])
+        if commit:
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    mark_tables_changed(table_name)
+    return len(rows)
+
+
+def normalize_source_key(series):
+    # CSV IDs read as floats when the column has gaps (1000 -> 1000.0);
+    # store whole numbers without the ".0" so keys match across runs
+    numeric = pd.to_numeric(series, errors="coerce")
+    present = numeric.dropna()
+    if len(present) == series.notna().sum() and (present % 1 == 0).all():
+        return numeric.astype("Int64").astype("string")
+    return series.astype("string")
+
+
+def read_source(csv_path, source):
+    """
+    Read a keyed CSV source and map it onto its table columns.
+
+    Returns:
+        DataFrame: Mapped rows ready for upsert_dataframe()
+    """
+    df = pd.read_csv(csv_path)
+    source_key = source["columns"][source["key"]]
+    df[source_key] = normalize_source_key(df[source_key])
+    return map_columns(df, source["columns"])
+
+
+def upsert_dataframe(conn, df, table_name, key, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Insert new rows and update changed rows, matched on a source key.
+
+    Rows whose values are identical to what is stored are left alone
+    (the DO UPDATE ... WHERE clause skips them), so only the delta is
+    written. Rows without a key cannot be matched and are inserted.
+
+    Args:
+        conn: Active database connection
+        df (DataFrame): Mapped rows (output of map_columns)
+        table_name (str): Target table (must have a UNIQUE index on key)
+        key (str): Source key column
+        batch_size (int): Rows per executemany call
+
+    Returns:
+        dict: inserted, updated, unchanged and unkeyed row counts
+    """
+    columns = list(df.columns)
+    others = [c for c in columns if c != key]
+
+    placeholders = ", ".join("?" for _ in columns)
+    assignments = ", ".join(f"{c} = excluded.{c}" for c in others)
+    changed = " OR ".join(f"{table_name}.{c} IS NOT excluded.{c}" for c in others)
+
+    sql = (
+        f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders}) "
+        f"ON CONFLICT ({key}) DO UPDATE SET {assignments} WHERE {changed}"
+    )
+
+    keyed = df[df[key].notna()]
+    unkeyed = df[df[key].isna()]
+    rows = list(keyed.itertuples(index=False, name=None))
+
+    count_sql = f"SELECT COUNT({key}) FROM {table_name}"
+
+    # IMMEDIATE takes the write lock up front, so no other writer can
+    # change the key count between the two reads below
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+
+    try:
+        keys_before = conn.execute(count_sql).fetchone()[0]
+
+        # cursor.rowcount counts only rows this statement inserted or
+        # updated; writes made by triggers (e.g. the rollups of
+        # migration 4) are not included, unlike conn.total_changes
+        written = 0
+        for start in range(0, len(rows), batch_size):
+            cursor = conn.executemany(sql, rows[start:start + batch_size])
+            written += cursor.rowcount
+
+        keys_after = conn.execute(count_sql).fetchone()[0]
+
+        if not unkeyed.empty:
+            insert_dataframe(conn, unkeyed, table_name, batch_size, commit=False)
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    mark_tables_changed(table_name)
+
+    # Each keyed row was inserted (new key), updated (values differed)
+    # or skipped by the DO UPDATE ... WHERE clause
+    inserted = keys_after - keys_before
+    updated = written - inserted
+    unchanged = len(rows) - written
+
+    if inserted < 0 or updated < 0 or unchanged < 0:
+        raise RuntimeError(
+            f"Inconsistent upsert counts for '{table_name}': inserted={inserted}, "
+            f"updated={updated}, unchanged={unchanged}, rows={len(rows)}"
+        )
+    assert inserted + updated + unchanged == len(rows)
+
+    return {
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": unchanged,
+        "unkeyed": len(unkeyed),
+    }
+
+
+def incremental_load_csv(conn, source, batch_size=DEFAULT_BATCH_SIZE, data_dir=DATA_DIR):
+    """
+    Idempotently load a CSV source, upserting on its source key.
+
+    Running this twice on the same file inserts nothing the second time.
+
+    Args:
+        conn: Active database connection
+        source (dict): Source definition including a "key" entry
+        batch_size (int): Rows per executemany call
+        data_dir (Path): Directory that holds the CSV files
+
+    Returns:
+        dict: table, rows, seconds, rows_per_sec plus the change summary
+              (inserted, updated, unchanged, unkeyed)
+    """
+    csv_path = data_dir / source["csv"]
+    table_name = source["table"]
+    key = source["key"]
+    report = {
+        "table": table_name, "rows": 0, "seconds": 0.0, "rows_per_sec": 0.0,
+        "inserted": 0, "updated": 0, "unchanged": 0, "unkeyed": 0,
+    }
+
+    if not csv_path.exists():
+        print(f"CSV file not found: {csv_path}")
+        return report
+
+    print(f"Refreshing {table_name} from {csv_path} ...")
+    started = time.perf_counter()
+
+    mapped = read_source(csv_path, source)
+    report.update(upsert_dataframe(conn, mapped, table_name, key, batch_size))
+
+    seconds = time.perf_counter() - started
+    report["rows"] = len(mapped)
+    report["seconds"] = seconds
+    report["rows_per_sec"] = len(mapped) / seconds if seconds > 0 else float(len(mapped))
+
+    print(
+        f"'{table_name}': {report['inserted']} inserted, {report['updated']} updated, "
+        f"{report['unchanged']} unchanged, {report['unkeyed']} without key "
+        f"({seconds:.2f}s, {report['rows_per_sec']:,.0f} rows/sec)."
+    )
+    return report
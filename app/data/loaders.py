@@ -1,11 +1,32 @@
+import time
+
 import pandas as pd
 from pathlib import Path
 from app.data.db import DATA_DIR
+from app.data.ingest import insert_dataframe, map_columns
+from app.data.migrations import require_schema
+from app.data.schema import create_ingest_checkpoints_table
+
+
+# Default number of rows read per chunk in streaming mode
+DEFAULT_CHUNK_ROWS = 50_000
+
+# Default upper bound for one in-memory chunk (megabytes)
+DEFAULT_MAX_CHUNK_MB = 64
 
+# Rows read first to estimate the size of a row before sizing chunks
+PROBE_ROWS = 1_000
 
-def load_csv_to_table(conn, csv_filename, table_name):
+# Migration that adds the file fingerprint to ingest_checkpoints
+CHECKPOINT_SCHEMA_VERSION = 6
+
+
+def load_csv_to_table(conn, csv_filename, table_name, chunksize=None, **stream_options):
     """
     Load a CSV file into a database table using pandas.
+
+    Pass `chunksize` to stream the file in chunks instead of reading it
+    all at once (see stream_csv_to_table for the extra options).
     """
     # Build the full path to the CSV file inside the DATA directory
     csv_path = DATA_DIR / csv_filename
@@ -15,6 +36,12 @@ def load_csv_to_table(conn, csv_filename, table_name):
         print(f" CSV file not found: {csv_path}")
         return 0  # Return 0 rows loaded if file is missing
 
+    # Large files: stream in bounded-memory chunks
+    if chunksize:
+        return stream_csv_to_table(
+            conn, csv_path, table_name, chunksize=chunksize, **stream_options
+        )
+
     # Read the CSV file into a pandas DataFrame
     df = pd.read_csv(csv_path)
 
@@ -36,3 +63,176 @@ def load_csv_to_table(conn, csv_filename, table_name):
 
     # Return the number of rows inserted
     return row_count
+
+
+def _next_chunk_size(chunk, chunksize, max_bytes):
+    # Rows per chunk from the measured bytes per row of the last chunk
+    if not max_bytes:
+        return chunksize
+    row_bytes = chunk.memory_usage(deep=True).sum() / len(chunk)
+    return max(1, min(chunksize, int(max_bytes // max(row_bytes, 1))))
+
+
+def iter_csv_batches(csv_path, chunksize=DEFAULT_CHUNK_ROWS,
+                     max_memory_mb=DEFAULT_MAX_CHUNK_MB, skip_rows=0):
+    """
+    Yield a CSV file as a sequence of DataFrame chunks.
+
+    The first chunk is a small probe used to measure bytes per row;
+    later chunks are sized so that one chunk stays under max_memory_mb
+    (and never above `chunksize` rows).
+
+    Args:
+        csv_path (Path): CSV file to read
+        chunksize (int): Maximum rows per chunk
+        max_memory_mb (float): Memory ceiling for one chunk, or None
+        skip_rows (int): Data rows to skip at the start (for resuming)
+
+    Yields:
+        DataFrame: The next chunk of rows
+    """
+    max_bytes = max_memory_mb * 1024 * 1024 if max_memory_mb else None
+    next_size = min(chunksize, PROBE_ROWS)
+
+    with pd.read_csv(csv_path, iterator=True) as reader:
+        # Resuming: read past the committed rows in bounded chunks and
+        # drop them (skiprows=range(...) would build a set of every
+        # skipped row number)
+        remaining = skip_rows
+        while remaining:
+            try:
+                skipped = reader.get_chunk(min(remaining, next_size))
+            except StopIteration:
+                return
+            if skipped.empty:
+                return
+            remaining -= len(skipped)
+            next_size = _next_chunk_size(skipped, chunksize, max_bytes)
+
+        while True:
+            try:
+                chunk = reader.get_chunk(next_size)
+            except StopIteration:
+                return
+
+            if chunk.empty:
+                return
+
+            yield chunk
+
+            # Resize the next chunk from the measured bytes per row
+            next_size = _next_chunk_size(chunk, chunksize, max_bytes)
+
+
+def file_fingerprint(csv_path):
+    """
+    Identify one version of a file (size and modification time).
+    """
+    stat = Path(csv_path).stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def get_checkpoint(conn, source, table_name, fingerprint=None):
+    """
+    Return how many rows of `source` were already committed to a table.
+
+    If `fingerprint` is given and the checkpoint was written for another
+    version of the file, the checkpoint does not apply and 0 is returned.
+    """
+    create_ingest_checkpoints_table(conn)
+    row = conn.execute(
+        "SELECT rows_committed, fingerprint FROM ingest_checkpoints "
+        "WHERE source = ? AND table_name = ?",
+        (source, table_name),
+    ).fetchone()
+
+    if row is None:
+        return 0
+    if fingerprint is not None and row[1] != fingerprint:
+        print(f" {source} changed since its checkpoint - loading it from the start")
+        return 0
+    return row[0]
+
+
+def clear_checkpoint(conn, source, table_name):
+    """
+    Forget the checkpoint for a source once it has loaded completely.
+    """
+    conn.execute(
+        "DELETE FROM ingest_checkpoints WHERE source = ? AND table_name = ?",
+        (source, table_name),
+    )
+    conn.commit()
+
+
+def stream_csv_to_table(conn, csv_path, table_name, chunksize=DEFAULT_CHUNK_ROWS,
+                        max_memory_mb=DEFAULT_MAX_CHUNK_MB, column_map=None,
+                        progress=None, resume=True):
+    """
+    Stream a CSV file into a table one chunk at a time.
+
+    Each chunk is inserted and its checkpoint row updated in the same
+    transaction, so after a crash the next run (with resume=True)
+    continues from the last committed chunk instead of starting over.
+    The checkpoint records the file's size and mtime; if the file has
+    changed since, the load starts from the top. Needs migration 6.
+
+    Args:
+        conn: Active database connection
+        csv_path (Path): CSV file to load
+        table_name (str): Target table (created from the CSV header if missing)
+        chunksize (int): Maximum rows per chunk
+        max_memory_mb (float): Memory ceiling for one chunk
+        column_map (dict): Optional {table column: CSV column or None}
+        progress (callable): Called as progress(rows_done, chunk_rows, elapsed_s)
+        resume (bool): Continue from an existing checkpoint
+
+    Returns:
+        int: Number of rows inserted by this call
+    """
+    csv_path = Path(csv_path)
+    source = csv_path.name
+    fingerprint = file_fingerprint(csv_path)
+
+    require_schema(conn, CHECKPOINT_SCHEMA_VERSION, "Streaming CSV loads")
+    committed = get_checkpoint(conn, source, table_name, fingerprint) if resume else 0
+    if committed:
+        print(f" Resuming {source} -> '{table_name}' after {committed} committed rows")
+
+    started = time.perf_counter()
+    inserted = 0
+
+    for chunk in iter_csv_batches(csv_path, chunksize, max_memory_mb, skip_rows=committed):
+        if committed + inserted == 0 and column_map is None:
+            # First chunk of a generic load: let pandas create the table
+            chunk.head(0).to_sql(table_name, conn, if_exists="append", index=False)
+
+        # Without a map the CSV header names are the table columns
+        chunk = map_columns(chunk, column_map or {c: c for c in chunk.columns})
+
+        rows = insert_dataframe(conn, chunk, table_name, commit=False)
+        inserted += rows
+
+        # Record progress in the same transaction as the rows themselves
+        conn.execute(
+            """
+            INSERT INTO ingest_checkpoints
+                (source, table_name, rows_committed, fingerprint)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (source, table_name) DO UPDATE SET
+                rows_committed = excluded.rows_committed,
+                fingerprint = excluded.fingerprint,
+                updated_at = CURRENT_TIMESTAMP
+            """,
+            (source, table_name, committed + inserted, fingerprint),
+        )
+        conn.commit()
+
+        if progress is not None:
+            progress(committed + inserted, rows, time.perf_counter() - started)
+
+    # File fully loaded: the next run starts from the top again
+    clear_checkpoint(conn, source, table_name)
+
+    print(f" Streamed {inserted} rows from {source} into '{table_name}' table.")
+    return inserted
@@ -0,0 +1,552 @@
+"""
+migrations.py
+--------------
+Versioned schema migrations for the Multi-Domain Intelligence Platform.
+
+`create_all_tables()` in schema.py builds the base tables. Anything that
+changes the schema afterwards (indexes, new columns, new tables) is added
+here as a numbered up-migration, so existing databases are upgraded in
+order and each step runs exactly once. The newest applied version is
+also stored in `PRAGMA user_version`, so code that depends on a schema
+step can check for it with one cheap read (see require_schema) instead
+of migrating from inside a page request.
+
+Run from the project root:
+    python -m app.data.migrations            # apply pending migrations
+    python -m app.data.migrations --dry-run  # show what would run
+    python -m app.data.migrations --check    # EXPLAIN QUERY PLAN check
+"""
+
+import sys
+
+from app.data.db import connect_database
+
+
+# -------------------------------------------------
+# Ordered list of up-migrations: (version, name, [SQL statements])
+# Never edit or reorder an applied migration - append a new one instead.
+# -------------------------------------------------
+MIGRATIONS = [
+    (
+        1,
+        "domain table indexes",
+        [
+            # Dashboard filters and get_high_severity_by_status()
+            "CREATE INDEX IF NOT EXISTS idx_incidents_severity_status "
+            "ON cyber_incidents (severity, status)",
+            # get_incidents_by_type_count() / types with many cases
+            "CREATE INDEX IF NOT EXISTS idx_incidents_type "
+            "ON cyber_incidents (incident_type)",
+            # Recent incidents ordered by date
+            "CREATE INDEX IF NOT EXISTS idx_incidents_date "
+            "ON cyber_incidents (date)",
+            # Ticket priority/status filters
+            "CREATE INDEX IF NOT EXISTS idx_tickets_priority_status "
+            "ON it_tickets (priority, status)",
+            # Workload per support engineer
+            "CREATE INDEX IF NOT EXISTS idx_tickets_assigned_status "
+            "ON it_tickets (assigned_to, status)",
+        ],
+    ),
+    (
+        2,
+        "source keys for incremental loads",
+        [
+            # IDs from the CSV exports; NULL for rows added in the app
+            "ALTER TABLE it_tickets ADD COLUMN ticket_id TEXT",
+            "ALTER TABLE datasets_metadata ADD COLUMN dataset_id TEXT",
+            # UNIQUE allows many NULLs, so app-created rows are unaffected
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_incidents_source_key "
+            "ON cyber_incidents (incident_id)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_tickets_source_key "
+            "ON it_tickets (ticket_id)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_datasets_source_key "
+            "ON datasets_metadata (dataset_id)",
+        ],
+    ),
+    (
+        3,
+        "persistent AI chat history",
+        [
+            # One row per conversation, listed newest first per user
+            "CREATE TABLE IF NOT EXISTS chat_conversations ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "username TEXT NOT NULL, "
+            "mode TEXT, "
+            "created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, "
+            "updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)",
+            "CREATE INDEX IF NOT EXISTS idx_chat_conversations_user "
+            "ON chat_conversations (username, updated_at)",
+            # Messages are append-only; pages are read by (conversation, id)
+            "CREATE TABLE IF NOT EXISTS chat_messages ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "conversation_id INTEGER NOT NULL REFERENCES chat_conversations (id), "
+            "role TEXT NOT NULL, "
+            "content TEXT NOT NULL, "
+            "created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)",
+            "CREATE INDEX IF NOT EXISTS idx_chat_messages_conversation "
+            "ON chat_messages (conversation_id, id)",
+            "CREATE TRIGGER IF NOT EXISTS chat_messages_no_update "
+            "BEFORE UPDATE ON chat_messages "
+            "BEGIN SELECT RAISE(ABORT, 'chat_messages is append-only'); END",
+            "CREATE TRIGGER IF NOT EXISTS chat_messages_no_delete "
+            "BEFORE DELETE ON chat_messages "
+            "BEGIN SELECT RAISE(ABORT, 'chat_messages is append-only'); END",
+        ],
+    ),
+    (
+        4,
+        "analytics rollup tables",
+        [
+            # Pre-aggregated counts (see app/data/rollups.py). Keys may be
+            # NULL, so each unique index is on ifnull(key, '') and the
+            # triggers upsert against it.
+            "CREATE TABLE IF NOT EXISTS incident_type_counts ("
+            "incident_type TEXT, count INTEGER NOT NULL)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_incident_type_counts_key "
+            "ON incident_type_counts (ifnull(incident_type, ''))",
+            "CREATE TABLE IF NOT EXISTS incident_severity_status_counts ("
+            "severity TEXT, status TEXT, count INTEGER NOT NULL)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_incident_severity_status_counts_key "
+            "ON incident_severity_status_counts (ifnull(severity, ''), ifnull(status, ''))",
+            "CREATE TABLE IF NOT EXISTS incident_daily_counts ("
+            "day TEXT, count INTEGER NOT NULL)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_incident_daily_counts_key "
+            "ON incident_daily_counts (ifnull(day, ''))",
+            "CREATE TABLE IF NOT EXISTS ticket_priority_status_counts ("
+            "priority TEXT, status TEXT, count INTEGER NOT NULL)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_ticket_priority_status_counts_key "
+            "ON ticket_priority_status_counts (ifnull(priority, ''), ifnull(status, ''))",
+            "CREATE TABLE IF NOT EXISTS ticket_daily_counts ("
+            "day TEXT, count INTEGER NOT NULL)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_ticket_daily_counts_key "
+            "ON ticket_daily_counts (ifnull(day, ''))",
+
+            # Backfill from the existing rows. nullif(key, '') groups NULL
+            # and '' together, like the unique indexes do.
+            "INSERT INTO incident_type_counts (incident_type, count) "
+            "SELECT nullif(incident_type, ''), COUNT(*) FROM cyber_incidents GROUP BY 1",
+            "INSERT INTO incident_severity_status_counts (severity, status, count) "
+            "SELECT nullif(severity, ''), nullif(status, ''), COUNT(*) "
+            "FROM cyber_incidents GROUP BY 1, 2",
+            "INSERT INTO incident_daily_counts (day, count) "
+            "SELECT nullif(date(date), ''), COUNT(*) FROM cyber_incidents GROUP BY 1",
+            "INSERT INTO ticket_priority_status_counts (priority, status, count) "
+            "SELECT nullif(priority, ''), nullif(status, ''), COUNT(*) "
+            "FROM it_tickets GROUP BY 1, 2",
+            "INSERT INTO ticket_daily_counts (day, count) "
+            "SELECT nullif(date(created_date), ''), COUNT(*) FROM it_tickets GROUP BY 1",
+
+            # Incidents: +1 on insert, -1 on delete (empty groups are removed)
+            "CREATE TRIGGER IF NOT EXISTS cyber_incidents_rollup_insert "
+            "AFTER INSERT ON cyber_incidents BEGIN "
+            "INSERT INTO incident_type_counts (incident_type, count) "
+            "VALUES (NEW.incident_type, 1) "
+            "ON CONFLICT (ifnull(incident_type, '')) DO UPDATE SET count = count + 1; "
+            "INSERT INTO incident_severity_status_counts (severity, status, count) "
+            "VALUES (NEW.severity, NEW.status, 1) "
+            "ON CONFLICT (ifnull(severity, ''), ifnull(status, '')) "
+            "DO UPDATE SET count = count + 1; "
+            "INSERT INTO incident_daily_counts (day, count) VALUES (date(NEW.date), 1) "
+            "ON CONFLICT (ifnull(day, '')) DO UPDATE SET count = count + 1; "
+            "END",
+            "CREATE TRIGGER IF NOT EXISTS cyber_incidents_rollup_delete "
+            "AFTER DELETE ON cyber_incidents BEGIN "
+            "UPDATE incident_type_counts SET count = count - 1 "
+            "WHERE ifnull(incident_type, '') = ifnull(OLD.incident_type, ''); "
+            "DELETE FROM incident_type_counts "
+            "WHERE ifnull(incident_type, '') = ifnull(OLD.incident_type, '') AND count <= 0; "
+            "UPDATE incident_severity_status_counts SET count = count - 1 "
+            "WHERE ifnull(severity, '') = ifnull(OLD.severity, '') "
+            "AND ifnull(status, '') = ifnull(OLD.status, ''); "
+            "DELETE FROM incident_severity_status_counts "
+            "WHERE ifnull(severity, '') = ifnull(OLD.severity, '') "
+            "AND ifnull(status, '') = ifnull(OLD.status, '') AND count <= 0; "
+            "UPDATE incident_daily_counts SET count = count - 1 "
+            "WHERE ifnull(day, '') = ifnull(date(OLD.date), ''); "
+            "DELETE FROM incident_daily_counts "
+            "WHERE ifnull(day, '') = ifnull(date(OLD.date), '') AND count <= 0; "
+            "END",
+
+            # Updates move the row from its old group to the new one
+            "CREATE TRIGGER IF NOT EXISTS cyber_incidents_rollup_update_type "
+            "AFTER UPDATE OF incident_type ON cyber_incidents "
+            "WHEN OLD.incident_type IS NOT NEW.incident_type BEGIN "
+            "UPDATE incident_type_counts SET count = count - 1 "
+            "WHERE ifnull(incident_type, '') = ifnull(OLD.incident_type, ''); "
+            "DELETE FROM incident_type_counts "
+            "WHERE ifnull(incident_type, '') = ifnull(OLD.incident_type, '') AND count <= 0; "
+            "INSERT INTO incident_type_counts (incident_type, count) "
+            "VALUES (NEW.incident_type, 1) "
+            "ON CONFLICT (ifnull(incident_type, '')) DO UPDATE SET count = count + 1; "
+            "END",
+            "CREATE TRIGGER IF NOT EXISTS cyber_incidents_rollup_update_severity_status "
+            "AFTER UPDATE OF severity, status ON cyber_incidents "
+            "WHEN OLD.severity IS NOT NEW.severity OR OLD.status IS NOT NEW.status BEGIN "
+            "UPDATE incident_severity_status_counts SET count = count - 1 "
+            "WHERE ifnull(severity, '') = ifnull(OLD.severity, '') "
+            "AND ifnull(status, '') = ifnull(OLD.status, ''); "
+            "DELETE FROM incident_severity_status_counts "
+            "WHERE ifnull(severity, '') = ifnull(OLD.severity, '') "
+            "AND ifnull(status, '') = ifnull(OLD.status, '') AND count <= 0; "
+            "INSERT INTO incident_severity_status_counts (severity, status, count) "
+            "VALUES (NEW.severity, NEW.status, 1) "
+            "ON CONFLICT (ifnull(severity, ''), ifnull(status, '')) "
+            "DO UPDATE SET count = count + 1; "
+            "END",
+            "CREATE TRIGGER IF NOT EXISTS cyber_incidents_rollup_update_day "
+            "AFTER UPDATE OF date ON cyber_incidents "
+            "WHEN date(OLD.date) IS NOT date(NEW.date) BEGIN "
+            "UPDATE incident_daily_counts SET count = count - 1 "
+            "WHERE ifnull(day, '') = ifnull(date(OLD.date), ''); "
+            "DELETE FROM incident_daily_counts "
+            "WHERE ifnull(day, '') = ifnull(date(OLD.date), '') AND count <= 0; "
+            "INSERT INTO incident_daily_counts (day, count) VALUES (date(NEW.date), 1) "
+            "ON CONFLICT (ifnull(day, '')) DO UPDATE SET count = count + 1; "
+            "END",
+
+            # Tickets: same scheme
+            "CREATE TRIGGER IF NOT EXISTS it_tickets_rollup_insert "
+            "AFTER INSERT ON it_tickets BEGIN "
+            "INSERT INTO ticket_priority_status_counts (priority, status, count) "
+            "VALUES (NEW.priority, NEW.status, 1) "
+            "ON CONFLICT (ifnull(priority, ''), ifnull(status, '')) "
+            "DO UPDATE SET count = count + 1; "
+            "INSERT INTO ticket_daily_counts (day, count) VALUES (date(NEW.created_date), 1) "
+            "ON CONFLICT (ifnull(day, '')) DO UPDATE SET count = count + 1; "
+            "END",
+            "CREATE TRIGGER IF NOT EXISTS it_tickets_rollup_delete "
+            "AFTER DELETE ON it_tickets BEGIN "
+            "UPDATE ticket_priority_status_counts SET count = count - 1 "
+            "WHERE ifnull(priority, '') = ifnull(OLD.priority, '') "
+            "AND ifnull(status, '') = ifnull(OLD.status, ''); "
+            "DELETE FROM ticket_priority_status_counts "
+            "WHERE ifnull(priority, '') = ifnull(OLD.priority, '') "
+            "AND ifnull(status, '') = ifnull(OLD.status, '') AND count <= 0; "
+            "UPDATE ticket_daily_counts SET count = count - 1 "
+            "WHERE ifnull(day, '') = ifnull(date(OLD.created_date), ''); "
+            "DELETE FROM ticket_daily_counts "
+            "WHERE ifnull(day, '') = ifnull(date(OLD.created_date), '') AND count <= 0; "
+            "END",
+            "CREATE TRIGGER IF NOT EXISTS it_tickets_rollup_update_priority_status "
+            "AFTER UPDATE OF priority, status ON it_tickets "
+            "WHEN OLD.priority IS NOT NEW.priority OR OLD.status IS NOT NEW.status BEGIN "
+            "UPDATE ticket_priority_status_counts SET count = count - 1 "
+            "WHERE ifnull(priority, '') = ifnull(OLD.priority, '') "
+            "AND ifnull(status, '') = ifnull(OLD.status, ''); "
+            "DELETE FROM ticket_priority_status_counts "
+            "WHERE ifnull(priority, '') = ifnull(OLD.priority, '') "
+            "AND ifnull(status, '') = ifnull(OLD.status, '') AND count <= 0; "
+            "INSERT INTO ticket_priority_status_counts (priority, status, count) "
+            "VALUES (NEW.priority, NEW.status, 1) "
+            "ON CONFLICT (ifnull(priority, ''), ifnull(status, '')) "
+            "DO UPDATE SET count = count + 1; "
+            "END",
+            "CREATE TRIGGER IF NOT EXISTS it_tickets_rollup_update_day "
+            "AFTER UPDATE OF created_date ON it_tickets "
+            "WHEN date(OLD.created_date) IS NOT date(NEW.created_date) BEGIN "
+            "UPDATE ticket_daily_counts SET count = count - 1 "
+            "WHERE ifnull(day, '') = ifnull(date(OLD.created_date), ''); "
+            "DELETE FROM ticket_daily_counts "
+            "WHERE ifnull(day, '') = ifnull(date(OLD.created_date), '') AND count <= 0; "
+            "INSERT INTO ticket_daily_counts (day, count) VALUES (date(NEW.created_date), 1) "
+            "ON CONFLICT (ifnull(day, '')) DO UPDATE SET count = count + 1; "
+            "END",
+        ],
+    ),
+    (
+        5,
+        "row change log for the retrieval index",
+        [
+            # One row per changed record (see app/services/retrieval.py).
+            # The triggers delete a record's old entry before logging it
+            # again under a new, higher seq (AUTOINCREMENT never reuses
+            # one), so the log holds at most one entry per record and
+            # "seq > last seen" lists exactly the records to re-read.
+            # (Plain DELETE + INSERT rather than INSERT OR REPLACE: an
+            # outer INSERT OR IGNORE would turn REPLACE into IGNORE.)
+            "CREATE TABLE IF NOT EXISTS record_changes ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "table_name TEXT NOT NULL, "
+            "row_id INTEGER NOT NULL, "
+            "UNIQUE (table_name, row_id))",
+            "CREATE TRIGGER IF NOT EXISTS cyber_incidents_log_insert "
+            "AFTER INSERT ON cyber_incidents BEGIN "
+            "DELETE FROM record_changes WHERE table_name = 'cyber_incidents' AND row_id = NEW.id; "
+            "INSERT INTO record_changes (table_name, row_id) VALUES ('cyber_incidents', NEW.id); END",
+            "CREATE TRIGGER IF NOT EXISTS cyber_incidents_log_update "
+            "AFTER UPDATE ON cyber_incidents BEGIN "
+            "DELETE FROM record_changes WHERE table_name = 'cyber_incidents' AND row_id = NEW.id; "
+            "INSERT INTO record_changes (table_name, row_id) VALUES ('cyber_incidents', NEW.id); END",
+            "CREATE TRIGGER IF NOT EXISTS cyber_incidents_log_delete "
+            "AFTER DELETE ON cyber_incidents BEGIN "
+            "DELETE FROM record_changes WHERE table_name = 'cyber_incidents' AND row_id = OLD.id; "
+            "INSERT INTO record_changes (table_name, row_id) VALUES ('cyber_incidents', OLD.id); END",
+            "CREATE TRIGGER IF NOT EXISTS it_tickets_log_insert "
+            "AFTER INSERT ON it_tickets BEGIN "
+            "DELETE FROM record_changes WHERE table_name = 'it_tickets' AND row_id = NEW.id; "
+            "INSERT INTO record_changes (table_name, row_id) VALUES ('it_tickets', NEW.id); END",
+            "CREATE TRIGGER IF NOT EXISTS it_tickets_log_update "
+            "AFTER UPDATE ON it_tickets BEGIN "
+            "DELETE FROM record_changes WHERE table_name = 'it_tickets' AND row_id = NEW.id; "
+            "INSERT INTO record_changes (table_name, row_id) VALUES ('it_tickets', NEW.id); END",
+            "CREATE TRIGGER IF NOT EXISTS it_tickets_log_delete "
+            "AFTER DELETE ON it_tickets BEGIN "
+            "DELETE FROM record_changes WHERE table_name = 'it_tickets' AND row_id = OLD.id; "
+            "INSERT INTO record_changes (table_name, row_id) VALUES ('it_tickets', OLD.id); END",
+        ],
+    ),
+    (
+        6,
+        "source file fingerprint for streaming-load checkpoints",
+        [
+            # Created by create_all_tables(); repeated here for databases
+            # set up before the streaming loader existed
+            "CREATE TABLE IF NOT EXISTS ingest_checkpoints ("
+            "source TEXT NOT NULL, "
+            "table_name TEXT NOT NULL, "
+            "rows_committed INTEGER NOT NULL, "
+            "updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, "
+            "PRIMARY KEY (source, table_name))",
+            # Size and mtime of the file a checkpoint belongs to; another
+            # file with the same name starts from the top
+            "ALTER TABLE ingest_checkpoints ADD COLUMN fingerprint TEXT",
+        ],
+    ),
+]
+
+
+# -------------------------------------------------
+# Hot queries that must stay index-backed: (name, SQL, params)
+# -------------------------------------------------
+HOT_QUERIES = [
+    (
+        "incidents filtered by severity and status",
+        "SELECT id, date, incident_type, severity, status, description "
+        "FROM cyber_incidents WHERE severity IN (?, ?) AND status IN (?, ?)",
+        ("High", "Critical", "Open", "Investigating"),
+    ),
+    (
+        "incidents by type count",
+        "SELECT incident_type, COUNT(*) AS count FROM cyber_incidents "
+        "GROUP BY incident_type ORDER BY count DESC",
+        (),
+    ),
+    (
+        "high severity incidents by status",
+        "SELECT status, COUNT(*) AS count FROM cyber_incidents "
+        "WHERE severity = 'High' GROUP BY status ORDER BY count DESC",
+        (),
+    ),
+    (
+        "recent incidents by date",
+        "SELECT id, date, incident_type, severity, status "
+        "FROM cyber_incidents ORDER BY date DESC LIMIT 50",
+        (),
+    ),
+    (
+        "tickets filtered by priority and status",
+        "SELECT id, priority, status FROM it_tickets "
+        "WHERE priority = ? AND status = ?",
+        ("High", "Open"),
+    ),
+    (
+        "tickets assigned to an engineer by status",
+        "SELECT id, priority, status FROM it_tickets "
+        "WHERE assigned_to = ? AND status = ?",
+        ("IT_Support_A", "Open"),
+    ),
+    (
+        "earlier chat messages of a conversation",
+        "SELECT id, role, content FROM chat_messages "
+        "WHERE conversation_id = ? AND id < ? ORDER BY id DESC LIMIT 20",
+        (1, 100),
+    ),
+    (
+        "retrieval index change log",
+        "SELECT table_name, row_id FROM record_changes WHERE seq > ? ORDER BY seq",
+        (0,),
+    ),
+    (
+        "rollup group lookup (used by the rollup triggers)",
+        "SELECT count FROM incident_severity_status_counts "
+        "WHERE ifnull(severity, '') = ? AND ifnull(status, '') = ?",
+        ("High", "Open"),
+    ),
+]
+
+
+def create_migrations_table(conn):
+    # Bookkeeping table: one row per applied migration
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,            -- migration number
+            name TEXT NOT NULL,                     -- short description
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.commit()
+
+
+def get_applied_versions(conn):
+    """
+    Return the set of migration versions already applied.
+    """
+    create_migrations_table(conn)
+    rows = conn.execute("SELECT version FROM schema_migrations").fetchall()
+    return {row[0] for row in rows}
+
+
+def get_pending_migrations(conn):
+    """
+    Return migrations not yet applied, in version order.
+    """
+    applied = get_applied_versions(conn)
+    return [m for m in sorted(MIGRATIONS) if m[0] not in applied]
+
+
+def apply_migrations(conn, dry_run=False):
+    """
+    Apply all pending migrations in order.
+
+    Each migration runs inside its own transaction together with its
+    schema_migrations row, so a failure leaves no half-applied step.
+
+    Args:
+        conn: Active database connection
+        dry_run (bool): If True, only print the SQL that would run
+
+    Returns:
+        list: (version, name) of the migrations applied (or pending,
+              in dry-run mode)
+    """
+    pending = get_pending_migrations(conn)
+
+    if not pending:
+        # Databases migrated before user_version was kept get it now
+        latest = max(get_applied_versions(conn), default=0)
+        if not dry_run and schema_version(conn) != latest:
+            conn.execute(f"PRAGMA user_version = {int(latest)}")
+        print("Schema is up to date.")
+        return []
+
+    for version, name, statements in pending:
+        if dry_run:
+            print(f"[dry-run] migration {version}: {name}")
+            for sql in statements:
+                print(f"    {sql};")
+            continue
+
+        try:
+            conn.execute("BEGIN")
+            for sql in statements:
+                conn.execute(sql)
+            conn.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (?, ?)",
+                (version, name),
+            )
+            # Part of the same transaction, so it never runs ahead
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            print(f"Migration {version} ({name}) failed - rolled back.")
+            raise
+
+        print(f"Applied migration {version}: {name}")
+
+    return [(version, name) for version, name, _ in pending]
+
+
+def schema_version(conn):
+    """
+    Return the newest migration applied to the database (0 if none).
+    """
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def require_schema(conn, version, feature):
+    """
+    Fail clearly if the database has not been migrated far enough.
+
+    Args:
+        conn: Active database connection
+        version (int): Migration the caller depends on
+        feature (str): What needs it, for the error message
+
+    Raises:
+        RuntimeError: If migration `version` has not been applied
+    """
+    current = schema_version(conn)
+    if current < version:
+        raise RuntimeError(
+            f"{feature} needs schema migration {version}, but the database is at "
+            f"version {current}. Run the migrations first: "
+            f"python -m app.data.migrations"
+        )
+
+
+def explain_query(conn, sql, params=()):
+    """
+    Return the EXPLAIN QUERY PLAN detail lines for a query.
+    """
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    # Each row is (id, parent, notused, detail)
+    return [row[-1] for row in rows]
+
+
+def is_table_scan(detail):
+    # "SCAN t USING [COVERING] INDEX ..." walks an index, which is fine;
+    # a bare "SCAN t" reads every row of the table.
+    return detail.startswith("SCAN ") and "INDEX" not in detail
+
+
+def check_query_plans(conn, queries=HOT_QUERIES):
+    """
+    Fail if any hot query falls back to a full table scan.
+
+    Args:
+        conn: Active database connection
+        queries (list): (name, SQL, params) tuples to check
+
+    Returns:
+        dict: {query name: plan detail lines}
+
+    Raises:
+        RuntimeError: If one or more queries scan a whole table
+    """
+    plans = {}
+    failures = []
+
+    for name, sql, params in queries:
+        plan = explain_query(conn, sql, params)
+        plans[name] = plan
+
+        scans = [detail for detail in plan if is_table_scan(detail)]
+        if scans:
+            failures.append(f"{name}: {'; '.join(scans)}")
+
+    if failures:
+        raise RuntimeError(
+            "Hot queries fell back to a table scan:\n  " + "\n  ".join(failures)
+        )
+
+    return plans
+
+
+# ------------------------------------------------------------
+# Command-line entry point
+# ------------------------------------------------------------
+if __name__ == "__main__":
+    conn = connect_database()
+
+    if "--check" in sys.argv:
+        for query_name, plan in check_query_plans(conn).items():
+            print(f"{query_name}:")
+            for line in plan:
+                print(f"    {line}")
+        print("All hot queries are index-backed.")
+    else:
+        apply_migrations(conn, dry_run="--dry-run" in sys.argv)
+
+    conn.close()
@@ -0,0 +1,144 @@
+"""
+pagination.py
+--------------
+Keyset (seek) pagination shared by the incident and ticket browsers.
+
+OFFSET-based paging makes SQLite walk past every skipped row, so page
+10,000 costs 10,000 pages of work. Keyset paging remembers the last row
+of the previous page (the "cursor") and asks for rows after it, which
+is one index seek no matter how deep the page is.
+
+Two orderings are supported, both newest first:
+- "id":   cursor is the last id                 (primary key)
+- "date": cursor is the last (date, id) pair    (cyber_incidents only,
+          served by idx_incidents_date, which ends in the rowid)
+"""
+
+import sqlite3
+
+import pandas as pd
+
+
+# Default and maximum rows per page
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def _clamp_page_size(limit):
+    return max(1, min(int(limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+
+
+def _read(conn, sql, params):
+    return pd.read_sql_query(sql, conn, params=params)
+
+
+def fetch_page(conn, table_name, columns, after=None, limit=DEFAULT_PAGE_SIZE,
+               order_by="id"):
+    """
+    Return one page of rows after a cursor.
+
+    Args:
+        conn: Active database connection
+        table_name (str): Table to page through
+        columns (list): Columns to select ("id" and, for date order,
+                        "date" are added if missing)
+        after: Cursor returned with the previous page, or None for page 1
+        limit (int): Rows per page (capped at MAX_PAGE_SIZE)
+        order_by (str): "id" or "date"
+
+    Returns:
+        tuple: (DataFrame page, next cursor or None when this is the last page)
+    """
+    limit = _clamp_page_size(limit)
+
+    needed = ["id"] + (["date"] if order_by == "date" else [])
+    columns = list(columns) + [c for c in needed if c not in columns]
+    select = f"SELECT {', '.join(columns)} FROM {table_name}"
+
+    # Fetch one extra row to find out whether another page exists
+    if order_by == "id":
+        if after is None:
+            page = _read(conn, f"{select} ORDER BY id DESC LIMIT ?", [limit + 1])
+        else:
+            page = _read(
+                conn, f"{select} WHERE id < ? ORDER BY id DESC LIMIT ?",
+                [after, limit + 1],
+            )
+
+    elif order_by == "date":
+        after_date, after_id = after if after is not None else (None, None)
+
+        # Rows with a date first (date DESC, id DESC), then undated rows
+        # by id. Row-value comparisons never match NULL, so the undated
+        # tail is paged separately.
+        if after is None or after_date is not None:
+            if after is None:
+                page = _read(
+                    conn,
+                    f"{select} WHERE date IS NOT NULL "
+                    f"ORDER BY date DESC, id DESC LIMIT ?",
+                    [limit + 1],
+                )
+            else:
+                page = _read(
+                    conn,
+                    f"{select} WHERE date IS NOT NULL AND (date, id) < (?, ?) "
+                    f"ORDER BY date DESC, id DESC LIMIT ?",
+                    [after_date, after_id, limit + 1],
+                )
+
+            if len(page) <= limit:
+                tail = _read(
+                    conn,
+                    f"{select} WHERE date IS NULL ORDER BY id DESC LIMIT ?",
+                    [limit + 1 - len(page)],
+                )
+                page = pd.concat([page, tail], ignore_index=True) if len(tail) else page
+        else:
+            page = _read(
+                conn,
+                f"{select} WHERE date IS NULL AND id < ? ORDER BY id DESC LIMIT ?",
+                [after_id, limit + 1],
+            )
+
+    else:
+        raise ValueError("order_by must be 'id' or 'date'")
+
+    if len(page) <= limit:
+        return page, None
+
+    page = page.iloc[:limit]
+    last = page.iloc[-1]
+
+    if order_by == "id":
+        next_cursor = int(last["id"])
+    else:
+        last_date = None if pd.isna(last["date"]) else last["date"]
+        next_cursor = (last_date, int(last["id"]))
+
+    return page, next_cursor
+
+
+def estimate_row_count(conn, table_name):
+    """
+    Cheap estimate of a table's row count (no full COUNT(*) scan).
+
+    Uses the row count recorded by ANALYZE when available, otherwise
+    the id range (two index seeks), which over-counts by deleted rows.
+    """
+    try:
+        # The first number of every stat row is the table's row count
+        row = conn.execute(
+            "SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1",
+            (table_name,),
+        ).fetchone()
+    except sqlite3.OperationalError:
+        row = None      # sqlite_stat1 only exists after ANALYZE
+
+    if row and row[0]:
+        return int(str(row[0]).split()[0])
+
+    low, high = conn.execute(f"SELECT MIN(id), MAX(id) FROM {table_name}").fetchone()
+    if low is None:
+        return 0
+    return high - low + 1
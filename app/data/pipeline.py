@@ -0,0 +1,218 @@
+"""
+pipeline.py
+------------
+Parallel multi-table ingest pipeline.
+
+Stage 1 (parse): each CSV source is read in chunks of `batch_size` rows
+(read_csv(chunksize=...)) and mapped onto its table columns in a
+separate worker process, so the files parse on all cores.
+
+Stage 2 (write): the calling thread owns the SQLite connection and
+upserts batches one at a time - SQLite allows only one writer anyway.
+
+The two stages are joined by a bounded cross-process queue. Workers put
+each chunk as soon as it is parsed; when the writer falls behind, the
+queue fills up and the workers block before reading more of their file
+(back-pressure). At most max_pending_batches chunks plus one chunk per
+worker are in memory at any time.
+"""
+
+import multiprocessing
+import os
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from app.data.db import DATA_DIR
+from app.data.ingest import (
+    DEFAULT_BATCH_SIZE,
+    INCIDENTS_SOURCE,
+    DATASETS_SOURCE,
+    TICKETS_SOURCE,
+    map_columns,
+    normalize_source_key,
+    upsert_dataframe,
+)
+
+
+# Sources loaded by main2.py during setup
+DEFAULT_SOURCES = (INCIDENTS_SOURCE, DATASETS_SOURCE, TICKETS_SOURCE)
+
+# Parsed batches allowed to wait for the writer at any time
+DEFAULT_MAX_PENDING_BATCHES = 4
+
+# Seconds the writer waits for a batch before checking on the workers
+POLL_SECONDS = 0.5
+
+# Queue shared with the worker processes (set by _init_worker)
+_batches = None
+
+
+def _init_worker(batches):
+    # Runs once in each worker process
+    global _batches
+    _batches = batches
+
+
+def parse_source(source, data_dir=DATA_DIR, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Read and map one CSV source chunk by chunk (runs in a worker process).
+
+    Every mapped chunk is put on the shared queue as (table, DataFrame),
+    followed by (table, None) once the file is done.
+
+    Returns:
+        tuple: (table name, rows parsed or None if the CSV is missing,
+                parse seconds, seconds blocked on a full queue)
+    """
+    started = time.perf_counter()
+    table_name = source["table"]
+    csv_path = data_dir / source["csv"]
+    source_key = source["columns"][source["key"]]
+    rows = 0
+    blocked = 0.0
+
+    try:
+        if not csv_path.exists():
+            return table_name, None, time.perf_counter() - started, 0.0
+
+        for chunk in pd.read_csv(csv_path, chunksize=batch_size):
+            chunk[source_key] = normalize_source_key(chunk[source_key])
+            mapped = map_columns(chunk, source["columns"])
+            rows += len(mapped)
+
+            wait_started = time.perf_counter()
+            _batches.put((table_name, mapped))
+            blocked += time.perf_counter() - wait_started
+
+        return table_name, rows, time.perf_counter() - started - blocked, blocked
+    finally:
+        # End marker; from the same process, so it follows every chunk
+        _batches.put((table_name, None))
+
+
+def run_ingest_pipeline(conn, sources=DEFAULT_SOURCES, max_workers=None,
+                        batch_size=DEFAULT_BATCH_SIZE,
+                        max_pending_batches=DEFAULT_MAX_PENDING_BATCHES,
+                        data_dir=DATA_DIR):
+    """
+    Parse N CSV sources in parallel and upsert them through one writer.
+
+    Args:
+        conn: Active database connection (used only by the calling thread)
+        sources (tuple): Source definitions (see app.data.ingest)
+        max_workers (int): Parse processes (default: one per source, up to CPUs)
+        batch_size (int): Rows per parsed chunk / upsert batch
+        max_pending_batches (int): Queue size between parse and write
+        data_dir (Path): Directory that holds the CSV files
+
+    Returns:
+        dict: {"tables": {table: per-table stats}, "rows", "rows_per_sec",
+               "parse_wait_seconds", "total_seconds"}
+
+    Raises:
+        Exception: The first parse or write error, after the pipeline
+                   has shut down
+    """
+    started = time.perf_counter()
+    max_workers = max_workers or min(len(sources), os.cpu_count() or 1)
+
+    keys = {source["table"]: source["key"] for source in sources}
+    report = {
+        source["table"]: {
+            "rows": 0, "parse_seconds": 0.0, "write_seconds": 0.0,
+            "inserted": 0, "updated": 0, "unchanged": 0, "unkeyed": 0,
+        }
+        for source in sources
+    }
+
+    # "spawn" like the hashing pool: the caller may already run threads
+    context = multiprocessing.get_context("spawn")
+    batches = context.Queue(maxsize=max_pending_batches)
+    errors = []
+    blocked = 0.0
+
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context,
+                             initializer=_init_worker, initargs=(batches,)) as pool:
+        futures = {
+            pool.submit(parse_source, source, data_dir, batch_size): source["table"]
+            for source in sources
+        }
+        finished = set()
+
+        # Single writer: drain the queue until every source has ended
+        while len(finished) < len(sources):
+            try:
+                table_name, batch = batches.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                # A worker that died never sends its end marker
+                for future, name in futures.items():
+                    if name not in finished and future.done() and future.exception():
+                        finished.add(name)
+                continue
+
+            if batch is None:
+                finished.add(table_name)
+                continue
+            if errors:
+                continue        # keep draining so workers never block forever
+
+            write_started = time.perf_counter()
+            try:
+                summary = upsert_dataframe(conn, batch, table_name, keys[table_name],
+                                           batch_size)
+            except Exception as e:
+                errors.append(e)
+                continue
+
+            table_report = report[table_name]
+            table_report["write_seconds"] += time.perf_counter() - write_started
+            for name, value in summary.items():
+                table_report[name] += value
+
+        for future in futures:
+            try:
+                table_name, rows, parse_seconds, waited = future.result()
+            except Exception as e:
+                errors.append(e)
+                continue
+
+            if rows is None:
+                print(f"CSV file not found for '{table_name}' - skipped.")
+                continue
+            report[table_name]["rows"] = rows
+            report[table_name]["parse_seconds"] = parse_seconds
+            blocked += waited
+
+    if errors:
+        raise errors[0]
+
+    total = time.perf_counter() - started
+    rows = sum(stats["rows"] for stats in report.values())
+    rows_per_sec = rows / total if total > 0 else float(rows)
+
+    for table_name, stats in report.items():
+        # Per table: rows per second of writer time (tables share the writer)
+        write_seconds = stats["write_seconds"]
+        stats["rows_per_sec"] = (
+            stats["rows"] / write_seconds if write_seconds > 0 else float(stats["rows"])
+        )
+        print(
+            f"'{table_name}': {stats['rows']} rows - parse {stats['parse_seconds']:.2f}s, "
+            f"write {write_seconds:.2f}s ({stats['rows_per_sec']:,.0f} rows/sec); "
+            f"{stats['inserted']} inserted, {stats['updated']} updated, "
+            f"{stats['unchanged']} unchanged"
+        )
+    print(f"Ingest pipeline finished: {rows} rows in {total:.2f}s "
+          f"({rows_per_sec:,.0f} rows/sec; parse side blocked {blocked:.2f}s "
+          f"on the writer).")
+
+    return {
+        "tables": report,
+        "rows": rows,
+        "rows_per_sec": rows_per_sec,
+        "parse_wait_seconds": blocked,
+        "total_seconds": total,
+    }
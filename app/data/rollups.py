@@ -0,0 +1,192 @@
+"""
+rollups.py
+-----------
+Pre-aggregated counts for incident and ticket analytics.
+
+The analysis functions in incidents.py and the dashboard charts used to
+run GROUP BY over the whole table on every call. Migration 4 adds small
+rollup tables holding one row per group, and triggers on the source
+tables keep them current on every INSERT, UPDATE and DELETE (the CRUD
+functions, the CSV loaders and ad-hoc SQL alike). Reading a chart is
+then O(number of groups) instead of O(number of rows).
+
+- incident_type_counts:            incident_type
+- incident_severity_status_counts: severity x status
+- incident_daily_counts:           day of `date`
+- ticket_priority_status_counts:   priority x status
+- ticket_daily_counts:             day of `created_date`
+
+Keys may be NULL (a missing type, an unparseable date). The unique key
+of each rollup is ifnull(key, ''), so NULL and '' share one group; the
+stored key of that group is whichever value arrived first. Recomputed
+counts group by nullif(key, '') to match, and the checker compares keys
+the same way.
+
+A consistency checker recomputes every rollup from scratch and diffs it
+against the stored counts:
+    python -m app.data.rollups             # check, exit code 1 on drift
+    python -m app.data.rollups --rebuild   # rebuild every rollup
+"""
+
+import sys
+import time
+
+from app.data.db import connect_database
+
+# -------------------------------------------------
+# Rollup definitions: {rollup table: source table and
+# {rollup column: SQL expression over the source row}}
+# Must match the triggers of migration 4.
+# -------------------------------------------------
+ROLLUPS = {
+    "incident_type_counts": {
+        "source": "cyber_incidents",
+        "keys": {"incident_type": "incident_type"},
+    },
+    "incident_severity_status_counts": {
+        "source": "cyber_incidents",
+        "keys": {"severity": "severity", "status": "status"},
+    },
+    "incident_daily_counts": {
+        "source": "cyber_incidents",
+        "keys": {"day": "date(date)"},
+    },
+    "ticket_priority_status_counts": {
+        "source": "it_tickets",
+        "keys": {"priority": "priority", "status": "status"},
+    },
+    "ticket_daily_counts": {
+        "source": "it_tickets",
+        "keys": {"day": "date(created_date)"},
+    },
+}
+
+_rollups_ready = False
+
+
+def rollups_available(conn):
+    """
+    Return True once migration 4 has created the rollup tables.
+    """
+    global _rollups_ready
+    if not _rollups_ready:
+        row = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' "
+            "AND name = 'ticket_daily_counts'"
+        ).fetchone()
+        _rollups_ready = row is not None
+    return _rollups_ready
+
+
+def find_rollup(table_name, columns):
+    """
+    Pick the smallest rollup that can answer a count over `columns`.
+
+    Only plain source columns qualify (not derived keys such as day).
+
+    Returns:
+        str or None: Rollup table name
+    """
+    candidates = []
+    for name, rollup in ROLLUPS.items():
+        if rollup["source"] != table_name:
+            continue
+        plain = {k for k, expr in rollup["keys"].items() if k == expr}
+        if set(columns) <= plain:
+            candidates.append((len(rollup["keys"]), name))
+
+    return min(candidates)[1] if candidates else None
+
+
+def _recompute_sql(rollup_name):
+    # The rollup's contents computed from scratch over its source table
+    rollup = ROLLUPS[rollup_name]
+    # nullif(): NULL and '' are one group, as in the rollup's unique key
+    keys = ", ".join(f"nullif({expr}, '') AS {key}" for key, expr in rollup["keys"].items())
+    positions = ", ".join(str(i + 1) for i in range(len(rollup["keys"])))
+    return f"SELECT {keys}, COUNT(*) AS count FROM {rollup['source']} GROUP BY {positions}"
+
+
+def _counts(conn, sql):
+    # {key tuple: count}
+    return {tuple(row[:-1]): row[-1] for row in conn.execute(sql).fetchall()}
+
+
+def check_rollups(conn, names=None):
+    """
+    Recompute rollups from the source tables and diff them with the
+    stored counts.
+
+    Returns:
+        dict: {rollup name: list of (key, expected, stored)}, empty
+              lists for rollups that are consistent
+    """
+    report = {}
+    for name in names or ROLLUPS:
+        keys = ", ".join(f"nullif({key}, '')" for key in ROLLUPS[name]["keys"])
+        expected = _counts(conn, _recompute_sql(name))
+        stored = _counts(conn, f"SELECT {keys}, count FROM {name}")
+
+        report[name] = [
+            (key, expected.get(key, 0), stored.get(key, 0))
+            for key in sorted(set(expected) | set(stored), key=repr)
+            if expected.get(key, 0) != stored.get(key, 0)
+        ]
+    return report
+
+
+def rebuild_rollups(conn, names=None):
+    """
+    Replace rollup contents with counts recomputed from scratch.
+
+    All rollups are rebuilt in one transaction.
+
+    Returns:
+        dict: {rollup name: number of groups}
+    """
+    groups = {}
+    try:
+        conn.execute("BEGIN")
+        for name in names or ROLLUPS:
+            keys = ", ".join(ROLLUPS[name]["keys"])
+            conn.execute(f"DELETE FROM {name}")
+            conn.execute(f"INSERT INTO {name} ({keys}, count) {_recompute_sql(name)}")
+            groups[name] = conn.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0]
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return groups
+
+
+# ------------------------------------------------------------
+# Command-line entry point
+# ------------------------------------------------------------
+if __name__ == "__main__":
+    conn = connect_database()
+
+    if "--rebuild" in sys.argv:
+        started = time.perf_counter()
+        groups = rebuild_rollups(conn)
+        elapsed = (time.perf_counter() - started) * 1000
+        for name, count in groups.items():
+            print(f"{name}: {count} groups")
+        print(f"Rebuilt {len(groups)} rollups in {elapsed:.0f} ms.")
+        conn.close()
+        sys.exit(0)
+
+    drift = 0
+    for name, diffs in check_rollups(conn).items():
+        if not diffs:
+            print(f"{name}: OK")
+            continue
+        drift += len(diffs)
+        print(f"{name}: {len(diffs)} groups differ")
+        for key, expected, stored in diffs[:20]:
+            print(f"    {key}: expected {expected}, stored {stored}")
+
+    conn.close()
+    if drift:
+        print("Rollups are out of date - run with --rebuild.")
+        sys.exit(1)
+    print("All rollups match the source tables.")
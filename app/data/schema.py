@@ -88,6 +88,74 @@ def create_it_tickets_table(conn):
     print("IT Tickets table created successfully!")
 
 
+def create_ingest_checkpoints_table(conn):
+    # Bookkeeping for streaming CSV loads
+    # Stores how many rows of each source were committed, so an
+    # interrupted load can resume from the last committed chunk
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ingest_checkpoints (
+            source TEXT NOT NULL,                   -- CSV file name
+            table_name TEXT NOT NULL,               -- target table
+            rows_committed INTEGER NOT NULL,        -- data rows already loaded
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (source, table_name)
+        )
+    """)
+
+    conn.commit()
+
+
+def create_login_failures_table(conn):
+    # Failed-login counters used for account lockout
+    # One row per username, updated in place by an atomic UPSERT
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS login_failures (
+            username TEXT PRIMARY KEY,              -- account being attacked
+            attempts INTEGER NOT NULL,              -- recent failed attempts
+            last_attempt REAL NOT NULL              -- unix time of the last failure
+        )
+    """)
+
+    # Lets the expiry sweep delete old rows without a table scan
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_login_failures_last_attempt
+        ON login_failures(last_attempt)
+    """)
+
+    conn.commit()
+
+
+def create_sessions_table(conn):
+    # Login sessions (app/services/sessions.py)
+    # Keyed on the SHA-256 of the token; the token itself is never stored
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            token_hash TEXT PRIMARY KEY,            -- sha256 of the session token
+            username TEXT NOT NULL,                 -- session owner
+            created_at REAL NOT NULL,               -- unix time
+            expires_at REAL NOT NULL                -- unix time
+        ) WITHOUT ROWID
+    """)
+
+    # Expiry sweep and per-user revocation
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_sessions_expires_at
+        ON sessions(expires_at)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_sessions_username
+        ON sessions(username)
+    """)
+
+    conn.commit()
+
+
 def create_all_tables(conn):
     # Create all database tables required by the platform
     # This function is called once during setup
@@ -95,3 +163,6 @@ def create_all_tables(conn):
     create_cyber_incidents_table(conn)
     create_datasets_metadata_table(conn)
     create_it_tickets_table(conn)
+    create_ingest_checkpoints_table(conn)
+    create_login_failures_table(conn)
+    create_sessions_table(conn)
@@ -9,7 +9,9 @@ for managing IT support tickets stored in the SQLite database.
 """
 
 import sqlite3
-from app.data.db import connect_database
+from app.data.db import get_connection
+from app.data.cache import mark_tables_changed
+from app.data.pagination import DEFAULT_PAGE_SIZE, estimate_row_count, fetch_page
 
 
 def create_ticket(title, priority, status, assigned_to, description):
@@ -23,20 +25,22 @@ def create_ticket(title, priority, status, assigned_to, description):
     - assigned_to (str): Person or team assigned to the ticket
     - description (str): Detailed description of the issue
     """
-    conn = connect_database()
-    cursor = conn.cursor()
+    with get_connection() as conn:
+        cursor = conn.cursor()
 
-    # Insert a new ticket record into the it_tickets table
-    cursor.execute(
-        """
-        INSERT INTO it_tickets (title, priority, status, assigned_to, description)
-        VALUES (?, ?, ?, ?, ?)
-        """,
-        (title, priority, status, assigned_to, description),
-    )
+        # Insert a new ticket record into the it_tickets table
+        cursor.execute(
+            """
+            INSERT INTO it_tickets (title, priority, status, assigned_to, description)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (title, priority, status, assigned_to, description),
+        )
 
-    conn.commit()
-    conn.close()
+        conn.commit()
+
+    # Invalidate cached dashboard results that read this table
+    mark_tables_changed("it_tickets")
 
 
 def get_all_tickets():
@@ -46,17 +50,45 @@ def get_all_tickets():
     Returns:
     - list: A list of all ticket records
     """
-    conn = connect_database()
-    cursor = conn.cursor()
+    with get_connection() as conn:
+        cursor = conn.cursor()
 
-    # Select all tickets
-    cursor.execute("SELECT * FROM it_tickets")
-    tickets = cursor.fetchall()
+        # Select all tickets
+        cursor.execute("SELECT * FROM it_tickets")
+        tickets = cursor.fetchall()
 
-    conn.close()
     return tickets
 
 
+def get_tickets_page(after=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Retrieve one page of IT tickets, newest first (keyset pagination).
+
+    Parameters:
+    - after (int): Cursor returned with the previous page (None = first page)
+    - limit (int): Tickets per page (capped at 500)
+
+    Returns:
+    - tuple: (DataFrame page, next cursor or None on the last page)
+    """
+    columns = ["id", "priority", "status", "category", "subject", "description",
+               "created_date", "resolved_date", "assigned_to"]
+
+    with get_connection() as conn:
+        return fetch_page(conn, "it_tickets", columns, after, limit)
+
+
+def estimate_ticket_count():
+    """
+    Approximate number of IT tickets without a full table count.
+
+    Returns:
+    - int: Estimated row count
+    """
+    with get_connection() as conn:
+        return estimate_row_count(conn, "it_tickets")
+
+
 def update_ticket_status(ticket_id, new_status):
     """
     Update the status of an existing IT ticket.
@@ -65,21 +97,23 @@ def update_ticket_status(ticket_id, new_status):
     - ticket_id (int): ID of the ticket to update
     - new_status (str): New status value
     """
-    conn = connect_database()
-    cursor = conn.cursor()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        # Update the ticket status safely using a parameterized query
+        cursor.execute(
+            """
+            UPDATE it_tickets
+            SET status = ?
+            WHERE id = ?
+            """,
+            (new_status, ticket_id),
+        )
 
-    # Update the ticket status safely using a parameterized query
-    cursor.execute(
-        """
-        UPDATE it_tickets
-        SET status = ?
-        WHERE id = ?
-        """,
-        (new_status, ticket_id),
-    )
+        conn.commit()
 
-    conn.commit()
-    conn.close()
+    # Invalidate cached dashboard results that read this table
+    mark_tables_changed("it_tickets")
 
 
 def delete_ticket(ticket_id):
@@ -89,17 +123,19 @@ def delete_ticket(ticket_id):
     Parameters:
     - ticket_id (int): ID of the ticket to delete
     """
-    conn = connect_database()
-    cursor = conn.cursor()
-
-    # Remove the ticket with the specified ID
-    cursor.execute(
-        """
-        DELETE FROM it_tickets
-        WHERE id = ?
-        """,
-        (ticket_id,),
-    )
-
-    conn.commit()
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        # Remove the ticket with the specified ID
+        cursor.execute(
+            """
+            DELETE FROM it_tickets
+            WHERE id = ?
+            """,
+            (ticket_id,),
+        )
+
+        conn.commit()
+
+    # Invalidate cached dashboard results that read this table
+    mark_tables_changed("it_tickets")
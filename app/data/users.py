@@ -1,5 +1,48 @@
 import sqlite3
-from app.data.db import connect_database
+from app.data.db import get_connection
+from app.data.cache import QueryCache
+
+
+# -------------------------------------------------
+# User lookup cache
+#
+# Logins look users up by name on every attempt. Found records are kept
+# for USER_CACHE_TTL seconds; unknown usernames are remembered for a
+# shorter MISSING_USER_TTL so repeated attempts with made-up names do
+# not hit the database either. Every write in this module invalidates
+# the affected username; code that writes the users table directly must
+# call invalidate_user() / clear_user_cache(). Writes from another
+# process become visible once the TTL runs out.
+# -------------------------------------------------
+USER_CACHE_TTL = 60
+MISSING_USER_TTL = 10
+USER_CACHE_SIZE = 4096
+
+_user_cache = QueryCache(max_entries=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+_missing_users = QueryCache(max_entries=USER_CACHE_SIZE, ttl=MISSING_USER_TTL)
+
+
+def invalidate_user(username: str):
+    """
+    Forget the cached record (or cached absence) of one user.
+    """
+    _user_cache.invalidate(username)
+    _missing_users.invalidate(username)
+
+
+def clear_user_cache():
+    """
+    Forget every cached user (e.g. after a bulk import).
+    """
+    _user_cache.clear()
+    _missing_users.clear()
+
+
+def user_cache_stats():
+    """
+    Return hit/miss counters for found and missing usernames.
+    """
+    return {"found": _user_cache.stats(), "missing": _missing_users.stats()}
 
 
 def get_user_by_username(username: str):
@@ -12,26 +55,38 @@ def get_user_by_username(username: str):
     Returns:
     - tuple containing user fields (id, username, password_hash, role, created_at)
       or None if the user does not exist.
+
+    Results (including "not found") are served from the lookup cache.
     """
-    # Open database connection
-    conn = connect_database()
-    cursor = conn.cursor()
-
-    # Parameterized query to prevent SQL injection
-    cursor.execute(
-        """
-        SELECT id, username, password_hash, role, created_at
-        FROM users
-        WHERE username = ?
-        """,
-        (username,)
-    )
-
-    # Fetch a single matching row
-    user = cursor.fetchone()
-
-    # Close database connection
-    conn.close()
+    hit, user = _user_cache.get(username)
+    if hit:
+        return user
+
+    hit, _ = _missing_users.get(username)
+    if hit:
+        return None
+
+    # Borrow a pooled database connection
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        # Parameterized query to prevent SQL injection
+        cursor.execute(
+            """
+            SELECT id, username, password_hash, role, created_at
+            FROM users
+            WHERE username = ?
+            """,
+            (username,)
+        )
+
+        # Fetch a single matching row
+        user = cursor.fetchone()
+
+    if user is None:
+        _missing_users.put(username, True)
+    else:
+        _user_cache.put(username, user)
 
     return user
 
@@ -47,21 +102,89 @@ def insert_user(username: str, password_hash: str, role: str = "user"):
 
     This function assumes that username uniqueness has already been validated.
     """
-    # Open database connection
-    conn = connect_database()
-    cursor = conn.cursor()
-
-    # Insert user using a parameterized query for security
-    cursor.execute(
-        """
-        INSERT INTO users (username, password_hash, role)
-        VALUES (?, ?, ?)
-        """,
-        (username, password_hash, role)
-    )
-
-    # Save changes to database
-    conn.commit()
-
-    # Close database connection
-    conn.close()
+    # Borrow a pooled database connection
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        # Insert user using a parameterized query for security
+        cursor.execute(
+            """
+            INSERT INTO users (username, password_hash, role)
+            VALUES (?, ?, ?)
+            """,
+            (username, password_hash, role)
+        )
+
+        # Save changes to database
+        conn.commit()
+
+    # The username may be cached as "not found"
+    invalidate_user(username)
+
+
+def update_user_password_hash(username: str, password_hash: str, expected_hash: str = None):
+    """
+    Replace a user's stored password hash.
+
+    Used to upgrade hashes to the current bcrypt cost after a
+    successful login (see app/services/password_policy.py).
+
+    Parameters:
+    - username (str): The user whose hash is replaced
+    - password_hash (str): New bcrypt hash
+    - expected_hash (str): If given, only replace the hash while it is
+      still this value (compare-and-swap), so a password change that
+      committed in the meantime is not overwritten
+
+    Returns:
+    - True if a row was updated, False if the user does not exist
+      (or the stored hash no longer matches expected_hash).
+    """
+    # Borrow a pooled database connection
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        if expected_hash is None:
+            cursor.execute(
+                "UPDATE users SET password_hash = ? WHERE username = ?",
+                (password_hash, username)
+            )
+        else:
+            cursor.execute(
+                "UPDATE users SET password_hash = ? "
+                "WHERE username = ? AND password_hash = ?",
+                (password_hash, username, expected_hash)
+            )
+
+        # Save changes to database
+        conn.commit()
+
+    invalidate_user(username)
+    return cursor.rowcount > 0
+
+
+def update_user_role(username: str, role: str):
+    """
+    Change a user's role.
+
+    Parameters:
+    - username (str): The user to update
+    - role (str): New role (user/admin/analyst)
+
+    Returns:
+    - True if a row was updated, False if the user does not exist.
+    """
+    # Borrow a pooled database connection
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute(
+            "UPDATE users SET role = ? WHERE username = ?",
+            (role, username)
+        )
+
+        # Save changes to database
+        conn.commit()
+
+    invalidate_user(username)
+    return cursor.rowcount > 0
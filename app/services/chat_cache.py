@@ -0,0 +1,407 @@
+"""
+chat_cache.py
+--------------
+Response cache and request coalescing for the AI chat page.
+
+Every prompt in pages/ai_chat.py is a full API round trip, even when
+another analyst just asked the same question in the same mode. With
+temperature 0 the answer is (for our purposes) deterministic, so:
+
+- Responses are cached on disk (DATA/chat_cache.db) under a SHA-256 of
+  the normalized (system prompt, message history, model, temperature).
+  The file has a size cap; the least recently used answers are evicted.
+- Identical requests that arrive while the first one is still streaming
+  do not start a second API call: they follow the first stream and see
+  the same deltas as they arrive. If the first caller stops reading
+  (e.g. a Streamlit rerun) or stalls, one follower takes the request
+  over and the others follow it instead of failing.
+- Cached answers are replayed as a stream of small chunks, so the page
+  renders them exactly like a live answer.
+
+Requests with temperature > 0 bypass all of this.
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+
+from app.data.db import DATA_DIR
+
+
+# Cache file and size cap (bytes of stored response text)
+CACHE_PATH = DATA_DIR / "chat_cache.db"
+MAX_CACHE_BYTES = 50 * 1024 * 1024
+
+# Replayed answers are split into chunks of roughly this many words
+REPLAY_WORDS_PER_CHUNK = 3
+
+# A hit refreshes an answer's LRU position at most this often (seconds),
+# so most hits are a read only
+LAST_USED_RESOLUTION = 60
+
+# Seconds a follower waits for the next delta before it treats the
+# leader as stalled and takes the request over
+FOLLOW_TIMEOUT = 60
+
+
+def _normalize(text):
+    # Whitespace differences should not produce different keys
+    return re.sub(r"\s+", " ", str(text)).strip()
+
+
+def cache_key(system_prompt, messages, model, temperature):
+    """
+    Hash of everything that determines the model's answer.
+
+    Args:
+        system_prompt (str): System message for the selected mode
+        messages (list): Conversation so far, {"role", "content"} dicts,
+                         ending with the new user prompt
+        model (str): Model name
+        temperature (float): Sampling temperature
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    payload = {
+        "system": _normalize(system_prompt),
+        "messages": [[m["role"], _normalize(m["content"])] for m in messages],
+        "model": model,
+        "temperature": round(float(temperature), 3),
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(temperature):
+    """
+    Only deterministic requests are cached or coalesced.
+    """
+    return float(temperature) == 0.0
+
+
+def replay_stream(text, words_per_chunk=REPLAY_WORDS_PER_CHUNK):
+    """
+    Yield a stored answer in small chunks, like a live stream.
+    """
+    # Split after whitespace so joining the chunks gives the exact text
+    pieces = re.findall(r"\S+\s*|\s+", text)
+    for start in range(0, len(pieces), words_per_chunk):
+        yield "".join(pieces[start:start + words_per_chunk])
+
+
+class ResponseCache:
+    """
+    Disk-backed LRU of chat answers with a total size cap.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_CACHE_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,           -- cache_key() digest
+                response TEXT NOT NULL,         -- full answer text
+                size INTEGER NOT NULL,          -- bytes, for the size cap
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL         -- LRU order
+            ) WITHOUT ROWID
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used)"
+        )
+        self._conn.commit()
+
+        # Running totals, so put() does not re-sum the table
+        self._entries, self._bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Return the cached answer for a key, or None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, last_used FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            now = time.time()
+            if now - row[1] >= LAST_USED_RESOLUTION:
+                self._conn.execute(
+                    "UPDATE responses SET last_used = ? WHERE key = ?", (now, key)
+                )
+                self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, response):
+        """
+        Store an answer and evict least recently used ones over the cap.
+        """
+        size = len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        with self._lock:
+            replaced = self._conn.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO responses (key, response, size, created_at, last_used)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (key, response, size, now, now),
+            )
+
+            total = self._bytes + size - (replaced[0] if replaced else 0)
+            entries = self._entries + (0 if replaced else 1)
+            while total > self.max_bytes:
+                oldest = self._conn.execute(
+                    "SELECT key, size FROM responses ORDER BY last_used LIMIT 1"
+                ).fetchone()
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (oldest[0],))
+                total -= oldest[1]
+                entries -= 1
+
+            self._conn.commit()
+            self._bytes, self._entries = total, entries
+
+    def stats(self):
+        """
+        Return hit/miss counters and stored size.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": self._entries,
+                "bytes": self._bytes,
+            }
+
+
+class _Flight:
+    # One in-progress API stream that followers can tail. All fields
+    # are read and written under `cond`.
+    def __init__(self):
+        self.deltas = []
+        self.done = False
+        self.error = None
+        self.cancelled = False          # the leader stopped reading
+        self.cond = threading.Condition()
+
+    def follow(self):
+        # Ends normally on completion and on cancellation (check
+        # `cancelled` afterwards); raises the leader's API error. A
+        # leader that sends nothing for FOLLOW_TIMEOUT seconds (stalled,
+        # or its stream was never read) is treated as cancelled.
+        position = 0
+        while True:
+            with self.cond:
+                deadline = time.monotonic() + FOLLOW_TIMEOUT
+                while position == len(self.deltas) and not self.done:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.cancelled = True
+                        self.done = True
+                        self.cond.notify_all()
+                        break
+                    self.cond.wait(remaining)
+                new = self.deltas[position:]
+                position += len(new)
+                finished = self.done and position == len(self.deltas)
+                error = self.error
+
+            yield from new
+
+            if finished:
+                if error is not None:
+                    raise error
+                return
+
+
+_cache = None
+_cache_lock = threading.Lock()
+_in_flight = {}                 # key -> _Flight
+_in_flight_lock = threading.Lock()
+
+
+def get_response_cache():
+    """
+    Return the process-wide ResponseCache (opened on first use).
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
+
+
+def _unregister(key, flight):
+    # A newer flight for the same key may already be registered
+    with _in_flight_lock:
+        if _in_flight.get(key) is flight:
+            del _in_flight[key]
+
+
+def _start(key, flight, create_stream):
+    # Start the real request for a flight this caller leads
+    try:
+        return create_stream()
+    except Exception as e:
+        _unregister(key, flight)
+        with flight.cond:
+            flight.error = e
+            flight.done = True
+            flight.cond.notify_all()
+        raise
+
+
+def _lead(key, flight, deltas, cache):
+    # Run the real API stream, sharing each delta with followers
+    completed = False
+    try:
+        for delta in deltas:
+            with flight.cond:
+                flight.deltas.append(delta)
+                flight.cond.notify_all()
+            yield delta
+        completed = True
+
+    except Exception as e:
+        with flight.cond:
+            flight.error = e
+        raise
+
+    finally:
+        _unregister(key, flight)
+
+        if completed:
+            with flight.cond:
+                text = "".join(flight.deltas)
+            cache.put(key, text)
+
+        with flight.cond:
+            if not completed and flight.error is None:
+                # The caller stopped reading (e.g. a Streamlit rerun);
+                # a follower takes over instead of failing
+                flight.cancelled = True
+            flight.done = True
+            flight.cond.notify_all()
+
+
+def _take_over(key, cache, create_stream):
+    # After a cancelled leader: use the cache, follow whoever took over
+    # first, or lead a new request with this caller's create_stream.
+    # Returns (iterator of deltas, flight or None)
+    cached = cache.get(key)
+    if cached is not None:
+        return replay_stream(cached), None
+
+    with _in_flight_lock:
+        flight = _in_flight.get(key)
+        if flight is not None:
+            return flight.follow(), flight
+
+        flight = _Flight()
+        _in_flight[key] = flight
+
+    deltas = _start(key, flight, create_stream)
+    return _lead(key, flight, deltas, cache), flight
+
+
+def _follow(key, flight, cache, create_stream):
+    # Tail a flight; if its leader is cancelled, continue from a new
+    # source without repeating the text already yielded
+    sent = 0                            # characters yielded so far
+    while True:
+        if flight is None:
+            source, flight = _take_over(key, cache, create_stream)
+        else:
+            source = flight.follow()
+
+        position = 0
+        for delta in source:
+            end = position + len(delta)
+            if end > sent:
+                yield delta[max(0, sent - position):]
+                sent = end
+            position = end
+
+        if flight is None:
+            return
+        with flight.cond:
+            cancelled = flight.cancelled
+        if not cancelled:
+            return
+        # A stalled leader is still registered; new requests must not
+        # follow it either
+        _unregister(key, flight)
+        flight = None
+
+
+def stream_completion(system_prompt, messages, model, temperature, create_stream):
+    """
+    Stream an answer, using the cache and coalescing where possible.
+
+    Args:
+        system_prompt (str): System message for the selected mode
+        messages (list): Conversation including the new user prompt
+        model (str): Model name
+        temperature (float): Sampling temperature
+        create_stream (callable): Starts the real request and returns an
+                                  iterator of text deltas (also used if
+                                  this caller has to take a request over)
+
+    Returns:
+        tuple: (iterator of text deltas, source) where source is
+               "cache", "coalesced" or "api"
+    """
+    if not is_cacheable(temperature):
+        return create_stream(), "api"
+
+    key = cache_key(system_prompt, messages, model, temperature)
+    cache = get_response_cache()
+
+    cached = cache.get(key)
+    if cached is not None:
+        return replay_stream(cached), "cache"
+
+    with _in_flight_lock:
+        flight = _in_flight.get(key)
+        if flight is not None:
+            return _follow(key, flight, cache, create_stream), "coalesced"
+
+        flight = _Flight()
+        _in_flight[key] = flight
+
+    deltas = _start(key, flight, create_stream)
+    return _lead(key, flight, deltas, cache), "api"
+
+
+def chat_cache_stats():
+    """
+    Return metrics for the response cache plus current in-flight requests.
+    """
+    stats = get_response_cache().stats()
+    with _in_flight_lock:
+        stats["in_flight"] = len(_in_flight)
+    return stats
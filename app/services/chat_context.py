@@ -0,0 +1,191 @@
+"""
+chat_context.py
+----------------
+Token-budgeted conversation window for the AI chat page.
+
+Sending the whole chat history on every prompt makes each request
+bigger and slower than the last, and a long session eventually exceeds
+the model's context window. ConversationWindow keeps the prompt within
+a fixed token budget:
+
+- the system prompt and the newest turns are sent verbatim, newest
+  first, until the budget is used;
+- turns that fall out of the window are folded into one rolling summary
+  message (extractive: the opening sentence of each turn), which is
+  itself capped at `summary_budget` tokens, oldest lines dropped first.
+- a resumed conversation only loads its newest turns; seed_summary()
+  folds the stored turns before them into the summary, so the context
+  they carried is not lost on a new visit.
+
+Tokens are counted locally with tiktoken when it is installed, otherwise
+with a character-based estimate (about 4 characters per token).
+"""
+
+import math
+import re
+
+try:
+    import tiktoken
+except ImportError:         # optional dependency
+    tiktoken = None
+
+
+# Default prompt budget (tokens) and the share reserved for the summary
+DEFAULT_BUDGET = 3000
+DEFAULT_SUMMARY_BUDGET = 500
+
+# Per-message overhead of the chat format (role markers etc.)
+TOKENS_PER_MESSAGE = 4
+TOKENS_PER_REPLY = 2
+
+# Characters kept from each summarized turn
+SUMMARY_LINE_CHARS = 200
+
+_encodings = {}
+
+
+def _encoding_for(model):
+    if tiktoken is None:
+        return None
+    if model not in _encodings:
+        try:
+            _encodings[model] = tiktoken.encoding_for_model(model)
+        except KeyError:
+            _encodings[model] = tiktoken.get_encoding("o200k_base")
+    return _encodings[model]
+
+
+def count_tokens(text, model=None):
+    """
+    Count (or estimate) the tokens in a piece of text.
+    """
+    encoding = _encoding_for(model) if model else None
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return math.ceil(len(text) / 4)
+
+
+def count_message_tokens(messages, model=None):
+    """
+    Tokens a list of chat messages costs as a prompt.
+    """
+    total = TOKENS_PER_REPLY
+    for message in messages:
+        total += TOKENS_PER_MESSAGE + count_tokens(message["content"], model)
+    return total
+
+
+def summarize_turn(message, max_chars=SUMMARY_LINE_CHARS):
+    """
+    One summary line for a turn: its first sentence, shortened.
+    """
+    text = " ".join(message["content"].split())
+    first = re.split(r"(?<=[.!?])\s", text, maxsplit=1)[0]
+    if len(first) > max_chars:
+        first = first[:max_chars - 3].rstrip() + "..."
+    speaker = "User" if message["role"] == "user" else "Assistant"
+    return f"- {speaker}: {first}"
+
+
+class ConversationWindow:
+    """
+    Builds the messages for each request within a token budget.
+
+    One instance belongs to one chat (keep it in st.session_state and
+    create a new one when the chat is cleared). The history list passed
+    to build() is expected to only grow between calls.
+    """
+
+    def __init__(self, budget=DEFAULT_BUDGET, summary_budget=DEFAULT_SUMMARY_BUDGET,
+                 model=None):
+        self.budget = budget
+        self.summary_budget = summary_budget
+        self.model = model
+
+        self.summary_lines = []
+        self.summarized_upto = 0    # history[:summarized_upto] is in the summary
+        self.seeded_turns = 0       # turns before the history, see seed_summary()
+        self.last_stats = {}
+
+    def _summary_message(self):
+        if not self.summary_lines:
+            return None
+        return {
+            "role": "system",
+            "content": "Summary of the earlier conversation:\n" + "\n".join(self.summary_lines),
+        }
+
+    def _fold_into_summary(self, messages):
+        # Add lines for newly dropped turns, then trim oldest lines to the cap
+        self.summary_lines.extend(summarize_turn(m) for m in messages)
+        while (len(self.summary_lines) > 1
+               and count_message_tokens([self._summary_message()], self.model) > self.summary_budget):
+            self.summary_lines.pop(0)
+
+    def seed_summary(self, earlier):
+        """
+        Start the summary from turns older than the history passed to
+        build() (e.g. stored turns not loaded when a chat is resumed).
+
+        Args:
+            earlier (list): Older turns, oldest first
+        """
+        self._fold_into_summary(earlier)
+        self.seeded_turns += len(earlier)
+
+    def build(self, system_prompt, history):
+        """
+        Return the messages to send for the newest turn.
+
+        Args:
+            system_prompt (str): System message for the selected mode
+            history (list): Whole conversation, ending with the new prompt
+
+        Returns:
+            list: [system, (summary), recent turns...] within the budget
+        """
+        system = {"role": "system", "content": system_prompt}
+
+        # The history was replaced (e.g. chat cleared): start over
+        if len(history) < self.summarized_upto:
+            self.summary_lines = []
+            self.summarized_upto = 0
+            self.seeded_turns = 0
+
+        # Room left for verbatim turns after the system prompt and summary
+        reserved = count_message_tokens([system], self.model) + self.summary_budget
+        available = max(0, self.budget - reserved)
+
+        # Newest turns first; the newest prompt is always kept
+        recent = []
+        used = 0
+        start = len(history)
+        while start > self.summarized_upto:
+            message = history[start - 1]
+            cost = TOKENS_PER_MESSAGE + count_tokens(message["content"], self.model)
+            if recent and used + cost > available:
+                break
+            # Only role and content go to the API (stored turns also carry an id)
+            recent.insert(0, {"role": message["role"], "content": message["content"]})
+            used += cost
+            start -= 1
+
+        # Turns that no longer fit move into the rolling summary
+        if start > self.summarized_upto:
+            self._fold_into_summary(history[self.summarized_upto:start])
+            self.summarized_upto = start
+
+        messages = [system]
+        summary = self._summary_message()
+        if summary is not None:
+            messages.append(summary)
+        messages.extend(recent)
+
+        self.last_stats = {
+            "prompt_tokens": count_message_tokens(messages, self.model),
+            "recent_turns": len(recent),
+            "summarized_turns": self.seeded_turns + self.summarized_upto,
+            "budget": self.budget,
+            "exact": tiktoken is not None,
+        }
+        return messages
@@ -0,0 +1,179 @@
+"""
+chat_loadtest.py
+-----------------
+Load generator for the chat path.
+
+Runs N concurrent simulated chat sessions; each sends `turns` prompts
+one after another (with its growing history) through an LLM backend
+and records time to first token (TTFT) and total latency per request.
+
+Without --base-url a local fake server is started in-process:
+    python -m app.services.chat_loadtest --sessions 50 --turns 3 --ttft 0.3 --token-delay 0.01
+
+With --scheduled every session goes through an LLMScheduler (one user
+per session), e.g. to compare error rates against a rate-limited server:
+    python -m app.services.chat_loadtest --sessions 50 --error-rate 0.2 --scheduled
+"""
+
+import argparse
+import threading
+import time
+
+from app.services.fake_llm_server import (
+    DEFAULT_TOKEN_DELAY,
+    DEFAULT_TOKENS,
+    DEFAULT_TTFT,
+    start_in_background,
+)
+from app.services.llm_backends import HTTPBackend, LLMError
+from app.services.llm_scheduler import LLMScheduler, ScheduledBackend
+
+
+PROMPTS = [
+    "A user reports a phishing email with a credential form. What first?",
+    "How do we check whether other mailboxes received it?",
+    "Summarize the containment steps for the incident report.",
+]
+
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile (0 for an empty list).
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct * len(ordered)))]
+
+
+def _session(backend, model, turns, results, lock):
+    history = [{"role": "system", "content": "You are a cybersecurity assistant."}]
+
+    for turn in range(turns):
+        history.append({"role": "user", "content": PROMPTS[turn % len(PROMPTS)]})
+
+        started = time.perf_counter()
+        first = None
+        parts = []
+        error = None
+        try:
+            for delta in backend.stream_chat(history, model, 0.0):
+                if first is None:
+                    first = time.perf_counter()
+                parts.append(delta)
+        except LLMError as e:
+            error = e.status or "error"
+        except Exception as e:
+            # Still one failed request in the summary, not a dead session
+            error = type(e).__name__
+
+        finished = time.perf_counter()
+        with lock:
+            results.append({
+                "ttft": (first - started) if first else None,
+                "total": finished - started,
+                "error": error,
+            })
+
+        history.append({"role": "assistant", "content": "".join(parts)})
+
+
+def run_load_test(backend, sessions=20, turns=3, model="gpt-4o-mini", scheduler=None):
+    """
+    Drive concurrent sessions and summarize the latencies.
+
+    With a scheduler, session i sends its requests as user "session-i".
+
+    Returns:
+        dict: requests, errors, throughput and p50/p95/p99 of TTFT and
+              total latency (seconds)
+    """
+    results = []
+    lock = threading.Lock()
+    threads = []
+    for i in range(sessions):
+        session_backend = backend
+        if scheduler is not None:
+            session_backend = ScheduledBackend(backend, scheduler, f"session-{i}")
+        threads.append(threading.Thread(
+            target=_session, args=(session_backend, model, turns, results, lock)
+        ))
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    ok = [r for r in results if r["error"] is None]
+    ttfts = [r["ttft"] for r in ok if r["ttft"] is not None]
+    totals = [r["total"] for r in ok]
+
+    summary = {
+        "sessions": sessions,
+        "requests": len(results),
+        "errors": len(results) - len(ok),
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(results) / elapsed, 1) if elapsed else 0.0,
+    }
+    for name, values in (("ttft", ttfts), ("total", totals)):
+        for label, pct in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+            summary[f"{name}_{label}"] = round(percentile(values, pct), 3)
+
+    if scheduler is not None:
+        summary["scheduler"] = scheduler.stats()
+
+    return summary
+
+
+def print_summary(summary):
+    print(
+        f"{summary['sessions']} sessions, {summary['requests']} requests, "
+        f"{summary['errors']} errors in {summary['seconds']}s "
+        f"({summary['requests_per_second']} req/s)"
+    )
+    for name in ("ttft", "total"):
+        print(
+            f"  {name:>5}: p50 {summary[f'{name}_p50']:.3f}s  "
+            f"p95 {summary[f'{name}_p95']:.3f}s  p99 {summary[f'{name}_p99']:.3f}s"
+        )
+    if "scheduler" in summary:
+        s = summary["scheduler"]
+        print(
+            f"  scheduler: {s['retries']} retries, {s['failed']} failed, "
+            f"{s['rejected']} rejected, wait p50 {s['wait_p50_ms']:.0f} ms / "
+            f"p95 {s['wait_p95_ms']:.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent chat load test")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--base-url", help="OpenAI-compatible endpoint (default: local fake)")
+    parser.add_argument("--api-key")
+    parser.add_argument("--ttft", type=float, default=DEFAULT_TTFT)
+    parser.add_argument("--token-delay", type=float, default=DEFAULT_TOKEN_DELAY)
+    parser.add_argument("--tokens", type=int, default=DEFAULT_TOKENS)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--scheduled", action="store_true", help="route through an LLMScheduler")
+    parser.add_argument("--concurrency", type=int, default=8, help="scheduler concurrency cap")
+    parser.add_argument("--rate", type=float, default=20.0, help="scheduler requests per second")
+    args = parser.parse_args()
+
+    base_url = args.base_url
+    if base_url is None:
+        _, base_url = start_in_background(
+            ttft=args.ttft, token_delay=args.token_delay,
+            tokens=args.tokens, error_rate=args.error_rate,
+        )
+        print(f"Started fake LLM server at {base_url}")
+
+    backend = HTTPBackend(base_url, api_key=args.api_key)
+    scheduler = None
+    if args.scheduled:
+        scheduler = LLMScheduler(max_concurrency=args.concurrency, rate=args.rate,
+                                 burst=args.concurrency)
+    print_summary(run_load_test(backend, args.sessions, args.turns, args.model, scheduler))
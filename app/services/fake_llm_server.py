@@ -0,0 +1,171 @@
+"""
+fake_llm_server.py
+-------------------
+Local stand-in for the OpenAI chat-completions API.
+
+Serves POST /v1/chat/completions (streamed or not) with a synthetic
+answer, so the chat page and the load generator can run without the
+live service. Latency is configurable:
+
+- ttft:        seconds before the first chunk (time to first token)
+- token_delay: seconds between the following chunks
+- tokens:      chunks per answer
+- error_rate:  share of requests answered with HTTP 429
+
+Run it and point the chat page at it (LLM_BASE_URL in secrets.toml):
+    python -m app.services.fake_llm_server --port 8765 --ttft 0.4 --token-delay 0.02
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Default latency profile
+DEFAULT_TTFT = 0.3
+DEFAULT_TOKEN_DELAY = 0.02
+DEFAULT_TOKENS = 60
+
+_WORDS = (
+    "check the affected hosts isolate the account rotate credentials review "
+    "the logs escalate if needed and document the incident timeline"
+).split()
+
+
+def fake_answer_tokens(messages, tokens):
+    """
+    Deterministic answer chunks that depend on the last user message.
+    """
+    last = messages[-1]["content"] if messages else ""
+    offset = sum(map(ord, last)) % len(_WORDS)
+    return [_WORDS[(offset + i) % len(_WORDS)] + " " for i in range(tokens)]
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    # Settings are attributes of the server (see make_server)
+
+    def log_message(self, format, *args):
+        pass        # keep load tests quiet
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path.rstrip("/") not in ("/v1/chat/completions", "/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        server = self.server
+
+        with server.stats_lock:
+            server.requests += 1
+
+        if server.error_rate and random.random() < server.error_rate:
+            self._send_json(429, {"error": {"message": "Rate limit reached (fake)"}})
+            return
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = request.get("model", "fake-model")
+        chunks = fake_answer_tokens(request.get("messages", []), server.tokens)
+
+        time.sleep(server.ttft)
+
+        if not request.get("stream"):
+            time.sleep(server.token_delay * (len(chunks) - 1))
+            self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(chunks)},
+                    "finish_reason": "stop",
+                }],
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        for i, text in enumerate(chunks):
+            if i:
+                time.sleep(server.token_delay)
+            event = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": text}, "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    # One thread per connection; a deep accept backlog so bursts of
+    # simulated sessions are not delayed by connection retries
+    daemon_threads = True
+    request_queue_size = 256
+
+
+def make_server(host="127.0.0.1", port=0, ttft=DEFAULT_TTFT, token_delay=DEFAULT_TOKEN_DELAY,
+                tokens=DEFAULT_TOKENS, error_rate=0.0):
+    """
+    Create (but do not start) a fake server; port 0 picks a free port.
+    """
+    server = FakeLLMServer((host, port), FakeLLMHandler)
+    server.ttft = ttft
+    server.token_delay = token_delay
+    server.tokens = tokens
+    server.error_rate = error_rate
+    server.requests = 0
+    server.stats_lock = threading.Lock()
+    return server
+
+
+def start_in_background(**settings):
+    """
+    Start a fake server on a daemon thread.
+
+    Returns:
+        tuple: (server, base URL such as "http://127.0.0.1:54321/v1")
+    """
+    server = make_server(**settings)
+    thread = threading.Thread(target=server.serve_forever, name="fake-llm", daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible chat server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ttft", type=float, default=DEFAULT_TTFT)
+    parser.add_argument("--token-delay", type=float, default=DEFAULT_TOKEN_DELAY)
+    parser.add_argument("--tokens", type=int, default=DEFAULT_TOKENS)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.ttft, args.token_delay, args.tokens, args.error_rate)
+    print(f"Fake LLM server on http://{args.host}:{args.port}/v1 "
+          f"(ttft {args.ttft}s, {args.token_delay}s/token, {args.tokens} tokens)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,213 @@
+"""
+hashing.py
+-----------
+Off-thread bcrypt hashing and verification.
+
+bcrypt is deliberately slow (the cost is tuned to ~250 ms of CPU per call,
+see password_policy).
+Running it inline on the Streamlit script thread means a burst of logins
+is served one after another. This module sends the work to a process
+pool sized to the CPU count, so concurrent logins use every core.
+
+- A bounded number of requests may be queued; beyond that callers get
+  HashQueueFullError straight away instead of waiting forever.
+- Every request has a timeout.
+- Queue depth and latency percentiles are available from hash_stats().
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+
+from app.services.password_policy import current_rounds
+
+
+# Worker processes (one per core)
+WORKERS = os.cpu_count() or 1
+
+# Requests allowed to wait or run at once before new ones are rejected
+MAX_PENDING = max(32, WORKERS * 8)
+
+# Seconds a caller waits for its hash/verify result
+DEFAULT_TIMEOUT = 10.0
+
+# Number of recent latencies kept for the percentiles
+LATENCY_WINDOW = 1000
+
+
+class HashQueueFullError(RuntimeError):
+    """Raised when too many hashing requests are already pending."""
+
+
+# -------------------------------------------------
+# Functions executed inside the worker processes
+# -------------------------------------------------
+def _hash_in_worker(password, rounds):
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def _verify_in_worker(password, stored_hash):
+    return bcrypt.checkpw(password.encode("utf-8"), stored_hash.encode("utf-8"))
+
+
+class HashingExecutor:
+    """
+    Process pool for bcrypt with a bounded queue and latency tracking.
+    """
+
+    def __init__(self, workers=WORKERS, max_pending=MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+        self._stats_lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def _get_pool(self):
+        # Created on first use; "spawn" avoids forking a multi-threaded
+        # Streamlit server process
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def submit(self, fn, *args):
+        """
+        Queue a call in the pool.
+
+        Returns:
+            concurrent.futures.Future
+
+        Raises:
+            HashQueueFullError: If max_pending requests are already queued
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self._rejected += 1
+            raise HashQueueFullError("Password hashing queue is full")
+
+        started = time.perf_counter()
+        with self._stats_lock:
+            self._pending += 1
+
+        def _done(_future):
+            with self._stats_lock:
+                self._pending -= 1
+                self._completed += 1
+                self._latencies.append(time.perf_counter() - started)
+            self._slots.release()
+
+        try:
+            future = self._get_pool().submit(fn, *args)
+        except Exception:
+            # Undo the bookkeeping if the pool refused the job
+            with self._stats_lock:
+                self._pending -= 1
+            self._slots.release()
+            raise
+
+        future.add_done_callback(_done)
+        return future
+
+    def stats(self):
+        """
+        Return queue depth, counters and latency percentiles (ms).
+        """
+        with self._stats_lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                "workers": self.workers,
+                "queue_depth": self._pending,
+                "max_pending": self.max_pending,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+
+        for name, pct in (("p50_ms", 0.50), ("p95_ms", 0.95), ("p99_ms", 0.99)):
+            if latencies:
+                index = min(len(latencies) - 1, int(pct * len(latencies)))
+                stats[name] = latencies[index] * 1000
+            else:
+                stats[name] = 0.0
+
+        return stats
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+
+
+# Shared executor used by the authentication services
+_executor = HashingExecutor()
+
+
+def submit_hash(password, rounds=None):
+    """
+    Start hashing a password; returns a Future resolving to the hash string.
+
+    `rounds` defaults to the calibrated cost from password_policy.
+    """
+    if rounds is None:
+        rounds = current_rounds()
+    return _executor.submit(_hash_in_worker, password, rounds)
+
+
+def submit_verify(password, stored_hash):
+    """
+    Start checking a password; returns a Future resolving to True/False.
+    """
+    return _executor.submit(_verify_in_worker, password, stored_hash)
+
+
+def hash_password(password, rounds=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Hash a password in the pool and wait for the result.
+
+    Raises:
+        HashQueueFullError: If the queue is full
+        TimeoutError: If the result does not arrive within `timeout` seconds
+    """
+    return submit_hash(password, rounds).result(timeout=timeout)
+
+
+def verify_password(password, stored_hash, timeout=DEFAULT_TIMEOUT):
+    """
+    Check a password against a bcrypt hash in the pool and wait.
+
+    Raises:
+        HashQueueFullError: If the queue is full
+        TimeoutError: If the result does not arrive within `timeout` seconds
+    """
+    return submit_verify(password, stored_hash).result(timeout=timeout)
+
+
+async def verify_password_async(password, stored_hash, timeout=DEFAULT_TIMEOUT):
+    """
+    asyncio version of verify_password().
+    """
+    future = asyncio.wrap_future(submit_verify(password, stored_hash))
+    return await asyncio.wait_for(future, timeout)
+
+
+def hash_stats():
+    """
+    Return metrics for the shared hashing executor.
+    """
+    return _executor.stats()
@@ -0,0 +1,187 @@
+"""
+llm_backends.py
+----------------
+Pluggable chat-completion backends for the AI chat page.
+
+pages/ai_chat.py used to build `OpenAI(api_key=st.secrets[...])`
+directly, so the chat path could not be measured without the live
+service. Every backend here has the same small interface:
+
+    backend.stream_chat(messages, model, temperature) -> iterator of text deltas
+
+- OpenAIBackend: the official SDK (imported only when used).
+- HTTPBackend:   any OpenAI-compatible /chat/completions endpoint over
+                 plain HTTP + server-sent events (stdlib only), e.g. the
+                 local fake server in app/services/fake_llm_server.py.
+
+Failures are raised as LLMError with the HTTP status (when known), so
+callers can tell rate limits (429) and server errors (5xx) apart.
+Transport failures (timeouts, dropped connections, a stream cut off
+before its end marker) are LLMErrors without a status.
+"""
+
+import http.client
+import json
+import urllib.error
+import urllib.request
+
+
+class LLMError(RuntimeError):
+    """A chat request failed; `status` is the HTTP status code or None."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class LLMBackend:
+    """
+    Interface implemented by every backend.
+    """
+
+    name = "base"
+
+    def stream_chat(self, messages, model, temperature):
+        """
+        Start a streamed chat completion.
+
+        Args:
+            messages (list): {"role", "content"} dicts, system prompt first
+            model (str): Model name
+            temperature (float): Sampling temperature
+
+        Returns:
+            iterator of str: Text deltas as they arrive
+        """
+        raise NotImplementedError
+
+
+class OpenAIBackend(LLMBackend):
+    """
+    Backend using the official OpenAI Python SDK.
+    """
+
+    name = "openai"
+
+    def __init__(self, api_key, base_url=None):
+        from openai import OpenAI
+
+        # No SDK retries: the chat page's LLMScheduler already retries
+        # 429/5xx with jittered backoff. SDK retries on top would multiply
+        # the attempts and sleep while holding a scheduler slot.
+        self.client = OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+
+    def stream_chat(self, messages, model, temperature):
+        import openai
+
+        try:
+            stream = self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                stream=True,
+            )
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if delta and delta.content:
+                    yield delta.content
+
+        except openai.APIStatusError as e:
+            raise LLMError(str(e), status=e.status_code) from e
+        except openai.APIConnectionError as e:
+            raise LLMError(str(e)) from e
+
+
+class HTTPBackend(LLMBackend):
+    """
+    Minimal OpenAI-compatible client (urllib + server-sent events).
+    """
+
+    name = "http"
+
+    def __init__(self, base_url, api_key=None, timeout=60.0, stream=True):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout = timeout
+        # False: ask for one JSON completion, yielded as a single delta
+        self.stream = stream
+
+    def stream_chat(self, messages, model, temperature):
+        body = json.dumps({
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "stream": self.stream,
+        }).encode("utf-8")
+
+        headers = {"Content-Type": "application/json", "Accept": "text/event-stream"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+
+        request = urllib.request.Request(
+            f"{self.base_url}/chat/completions", data=body, headers=headers, method="POST"
+        )
+
+        try:
+            response = urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            raise LLMError(f"HTTP {e.code}: {e.reason}", status=e.code) from e
+        except urllib.error.URLError as e:
+            raise LLMError(str(e.reason)) from e
+        except (OSError, http.client.HTTPException) as e:
+            # e.g. a timeout or reset while waiting for the headers
+            raise LLMError(f"{type(e).__name__}: {e}") from e
+
+        with response:
+            try:
+                if response.headers.get_content_type() != "text/event-stream":
+                    yield from self._read_completion(response)
+                    return
+                yield from self._read_events(response)
+            except (OSError, http.client.HTTPException) as e:
+                # Timeout, reset or truncated body while reading
+                raise LLMError(f"{type(e).__name__}: {e}") from e
+
+    def _read_events(self, response):
+        # One event per "data: ..." line; "[DONE]" ends the stream
+        for raw in response:
+            line = raw.decode("utf-8").strip()
+            if not line.startswith("data:"):
+                continue
+
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                return
+
+            choices = json.loads(data).get("choices") or []
+            if choices:
+                content = (choices[0].get("delta") or {}).get("content")
+                if content:
+                    yield content
+
+        raise LLMError("Stream ended before [DONE]")
+
+    def _read_completion(self, response):
+        # Non-streamed answer: the whole message in one JSON body
+        choices = json.loads(response.read()).get("choices") or []
+        if choices:
+            content = (choices[0].get("message") or {}).get("content")
+            if content:
+                yield content
+
+
+def backend_from_settings(settings):
+    """
+    Pick a backend from a settings mapping (st.secrets or os.environ).
+
+    - LLM_BASE_URL set: HTTPBackend against that URL (OPENAI_API_KEY optional)
+    - otherwise:        OpenAIBackend with OPENAI_API_KEY
+    """
+    base_url = settings.get("LLM_BASE_URL")
+    api_key = settings.get("OPENAI_API_KEY")
+
+    if base_url:
+        return HTTPBackend(base_url, api_key=api_key)
+    return OpenAIBackend(api_key=api_key)
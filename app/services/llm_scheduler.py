@@ -0,0 +1,278 @@
+"""
+llm_scheduler.py
+-----------------
+Shared scheduler for outbound LLM requests.
+
+Every Streamlit session used to call the API directly, so a burst of
+analysts produced a burst of requests, the provider answered with rate
+limit errors, and the page showed "⚠️ Error". All chat requests now go
+through one process-wide scheduler:
+
+- Global concurrency cap: at most `max_concurrency` streams at once.
+- Token bucket: requests start at no more than `rate` per second
+  (bursts up to `burst`).
+- Fair queuing: waiting requests are queued per user and released
+  round-robin, so one user sending many prompts cannot starve others.
+- Retries: 429, 5xx and connection errors are retried with jittered
+  exponential backoff, as long as no text has been streamed yet.
+- Backpressure: beyond `max_queue` waiting requests, new ones fail
+  fast with SchedulerBusyError instead of piling up.
+
+Queue depth, wait times and retry counts are available from stats().
+"""
+
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+
+from app.services.llm_backends import LLMBackend, LLMError
+
+
+# Defaults for the shared scheduler
+MAX_CONCURRENCY = 8
+RATE_PER_SECOND = 5.0
+BURST = 10
+MAX_QUEUE = 200
+QUEUE_TIMEOUT = 60.0
+
+# Retry policy
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+
+# Recent waits kept for the percentiles
+WAIT_WINDOW = 1000
+
+
+class SchedulerBusyError(LLMError):
+    """Raised when the queue is full or a request waited too long."""
+
+    def __init__(self, message):
+        super().__init__(message, status=503)
+
+
+def is_retryable(error):
+    """
+    Rate limits, server errors and connection failures are worth retrying.
+    """
+    return error.status is None or error.status == 429 or error.status >= 500
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """
+    "Full jitter" exponential backoff: uniform in [0, min(cap, base * 2^attempt)].
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class _Ticket:
+    # One waiting request
+    def __init__(self, user):
+        self.user = user
+        self.enqueued = time.monotonic()
+        self.granted = threading.Event()
+        self.cancelled = False
+
+
+class LLMScheduler:
+    """
+    Concurrency cap + token bucket + per-user round-robin queue.
+    """
+
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, rate=RATE_PER_SECOND, burst=BURST,
+                 max_queue=MAX_QUEUE, queue_timeout=QUEUE_TIMEOUT, max_retries=MAX_RETRIES):
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.burst = burst
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+
+        self._cond = threading.Condition()
+        self._queues = OrderedDict()        # user -> deque of tickets (round-robin order)
+        self._waiting = 0
+        self._active = 0
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+
+        self._waits = deque(maxlen=WAIT_WINDOW)
+        self._completed = 0
+        self._failed = 0
+        self._retries = 0
+        self._rejected = 0
+
+        self._dispatcher = threading.Thread(target=self._dispatch_forever, name="llm-scheduler",
+                                            daemon=True)
+        self._dispatcher.start()
+
+    # ---- dispatching ---------------------------------------------
+    def _refill(self, now):
+        # Caller holds the lock
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def _next_ticket(self):
+        # Caller holds the lock: first live ticket of the next user in turn
+        while self._queues:
+            user, queue = next(iter(self._queues.items()))
+            ticket = queue.popleft()
+            self._waiting -= 1
+
+            # This user goes to the back of the rotation (or leaves it)
+            del self._queues[user]
+            if queue:
+                self._queues[user] = queue
+
+            if not ticket.cancelled:
+                return ticket
+        return None
+
+    def _dispatch_forever(self):
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+
+                if self._waiting and self._active < self.max_concurrency and self._tokens >= 1:
+                    ticket = self._next_ticket()
+                    if ticket is not None:
+                        self._tokens -= 1
+                        self._active += 1
+                        self._waits.append(now - ticket.enqueued)
+                        ticket.granted.set()
+                    continue
+
+                # Sleep until a slot frees up, a request arrives or a token is due
+                timeout = None
+                if self._waiting and self._active < self.max_concurrency:
+                    timeout = (1 - self._tokens) / self.rate
+                self._cond.wait(timeout)
+
+    # ---- slots -----------------------------------------------------
+    def acquire(self, user):
+        """
+        Wait for a turn to call the API.
+
+        Raises:
+            SchedulerBusyError: Queue full, or no turn within queue_timeout
+        """
+        ticket = _Ticket(user)
+
+        with self._cond:
+            if self._waiting >= self.max_queue:
+                self._rejected += 1
+                raise SchedulerBusyError("The AI service is busy. Please try again shortly.")
+
+            self._queues.setdefault(user, deque()).append(ticket)
+            self._waiting += 1
+            self._cond.notify_all()
+
+        if ticket.granted.wait(self.queue_timeout):
+            return
+
+        with self._cond:
+            if ticket.granted.is_set():
+                return      # granted just as the wait timed out
+            ticket.cancelled = True
+            self._rejected += 1
+        raise SchedulerBusyError("Timed out waiting for the AI service. Please try again.")
+
+    def release(self):
+        """
+        Give a slot back (after the stream ended or failed).
+        """
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    # ---- requests --------------------------------------------------
+    def stream(self, user, backend, messages, model, temperature):
+        """
+        Stream a chat completion through the scheduler.
+
+        Yields text deltas like backend.stream_chat(). Retryable errors
+        before the first delta are retried with backoff; the last error
+        is raised once the retries are used up.
+        """
+        attempt = 0
+        while True:
+            self.acquire(user)
+            streamed = False
+            try:
+                for delta in backend.stream_chat(messages, model, temperature):
+                    streamed = True
+                    yield delta
+
+                with self._cond:
+                    self._completed += 1
+                return
+
+            except LLMError as e:
+                if streamed or not is_retryable(e) or attempt >= self.max_retries:
+                    with self._cond:
+                        self._failed += 1
+                    raise
+
+            finally:
+                self.release()
+
+            with self._cond:
+                self._retries += 1
+            time.sleep(backoff_delay(attempt))
+            attempt += 1
+
+    def stats(self):
+        """
+        Return queue depth, active requests, counters and wait percentiles (ms).
+        """
+        with self._cond:
+            waits = sorted(self._waits)
+            stats = {
+                "queue_depth": self._waiting,
+                "waiting_users": len(self._queues),
+                "active": self._active,
+                "max_concurrency": self.max_concurrency,
+                "completed": self._completed,
+                "failed": self._failed,
+                "retries": self._retries,
+                "rejected": self._rejected,
+            }
+
+        for name, pct in (("wait_p50_ms", 0.50), ("wait_p95_ms", 0.95)):
+            if waits:
+                stats[name] = waits[min(len(waits) - 1, int(pct * len(waits)))] * 1000
+            else:
+                stats[name] = 0.0
+        return stats
+
+
+class ScheduledBackend(LLMBackend):
+    """
+    Wraps a backend so every call of one user goes through a scheduler.
+    """
+
+    name = "scheduled"
+
+    def __init__(self, backend, scheduler, user):
+        self.backend = backend
+        self.scheduler = scheduler
+        self.user = user
+
+    def stream_chat(self, messages, model, temperature):
+        return self.scheduler.stream(self.user, self.backend, messages, model, temperature)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """
+    Return the process-wide scheduler shared by all chat sessions.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler()
+        return _scheduler
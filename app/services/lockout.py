@@ -0,0 +1,224 @@
+"""
+lockout.py
+-----------
+Account lockout and login rate limiting.
+
+Replaces lockout.json, which auth.py loaded and rewrote in full on every
+failed login (O(users) disk I/O per attempt, and concurrent writers
+overwrote each other's counts).
+
+Two layers:
+
+1. In-memory sliding-window limiters, one keyed by username and one by
+   source (client IP, "cli", ...). They are checked first and reject
+   bursts without touching the disk, so a credential-stuffing run
+   cannot turn into a stream of database writes.
+
+2. The `login_failures` table: one row per username, updated with a
+   single atomic UPSERT per failure (no read-modify-write). A user is
+   locked once LOCKOUT_LIMIT failures happen with less than LOCKOUT_TIME
+   seconds between them; the lock ends LOCKOUT_TIME seconds after the
+   last failure. Expired rows are swept periodically.
+"""
+
+import threading
+import time
+from collections import deque
+
+from app.data.db import get_connection
+from app.data.schema import create_login_failures_table
+
+
+# Failed attempts before an account is locked, and lock duration (seconds)
+LOCKOUT_LIMIT = 3
+LOCKOUT_TIME = 300
+
+# Sliding-window limits: (attempts, window in seconds)
+USERNAME_RATE_LIMIT = (10, 60)
+SOURCE_RATE_LIMIT = (30, 60)
+
+# Seconds between sweeps of expired login_failures rows
+SWEEP_INTERVAL = 60
+
+
+class SlidingWindowLimiter:
+    """
+    Allow at most `max_events` per key within the last `window` seconds.
+
+    Rejected attempts are not recorded, so a blocked client regains
+    access as soon as its old attempts leave the window.
+    """
+
+    def __init__(self, max_events, window):
+        self.max_events = max_events
+        self.window = window
+
+        self._events = {}           # key -> deque of timestamps
+        self._lock = threading.Lock()
+        self._last_prune = time.monotonic()
+
+    def hit(self, key, now=None):
+        """
+        Record an attempt for `key` if it is within the limit.
+
+        Returns:
+            tuple: (allowed, seconds until the next attempt is allowed)
+        """
+        now = time.monotonic() if now is None else now
+
+        with self._lock:
+            events = self._events.setdefault(key, deque())
+            cutoff = now - self.window
+            while events and events[0] <= cutoff:
+                events.popleft()
+
+            if len(events) >= self.max_events:
+                retry_after = events[0] + self.window - now
+                return False, max(0, int(retry_after) + 1)
+
+            events.append(now)
+
+            # Drop idle keys now and then so memory stays bounded
+            if now - self._last_prune > self.window:
+                self._prune(cutoff)
+                self._last_prune = now
+
+            return True, 0
+
+    def reset(self, key):
+        with self._lock:
+            self._events.pop(key, None)
+
+    def _prune(self, cutoff):
+        # Caller holds the lock
+        for key in [k for k, ev in self._events.items() if not ev or ev[-1] <= cutoff]:
+            del self._events[key]
+
+
+# Process-wide limiters shared by every login path
+username_limiter = SlidingWindowLimiter(*USERNAME_RATE_LIMIT)
+source_limiter = SlidingWindowLimiter(*SOURCE_RATE_LIMIT)
+
+_table_ready = False
+_sweep_lock = threading.Lock()
+_last_sweep = 0.0
+
+
+def _ensure_table(conn):
+    # The CLI (auth.py) may run before main2.py ever created the tables
+    global _table_ready
+    if not _table_ready:
+        create_login_failures_table(conn)
+        _table_ready = True
+
+
+def check_rate_limit(username, source=None):
+    """
+    Apply the per-username and per-source sliding windows.
+
+    Returns:
+        tuple: (allowed, seconds to wait when not allowed)
+    """
+    if source is not None:
+        allowed, retry_after = source_limiter.hit(source)
+        if not allowed:
+            return False, retry_after
+
+    return username_limiter.hit(username)
+
+
+def is_account_locked(username, now=None):
+    """
+    Check whether an account is locked out.
+
+    Returns:
+        tuple: (locked, seconds remaining)
+    """
+    now = time.time() if now is None else now
+
+    with get_connection() as conn:
+        _ensure_table(conn)
+        row = conn.execute(
+            "SELECT attempts, last_attempt FROM login_failures WHERE username = ?",
+            (username,),
+        ).fetchone()
+
+    if row is None or row[0] < LOCKOUT_LIMIT:
+        return False, 0
+
+    remaining = row[1] + LOCKOUT_TIME - now
+    if remaining <= 0:
+        return False, 0
+    return True, int(remaining)
+
+
+def record_failed_attempt(username, now=None):
+    """
+    Count one failed login for a user (single atomic statement).
+
+    Failures older than LOCKOUT_TIME no longer count: the counter starts
+    again at 1, which also ends an expired lock.
+    """
+    now = time.time() if now is None else now
+
+    with get_connection() as conn:
+        _ensure_table(conn)
+        conn.execute(
+            """
+            INSERT INTO login_failures (username, attempts, last_attempt)
+            VALUES (?, 1, ?)
+            ON CONFLICT(username) DO UPDATE SET
+                attempts = CASE
+                    WHEN last_attempt < excluded.last_attempt - ? THEN 1
+                    ELSE attempts + 1
+                END,
+                last_attempt = excluded.last_attempt
+            """,
+            (username, now, LOCKOUT_TIME),
+        )
+        conn.commit()
+
+    _maybe_sweep(now)
+
+
+def clear_failed_attempts(username):
+    """
+    Forget a user's failures (called after a successful login).
+    """
+    with get_connection() as conn:
+        _ensure_table(conn)
+        conn.execute("DELETE FROM login_failures WHERE username = ?", (username,))
+        conn.commit()
+
+    username_limiter.reset(username)
+
+
+def sweep_expired(now=None):
+    """
+    Delete failure rows that can no longer lock anyone.
+
+    Returns:
+        int: Number of rows removed
+    """
+    now = time.time() if now is None else now
+
+    with get_connection() as conn:
+        _ensure_table(conn)
+        cursor = conn.execute(
+            "DELETE FROM login_failures WHERE last_attempt < ?",
+            (now - LOCKOUT_TIME,),
+        )
+        conn.commit()
+
+    return cursor.rowcount
+
+
+def _maybe_sweep(now):
+    global _last_sweep
+
+    with _sweep_lock:
+        if now - _last_sweep < SWEEP_INTERVAL:
+            return
+        _last_sweep = now
+
+    sweep_expired(now)
@@ -0,0 +1,173 @@
+"""
+password_policy.py
+-------------------
+bcrypt cost-factor policy for the platform.
+
+Instead of the library default (`bcrypt.gensalt()` = cost 12 on every
+machine), the cost is chosen for this host: a short benchmark picks the
+highest cost whose hash time stays within the login latency budget
+(TARGET_VERIFY_MS).
+
+The benchmark runs once; its result is saved to DATA/bcrypt_policy.json
+and reused on later starts, so a noisy measurement cannot flip the cost
+(and with it every user's stored hash) from one restart to the next.
+A recalibration never lowers the saved cost.
+
+Stored hashes created with a lower cost are upgraded transparently:
+after a successful login the password is rehashed with the current cost
+and written back (see user_service.login_user). Hashes with a higher
+cost are left alone.
+
+Environment overrides:
+- BCRYPT_TARGET_MS:    latency budget in milliseconds (default 250)
+- BCRYPT_ROUNDS:       fixed cost, skips the benchmark
+- BCRYPT_RECALIBRATE:  set to 1 to benchmark again (never below the saved cost)
+"""
+
+import json
+import os
+import threading
+import time
+
+import bcrypt
+
+from app.data.db import DATA_DIR
+
+
+# Login latency budget for one verification (milliseconds)
+TARGET_VERIFY_MS = float(os.environ.get("BCRYPT_TARGET_MS", 250))
+
+# Never go below the OWASP-recommended minimum, never above what is usable
+MIN_ROUNDS = 10
+MAX_ROUNDS = 15
+
+# Calibrated cost kept across restarts
+POLICY_PATH = DATA_DIR / "bcrypt_policy.json"
+
+_policy = None
+_policy_lock = threading.Lock()
+
+
+def _time_hash(rounds, repeats=2):
+    # Best of a few runs, in milliseconds
+    salt = bcrypt.gensalt(rounds)
+    best = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        bcrypt.hashpw(b"calibration-password", salt)
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def calibrate_rounds(target_ms=TARGET_VERIFY_MS, min_rounds=MIN_ROUNDS, max_rounds=MAX_ROUNDS):
+    """
+    Benchmark this host and pick the bcrypt cost for a latency target.
+
+    bcrypt time doubles with every extra round, so one measurement at
+    min_rounds is enough to estimate the others.
+
+    Returns:
+        tuple: (rounds, estimated milliseconds per hash at that cost)
+    """
+    base_ms = _time_hash(min_rounds)
+
+    rounds = min_rounds
+    while rounds < max_rounds and base_ms * 2 ** (rounds + 1 - min_rounds) <= target_ms:
+        rounds += 1
+
+    return rounds, base_ms * 2 ** (rounds - min_rounds)
+
+
+def load_saved_rounds(path=POLICY_PATH):
+    """
+    Return the cost saved by an earlier calibration, or None.
+    """
+    try:
+        saved = json.loads(path.read_text())
+        rounds = int(saved["rounds"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return rounds if MIN_ROUNDS <= rounds <= MAX_ROUNDS else None
+
+
+def save_rounds(rounds, estimated_ms, path=POLICY_PATH):
+    """
+    Save a calibrated cost for later starts.
+    """
+    try:
+        path.write_text(json.dumps({
+            "rounds": rounds,
+            "estimated_ms": round(estimated_ms, 1),
+            "target_ms": TARGET_VERIFY_MS,
+            "calibrated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }, indent=2))
+    except OSError as e:
+        print(f"Could not save bcrypt policy to {path}: {e}")
+
+
+def _build_policy():
+    # Caller holds _policy_lock
+    fixed = os.environ.get("BCRYPT_ROUNDS")
+    if fixed:
+        return {"rounds": int(fixed), "estimated_ms": None, "source": "env"}
+
+    saved = load_saved_rounds(POLICY_PATH)
+    if saved is not None and os.environ.get("BCRYPT_RECALIBRATE") != "1":
+        return {"rounds": saved, "estimated_ms": None, "source": "saved"}
+
+    rounds, estimated_ms = calibrate_rounds()
+    if saved is not None and saved > rounds:
+        # Floor at the saved cost: hashes already upgraded stay current
+        estimated_ms *= 2 ** (saved - rounds)
+        rounds = saved
+    save_rounds(rounds, estimated_ms, POLICY_PATH)
+    return {"rounds": rounds, "estimated_ms": round(estimated_ms, 1), "source": "benchmark"}
+
+
+def get_policy():
+    """
+    Return the active hashing policy, loading or calibrating it on first use.
+
+    Returns:
+        dict: rounds, estimated_ms, target_ms, source ("env", "saved"
+              or "benchmark")
+    """
+    global _policy
+
+    with _policy_lock:
+        if _policy is None:
+            _policy = _build_policy()
+            _policy["target_ms"] = TARGET_VERIFY_MS
+            print(f"bcrypt policy: cost {_policy['rounds']} ({_policy['source']}, "
+                  f"target {TARGET_VERIFY_MS:.0f} ms)")
+        return dict(_policy)
+
+
+def current_rounds():
+    """
+    Return the bcrypt cost new hashes should use.
+    """
+    return get_policy()["rounds"]
+
+
+def get_hash_rounds(stored_hash):
+    """
+    Read the cost factor from a bcrypt hash ("$2b$12$..." -> 12).
+
+    Returns:
+        int or None if the string is not a bcrypt hash
+    """
+    parts = stored_hash.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def needs_rehash(stored_hash):
+    """
+    True if a stored hash was made with a lower cost than the policy's
+    (or is not a bcrypt hash at all).
+    """
+    rounds = get_hash_rounds(stored_hash)
+    return rounds is None or rounds < current_rounds()
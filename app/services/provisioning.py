@@ -0,0 +1,295 @@
+"""
+provisioning.py
+----------------
+Bulk user provisioning from a CSV or JSONL file.
+
+Calling register_user() once per person opens a connection, runs a
+SELECT, hashes on one core and commits for every account. This module
+onboards a whole file in three phases instead:
+
+1. Validate every row (app.services.validation rules, known role, no
+   duplicates in the file or in the database).
+2. Hash all valid passwords in the shared bcrypt process pool (a row
+   whose hash fails is reported as an error; the others go on).
+3. Insert the accounts with one executemany in a single transaction.
+
+Every input row gets a result in the report, and the summary includes
+timings and throughput.
+
+Input columns: username, password, role (optional, default "user").
+
+Usage:
+    python -m app.services.provisioning users.csv [report.csv]
+"""
+
+import csv
+import json
+import sys
+import time
+from pathlib import Path
+
+from app.data.db import get_connection
+from app.data.users import invalidate_user
+from app.services import hashing
+from app.services.validation import validate_password, validate_username
+
+
+# Roles accepted by the platform
+VALID_ROLES = {"user", "admin", "analyst"}
+
+# Usernames per "IN (...)" lookup (below SQLite's parameter limit)
+LOOKUP_CHUNK = 500
+
+# Submissions per password while the hashing queue is full, and the
+# pause between them (seconds)
+HASH_ATTEMPTS = 3
+HASH_RETRY_DELAY = 0.5
+
+
+def read_user_rows(path):
+    """
+    Read users from a .csv (with header) or .jsonl file.
+
+    Returns:
+        list of dicts with keys username, password, role
+    """
+    path = Path(path)
+
+    with open(path, "r", newline="") as f:
+        if path.suffix.lower() == ".jsonl":
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+
+    return [
+        {
+            "username": str(row.get("username") or "").strip(),
+            "password": str(row.get("password") or ""),
+            "role": str(row.get("role") or "user").strip().lower(),
+        }
+        for row in rows
+    ]
+
+
+def _existing_usernames(conn, usernames):
+    # Which of the given usernames are already registered
+    existing = set()
+    usernames = list(usernames)
+
+    for start in range(0, len(usernames), LOOKUP_CHUNK):
+        chunk = usernames[start:start + LOOKUP_CHUNK]
+        placeholders = ", ".join("?" for _ in chunk)
+        rows = conn.execute(
+            f"SELECT username FROM users WHERE username IN ({placeholders})",
+            chunk,
+        ).fetchall()
+        existing.update(row[0] for row in rows)
+
+    return existing
+
+
+def _submit_hash(password):
+    # Logins share the pool's queue; if it is full, wait and try again
+    for attempt in range(HASH_ATTEMPTS):
+        try:
+            return hashing.submit_hash(password)
+        except hashing.HashQueueFullError:
+            if attempt == HASH_ATTEMPTS - 1:
+                raise
+            time.sleep(HASH_RETRY_DELAY)
+
+
+def _hash_all(passwords):
+    # Hash in windows no larger than the pool's queue. Returns one
+    # (hash, None) or (None, error message) per password, so a failed
+    # or timed-out hash only affects its own row
+    results = []
+    window = hashing.MAX_PENDING
+
+    for start in range(0, len(passwords), window):
+        futures = []
+        for password in passwords[start:start + window]:
+            try:
+                futures.append(_submit_hash(password))
+            except Exception as e:
+                futures.append(e)
+
+        for future in futures:
+            try:
+                if isinstance(future, Exception):
+                    raise future
+                results.append((future.result(timeout=hashing.DEFAULT_TIMEOUT), None))
+            except Exception as e:
+                results.append((None, f"Hashing failed: {str(e) or type(e).__name__}"))
+
+    return results
+
+
+def provision_users(rows):
+    """
+    Validate, hash and insert a batch of users.
+
+    Args:
+        rows (list): dicts with username, password and optional role
+
+    Returns:
+        tuple: (report, summary)
+            report  - one dict per input row: row, username, status
+                      ("created", "invalid", "duplicate", "exists", "error")
+                      and message
+            summary - counts, phase timings and users per second
+    """
+    started = time.perf_counter()
+    report = [
+        {"row": i, "username": row["username"], "status": None, "message": ""}
+        for i, row in enumerate(rows, start=1)
+    ]
+
+    # ---- Phase 1: validation -------------------------------------
+    seen = set()
+    candidates = []             # indexes of rows that passed validation
+
+    for i, row in enumerate(rows):
+        ok, message = validate_username(row["username"])
+        if ok:
+            ok, message = validate_password(row["password"])
+        if ok and row.get("role", "user") not in VALID_ROLES:
+            ok, message = False, f"Unknown role '{row['role']}'."
+
+        if not ok:
+            report[i].update(status="invalid", message=message)
+        elif row["username"] in seen:
+            report[i].update(status="duplicate", message="Username repeated in the file.")
+        else:
+            seen.add(row["username"])
+            candidates.append(i)
+
+    with get_connection() as conn:
+        existing = _existing_usernames(conn, seen)
+
+    to_create = []
+    for i in candidates:
+        if rows[i]["username"] in existing:
+            report[i].update(status="exists", message="Username already registered.")
+        else:
+            to_create.append(i)
+
+    validated = time.perf_counter()
+
+    # ---- Phase 2: parallel hashing ---------------------------------
+    hashed_rows, hashes = [], []
+    for i, (password_hash, error) in zip(
+        to_create, _hash_all([rows[i]["password"] for i in to_create])
+    ):
+        if error is None:
+            hashed_rows.append(i)
+            hashes.append(password_hash)
+        else:
+            report[i].update(status="error", message=error)
+    to_create = hashed_rows
+
+    hashed = time.perf_counter()
+
+    # ---- Phase 3: one transaction --------------------------------
+    if to_create:
+        records = [
+            (rows[i]["username"], h, rows[i].get("role", "user"))
+            for i, h in zip(to_create, hashes)
+        ]
+
+        with get_connection() as conn:
+            try:
+                conn.execute("BEGIN")
+                conn.executemany(
+                    """
+                    INSERT OR IGNORE INTO users (username, password_hash, role)
+                    VALUES (?, ?, ?)
+                    """,
+                    records,
+                )
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                for i in to_create:
+                    report[i].update(status="error", message=f"Insert failed: {e}")
+                to_create = []
+
+            # A concurrent registration may have taken a name meanwhile
+            if to_create:
+                stored = {}
+                names = [record[0] for record in records]
+                for start in range(0, len(names), LOOKUP_CHUNK):
+                    chunk = names[start:start + LOOKUP_CHUNK]
+                    placeholders = ", ".join("?" for _ in chunk)
+                    stored.update(conn.execute(
+                        f"SELECT username, password_hash FROM users "
+                        f"WHERE username IN ({placeholders})",
+                        chunk,
+                    ).fetchall())
+
+        for i, (username, password_hash, _) in zip(to_create, records):
+            if stored.get(username) == password_hash:
+                invalidate_user(username)
+                report[i].update(status="created", message="User created.")
+            else:
+                report[i].update(status="exists", message="Username already registered.")
+
+    finished = time.perf_counter()
+
+    created = sum(1 for r in report if r["status"] == "created")
+    total_seconds = finished - started
+    summary = {
+        "rows": len(rows),
+        "created": created,
+        "failed": len(rows) - created,
+        "validate_seconds": round(validated - started, 3),
+        "hash_seconds": round(hashed - validated, 3),
+        "insert_seconds": round(finished - hashed, 3),
+        "total_seconds": round(total_seconds, 3),
+        "users_per_second": round(created / total_seconds, 1) if total_seconds else 0.0,
+    }
+
+    return report, summary
+
+
+def provision_users_from_file(path):
+    """
+    Read a CSV/JSONL file and provision every user in it.
+
+    Returns:
+        tuple: (report, summary) as returned by provision_users()
+    """
+    return provision_users(read_user_rows(path))
+
+
+def write_report(report, path):
+    """
+    Save the per-row report as CSV.
+    """
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["row", "username", "status", "message"])
+        writer.writeheader()
+        writer.writerows(report)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python -m app.services.provisioning USERS_FILE [REPORT_CSV]")
+        sys.exit(1)
+
+    report, summary = provision_users_from_file(sys.argv[1])
+
+    for line in report:
+        if line["status"] != "created":
+            print(f"row {line['row']} ({line['username']}): {line['status']} - {line['message']}")
+
+    print(
+        f"Created {summary['created']} of {summary['rows']} users in "
+        f"{summary['total_seconds']}s ({summary['users_per_second']} users/s; "
+        f"validate {summary['validate_seconds']}s, hash {summary['hash_seconds']}s, "
+        f"insert {summary['insert_seconds']}s)"
+    )
+
+    if len(sys.argv) > 2:
+        write_report(report, sys.argv[2])
+        print(f"Report written to {sys.argv[2]}")
@@ -0,0 +1,219 @@
+"""
+sessions.py
+------------
+Login sessions for the platform.
+
+Replaces sessions.txt, which auth.py appended to (and save_session()
+overwrote) without ever validating, expiring or compacting tokens.
+
+- Tokens are random (secrets.token_urlsafe). Only their SHA-256 is
+  stored, as the primary key of the `sessions` table, so a leaked
+  database does not leak usable tokens.
+- Every session expires SESSION_TTL seconds after it was created.
+- Validation checks an in-memory LRU of hot sessions first and falls
+  back to one primary-key lookup, so a dashboard rerun never scans.
+  An LRU entry is trusted for LRU_RECHECK seconds only; after that the
+  row is looked up again, so a logout or password change in another
+  process takes effect within seconds.
+- A background thread deletes expired rows every SWEEP_INTERVAL seconds.
+"""
+
+import hashlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from app.data.db import get_connection
+from app.data.schema import create_sessions_table
+
+
+# Session lifetime (seconds)
+SESSION_TTL = 8 * 60 * 60
+
+# Sessions kept in the in-memory LRU
+LRU_SIZE = 1024
+
+# Seconds an LRU entry is trusted before the table is checked again
+LRU_RECHECK = 5
+
+# Seconds between background sweeps of expired sessions
+SWEEP_INTERVAL = 300
+
+_hot_sessions = OrderedDict()       # token hash -> (username, expires_at, checked_at)
+_lru_lock = threading.Lock()
+
+_table_ready = False
+_sweeper = None
+_sweeper_lock = threading.Lock()
+
+
+def _hash_token(token):
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _ensure_table(conn):
+    # The CLI (auth.py) may run before main2.py ever created the tables
+    global _table_ready
+    if not _table_ready:
+        create_sessions_table(conn)
+        _table_ready = True
+
+
+def _remember(token_hash, username, expires_at, checked_at):
+    with _lru_lock:
+        _hot_sessions[token_hash] = (username, expires_at, checked_at)
+        _hot_sessions.move_to_end(token_hash)
+        while len(_hot_sessions) > LRU_SIZE:
+            _hot_sessions.popitem(last=False)
+
+
+def _forget(token_hash):
+    with _lru_lock:
+        _hot_sessions.pop(token_hash, None)
+
+
+def create_session(username, ttl=SESSION_TTL):
+    """
+    Start a session for a user.
+
+    Returns:
+        str: The session token (only its hash is stored)
+    """
+    token = secrets.token_urlsafe(32)
+    token_hash = _hash_token(token)
+    now = time.time()
+
+    with get_connection() as conn:
+        _ensure_table(conn)
+        conn.execute(
+            """
+            INSERT INTO sessions (token_hash, username, created_at, expires_at)
+            VALUES (?, ?, ?, ?)
+            """,
+            (token_hash, username, now, now + ttl),
+        )
+        conn.commit()
+
+    _remember(token_hash, username, now + ttl, now)
+    start_session_sweeper()
+    return token
+
+
+def validate_session(token):
+    """
+    Look up a session token.
+
+    Returns:
+        str or None: The username, or None if the token is unknown or expired
+    """
+    if not token:
+        return None
+
+    token_hash = _hash_token(token)
+    now = time.time()
+
+    with _lru_lock:
+        hot = _hot_sessions.get(token_hash)
+        if hot is not None:
+            _hot_sessions.move_to_end(token_hash)
+
+    if hot is None or now - hot[2] >= LRU_RECHECK:
+        # Not cached, or cached too long ago to trust
+        with get_connection() as conn:
+            _ensure_table(conn)
+            row = conn.execute(
+                "SELECT username, expires_at FROM sessions WHERE token_hash = ?",
+                (token_hash,),
+            ).fetchone()
+
+        if row is None:
+            _forget(token_hash)
+            return None
+        hot = (*row, now)
+        _remember(token_hash, *hot)
+
+    username, expires_at, _ = hot
+    if expires_at <= now:
+        revoke_session(token)
+        return None
+
+    return username
+
+
+def revoke_session(token):
+    """
+    End a session (logout).
+    """
+    token_hash = _hash_token(token)
+    _forget(token_hash)
+
+    with get_connection() as conn:
+        _ensure_table(conn)
+        conn.execute("DELETE FROM sessions WHERE token_hash = ?", (token_hash,))
+        conn.commit()
+
+
+def revoke_user_sessions(username):
+    """
+    End every session of a user (e.g. after a password change).
+
+    Returns:
+        int: Number of sessions removed
+    """
+    with _lru_lock:
+        for token_hash in [h for h, (user, _, _) in _hot_sessions.items() if user == username]:
+            del _hot_sessions[token_hash]
+
+    with get_connection() as conn:
+        _ensure_table(conn)
+        cursor = conn.execute("DELETE FROM sessions WHERE username = ?", (username,))
+        conn.commit()
+
+    return cursor.rowcount
+
+
+def sweep_expired_sessions(now=None):
+    """
+    Delete expired sessions from the table and the LRU.
+
+    Returns:
+        int: Number of rows removed
+    """
+    now = time.time() if now is None else now
+
+    with _lru_lock:
+        for token_hash in [h for h, (_, exp, _) in _hot_sessions.items() if exp <= now]:
+            del _hot_sessions[token_hash]
+
+    with get_connection() as conn:
+        _ensure_table(conn)
+        cursor = conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+        conn.commit()
+
+    return cursor.rowcount
+
+
+def _sweep_forever(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            sweep_expired_sessions()
+        except Exception as e:
+            # A busy database should not kill the sweeper
+            print(f"Session sweep failed: {e}")
+
+
+def start_session_sweeper(interval=SWEEP_INTERVAL):
+    """
+    Start the background sweeper thread (once per process).
+    """
+    global _sweeper
+
+    with _sweeper_lock:
+        if _sweeper is None:
+            _sweeper = threading.Thread(
+                target=_sweep_forever, args=(interval,),
+                name="session-sweeper", daemon=True,
+            )
+            _sweeper.start()
@@ -0,0 +1,171 @@
+"""
+stream_renderer.py
+-------------------
+Throttled rendering of streamed chat answers.
+
+The AI chat used to call `placeholder.markdown(full_reply + "▌")` for
+every delta and grow `full_reply` with `+=`. A long answer arrives in
+thousands of deltas, so the whole markdown was re-rendered (and re-sent
+over the websocket) thousands of times, and each `+=` copied the text
+again.
+
+StreamRenderer keeps the deltas in a list and only re-renders the
+placeholder when a frame interval has passed (default 20 fps) or enough
+new characters have arrived. The text is joined once per frame and once
+at the end.
+
+Benchmark against a fake local stream:
+    python -m app.services.stream_renderer
+"""
+
+import time
+
+
+# Default frame rate and character threshold for re-rendering
+DEFAULT_FPS = 20
+DEFAULT_CHAR_THRESHOLD = 400
+
+# Shown at the end of the text while the answer is still streaming
+CURSOR = "▌"
+
+
+class StreamRenderer:
+    """
+    Buffer streamed text and render it to a placeholder at a fixed rate.
+
+    `placeholder` is anything with a .markdown(text) method, normally
+    st.empty().
+    """
+
+    def __init__(self, placeholder, fps=DEFAULT_FPS, char_threshold=DEFAULT_CHAR_THRESHOLD,
+                 cursor=CURSOR, clock=time.monotonic):
+        self.placeholder = placeholder
+        self.interval = 1.0 / fps if fps else 0.0
+        self.char_threshold = char_threshold
+        self.cursor = cursor
+        self.clock = clock
+
+        self._parts = []
+        self._pending_chars = 0
+        self._last_flush = None
+        self.render_calls = 0
+
+    def write(self, delta):
+        """
+        Add one streamed delta; re-render only when a frame is due.
+        """
+        if not delta:
+            return
+
+        self._parts.append(delta)
+        self._pending_chars += len(delta)
+
+        now = self.clock()
+        if (self._last_flush is None
+                or now - self._last_flush >= self.interval
+                or self._pending_chars >= self.char_threshold):
+            self._render(self.text + self.cursor)
+            self._last_flush = now
+
+    def consume(self, deltas):
+        """
+        Render a whole stream of deltas and return the final text.
+
+        If the stream raises part-way, the text received so far is
+        rendered (without cursor) before the error propagates.
+        """
+        try:
+            for delta in deltas:
+                self.write(delta)
+        except Exception:
+            self.close()
+            raise
+        return self.close()
+
+    def close(self):
+        """
+        Render the final text (without cursor) and return it.
+        """
+        final = self.text
+        self._render(final)
+        return final
+
+    @property
+    def text(self):
+        # Join once and keep the result so later joins start from it
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    def _render(self, text):
+        self.placeholder.markdown(text)
+        self.render_calls += 1
+        self._pending_chars = 0
+
+
+# -------------------------------------------------
+# Benchmark
+# -------------------------------------------------
+class _CountingPlaceholder:
+    # Stands in for st.empty(): counts calls and characters "sent"
+    def __init__(self):
+        self.calls = 0
+        self.chars = 0
+
+    def markdown(self, text):
+        self.calls += 1
+        self.chars += len(text)
+
+
+def fake_stream(tokens=4000, token_text="word ", delay=0.0005):
+    """
+    Yield `tokens` small deltas with a fixed delay, like an API stream.
+    """
+    for _ in range(tokens):
+        if delay:
+            time.sleep(delay)
+        yield token_text
+
+
+def _naive(placeholder, deltas):
+    # The previous loop in pages/ai_chat.py
+    full_reply = ""
+    for delta in deltas:
+        full_reply += delta
+        placeholder.markdown(full_reply + CURSOR)
+    placeholder.markdown(full_reply)
+    return full_reply
+
+
+def run_benchmark(tokens=4000, delay=0.0005):
+    """
+    Compare the per-delta loop with StreamRenderer on the same fake stream.
+    """
+    results = {}
+
+    for name in ("per-delta", "throttled"):
+        placeholder = _CountingPlaceholder()
+        started = time.perf_counter()
+
+        if name == "per-delta":
+            text = _naive(placeholder, fake_stream(tokens, delay=delay))
+        else:
+            text = StreamRenderer(placeholder).consume(fake_stream(tokens, delay=delay))
+
+        results[name] = {
+            "render_calls": placeholder.calls,
+            "chars_rendered": placeholder.chars,
+            "seconds": round(time.perf_counter() - started, 3),
+            "length": len(text),
+        }
+
+    return results
+
+
+if __name__ == "__main__":
+    for name, r in run_benchmark().items():
+        print(
+            f"{name:>10}: {r['render_calls']:>5} render calls, "
+            f"{r['chars_rendered']:>11,} chars rendered, {r['seconds']}s "
+            f"(answer {r['length']} chars)"
+        )
@@ -0,0 +1,133 @@
+"""
+user_directory.py
+------------------
+Indexed access to the flat-file user store (users.txt) used by auth.py.
+
+auth.py used to read users.txt line by line for every register, exists
+check and login, so each lookup was O(N) and registering N users O(N^2).
+UserDirectory keeps a dict index {username: (password_hash, role)}:
+
+- built once on first use,
+- updated in place when a user is appended through add(),
+- caught up incrementally (only the new bytes are parsed) when another
+  process appends to the file, and rebuilt if the file shrank.
+"""
+
+import os
+import threading
+
+
+def parse_user_line(line):
+    """
+    Parse one users.txt line ("username,hash" or "username,hash,role").
+
+    Returns:
+        tuple: (username, password_hash, role) or None for blank/bad lines
+    """
+    parts = line.strip().split(",")
+    if len(parts) == 2:
+        return parts[0], parts[1], "user"
+    if len(parts) == 3:
+        return parts[0], parts[1], parts[2] or "user"
+    return None
+
+
+def read_users_file(path):
+    """
+    Read every valid record of a users file (first occurrence wins).
+
+    Returns:
+        list of (username, password_hash, role) tuples
+    """
+    seen = set()
+    records = []
+    with open(path, "r") as f:
+        for line in f:
+            record = parse_user_line(line)
+            if record is None or record[0] in seen:
+                continue
+            seen.add(record[0])
+            records.append(record)
+    return records
+
+
+class UserDirectory:
+    """
+    Hash index over a users.txt file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._index = {}
+        self._offset = 0            # bytes of the file already indexed
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        # Caller holds the lock. Index whatever was appended since the
+        # last refresh; start over if the file was replaced or truncated.
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            self._index.clear()
+            self._offset = 0
+            return
+
+        if size < self._offset:
+            self._index.clear()
+            self._offset = 0
+
+        if size == self._offset:
+            return
+
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+
+        # Leave a partially written last line for the next refresh
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].decode("utf-8").splitlines():
+            record = parse_user_line(line)
+            if record is not None:
+                # Keep the first record per username, like the old scans
+                self._index.setdefault(record[0], record[1:])
+        self._offset += end
+
+    def get(self, username):
+        """
+        Return (password_hash, role) for a user, or None.
+        """
+        with self._lock:
+            self._refresh()
+            return self._index.get(username)
+
+    def exists(self, username):
+        return self.get(username) is not None
+
+    def add(self, username, password_hash, role="user"):
+        """
+        Append a user to the file and the index.
+
+        Returns:
+            bool: False if the username already exists
+        """
+        with self._lock:
+            self._refresh()
+            if username in self._index:
+                return False
+
+            line = f"{username},{password_hash},{role}\n"
+            caught_up = os.path.exists(self.path) and os.path.getsize(self.path) == self._offset
+
+            with open(self.path, "a") as f:
+                f.write(line)
+
+            self._index[username] = (password_hash, role)
+            if caught_up:
+                # Skip re-reading our own line on the next refresh
+                self._offset += len(line.encode("utf-8"))
+            return True
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return len(self._index)
@@ -1,12 +1,33 @@
 import sqlite3
-import bcrypt
 from pathlib import Path
 
-# Database connection helper
-from app.data.db import connect_database
-
 # User data access functions
-from app.data.users import get_user_by_username, insert_user
+from app.data.users import (
+    clear_user_cache,
+    get_user_by_username,
+    insert_user,
+    update_user_password_hash,
+)
+
+# Off-thread bcrypt (process pool with bounded queue + timeouts)
+from app.services.hashing import (
+    HashQueueFullError,
+    hash_password,
+    submit_hash,
+    verify_password,
+)
+
+# Failed-login lockout and sliding-window rate limits
+from app.services import lockout
+
+# users.txt parsing shared with the flat-file directory in auth.py
+from app.services.user_directory import read_users_file
+
+# Calibrated bcrypt cost (hashes with another cost are upgraded on login)
+from app.services.password_policy import needs_rehash
+
+# Message shown when the hashing pool is saturated or too slow
+BUSY_MESSAGE = "The login service is busy. Please try again in a moment."
 
 # Schema helper (used elsewhere to create tables)
 from app.data.schema import create_users_table
@@ -18,6 +39,32 @@ from app.data.db import DB_PATH
 DATA_DIR = Path("DATA")
 
 
+def upgrade_password_hash(username, password, stored_hash):
+    # ------------------------------------------------------------
+    # Rehash a password whose stored hash uses an outdated bcrypt cost
+    #
+    # - Only called after the password was verified
+    # - Runs in the background: the login does not wait for the new hash
+    # - The new hash is written back through app/data/users.py, only
+    #   if the stored hash is still the one verified (a password
+    #   change in the meantime wins)
+    # ------------------------------------------------------------
+    if not needs_rehash(stored_hash):
+        return
+
+    try:
+        future = submit_hash(password)
+    except HashQueueFullError:
+        # Busy right now; the upgrade is retried on the next login
+        return
+
+    def _write_back(done):
+        if done.exception() is None:
+            update_user_password_hash(username, done.result(), expected_hash=stored_hash)
+
+    future.add_done_callback(_write_back)
+
+
 def register_user(username, password, role='user'):
     # ------------------------------------------------------------
     # Register a new user with a hashed password
@@ -27,27 +74,20 @@ def register_user(username, password, role='user'):
     # - Handles duplicate usernames safely
     # ------------------------------------------------------------
 
-    # Open database connection
-    conn = connect_database()
-
-    # Hash the password using bcrypt (automatic salting)
-    password_hash = bcrypt.hashpw(
-        password.encode('utf-8'),
-        bcrypt.gensalt()
-    ).decode('utf-8')
+    # Hash the password using bcrypt (automatic salting) in the hashing pool
+    try:
+        password_hash = hash_password(password)
+    except (HashQueueFullError, TimeoutError):
+        return False, BUSY_MESSAGE
 
     try:
-        # Insert user into database
+        # Insert user into database (insert_user borrows a pooled connection)
         insert_user(username, password_hash, role)
 
-        # Close connection
-        conn.close()
-
         return True, f"User '{username}' registered successfully."
 
     except sqlite3.IntegrityError:
         # Triggered if username already exists (UNIQUE constraint)
-        conn.close()
         return False, f"Username '{username}' already exists."
 
 
@@ -69,8 +109,15 @@ def login_user(username, password):
     # Extract stored password hash (3rd column)
     stored_hash = user[2]
 
-    # Verify password against stored bcrypt hash
-    if bcrypt.checkpw(password.encode('utf-8'), stored_hash.encode('utf-8')):
+    # Verify password against stored bcrypt hash (off the script thread)
+    try:
+        valid = verify_password(password, stored_hash)
+    except (HashQueueFullError, TimeoutError):
+        return False, BUSY_MESSAGE
+
+    if valid:
+        # Bring the stored hash up to the current cost factor
+        upgrade_password_hash(username, password, stored_hash)
         return True, f"Login successful! Welcome, {username}."
     else:
         return False, "Incorrect password."
@@ -80,56 +127,45 @@ def migrate_users_from_file(conn, filepath=DATA_DIR / "users.txt"):
     # ------------------------------------------------------------
     # Migrate legacy users from users.txt into SQLite database
     #
-    # - Reads username + password_hash from file
-    # - Inserts users safely using INSERT OR IGNORE
+    # - Parses username, password_hash and role from every line
+    # - Inserts all users with one executemany in a single transaction
+    #   (INSERT OR IGNORE keeps existing accounts untouched)
     # ------------------------------------------------------------
 
     # If legacy file does not exist, stop migration
     if not filepath.exists():
         print(f" File not found: {filepath}")
         print("   No users to migrate.")
-        return
-
-    cursor = conn.cursor()
-    migrated_count = 0
-
-    # Open legacy users file
-    with open(filepath, "r") as f:
-        for line in f:
-            line = line.strip()
-
-            # Skip empty lines
-            if not line:
-                continue
-
-            parts = line.split(",")
+        return 0
 
-            # Expect username,password_hash format
-            if len(parts) >= 2:
-                username = parts[0]
-                password_hash = parts[1]
+    # Parse the whole file up front (first record per username wins)
+    records = read_users_file(filepath)
 
-                try:
-                    # Insert user if not already present
-                    cursor.execute(
-                        """
-                        INSERT OR IGNORE INTO users (username, password_hash, role)
-                        VALUES (?, ?, ?)
-                        """,
-                        (username, password_hash, "user"),
-                    )
-
-                    # Count successful migrations
-                    if cursor.rowcount > 0:
-                        migrated_count += 1
-
-                except sqlite3.Error as e:
-                    print(f"Error migrating user {username}: {e}")
-
-    # Commit all inserts
-    conn.commit()
+    before = conn.total_changes
+    try:
+        conn.execute("BEGIN")
+        conn.executemany(
+            """
+            INSERT OR IGNORE INTO users (username, password_hash, role)
+            VALUES (?, ?, ?)
+            """,
+            records,
+        )
+        conn.commit()
+    except sqlite3.Error as e:
+        conn.rollback()
+        print(f"Error migrating users from {filepath.name}: {e}")
+        return 0
+
+    # Rows actually inserted (existing usernames are ignored)
+    migrated_count = conn.total_changes - before
+
+    # New usernames may be cached as "not found"
+    if migrated_count:
+        clear_user_cache()
 
     print(f" Migrated {migrated_count} users from {filepath.name}")
+    return migrated_count
 
 
 def register_user(username, password, role="user"):
@@ -141,63 +177,68 @@ def register_user(username, password, role="user"):
     # - Inserts user into database
     # ------------------------------------------------------------
 
-    conn = connect_database()
-    cursor = conn.cursor()
-
-    # Check if username already exists
-    cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
-    if cursor.fetchone():
-        conn.close()
+    # Check if username already exists (served from the user cache)
+    if get_user_by_username(username) is not None:
         return False, f"Username '{username}' already exists."
 
-    # Hash password securely
-    password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password_bytes, salt)
-    password_hash = hashed.decode('utf-8')
-
-    # Insert new user record
-    cursor.execute(
-        "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
-        (username, password_hash, role)
-    )
+    # Hash password securely in the hashing pool (outside the checkout
+    # so the slow bcrypt call does not hold a pooled connection)
+    try:
+        password_hash = hash_password(password)
+    except (HashQueueFullError, TimeoutError):
+        return False, BUSY_MESSAGE
 
-    conn.commit()
-    conn.close()
+    # Insert new user record (also invalidates the cached lookup)
+    try:
+        insert_user(username, password_hash, role)
+    except sqlite3.IntegrityError:
+        # Registered by another process since the cached check
+        return False, f"Username '{username}' already exists."
 
     return True, f"User '{username}' registered successfully!"
 
 
-def login_user(username, password):
+def login_user(username, password, source=None):
     # ------------------------------------------------------------
     # Authenticate a user against the database
     #
+    # - Rejects bursts per username / per source (client IP) in memory
+    # - Refuses locked accounts (app/services/lockout.py)
     # - Retrieves user by username
     # - Compares bcrypt password hashes
     # ------------------------------------------------------------
 
-    conn = connect_database()
-    cursor = conn.cursor()
+    # Sliding-window rate limits (no disk I/O for rejected attempts)
+    allowed, retry_after = lockout.check_rate_limit(username, source)
+    if not allowed:
+        return False, f"Too many login attempts. Try again in {retry_after}s."
 
-    # Fetch user record
-    cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
-    user = cursor.fetchone()
+    locked, remaining = lockout.is_account_locked(username)
+    if locked:
+        return False, f"Account locked. Try again in {remaining // 60}m {remaining % 60}s."
 
-    conn.close()
+    # Fetch user record (usually from the user lookup cache)
+    user = get_user_by_username(username)
 
     # User does not exist
     if not user:
+        lockout.record_failed_attempt(username)
         return False, "Username not found."
 
     # Stored password hash
     stored_hash = user[2]
 
-    # Convert inputs to bytes for bcrypt
-    password_bytes = password.encode('utf-8')
-    hash_bytes = stored_hash.encode('utf-8')
-
-    # Verify password
-    if bcrypt.checkpw(password_bytes, hash_bytes):
+    # Verify password in the hashing pool
+    try:
+        valid = verify_password(password, stored_hash)
+    except (HashQueueFullError, TimeoutError):
+        return False, BUSY_MESSAGE
+
+    if valid:
+        lockout.clear_failed_attempts(username)
+        # Bring the stored hash up to the current cost factor
+        upgrade_password_hash(username, password, stored_hash)
         return True, f"Welcome, {username}."
     else:
+        lockout.record_failed_attempt(username)
         return False, "Invalid password."
@@ -0,0 +1,59 @@
+"""
+validation.py
+--------------
+Username and password rules shared by the CLI (auth.py, main.py), the
+registration service and bulk provisioning.
+"""
+
+import re
+
+
+def validate_username(username):
+    if len(username) < 3:
+        return False, "Username must be at least 3 characters long."
+
+    for char in username:
+        if not (char.isalnum() or char == "_"):
+            return False, "Username can only contain letters, numbers, and underscores."
+
+    return True, ""
+
+def validate_password(password):
+    if len(password) < 8:
+        return False, "Password must be at least 8 characters long."
+    if not any(c.isupper() for c in password):
+        return False, "Password must include at least one uppercase letter."
+    if not any(c.islower() for c in password):
+        return False, "Password must include at least one lowercase letter."
+    if not any(c.isdigit() for c in password):
+        return False, "Password must include at least one number."
+    if not any(c in "!@#$%^&*()-_=+[]{};:'\",.<>?/" for c in password):
+        return False, "Password must include at least one special character."
+    
+    return True, ""
+
+def check_password_strength(password):
+
+    length = len(password)
+    has_lower = bool(re.search(r"[a-z]", password))
+    has_upper = bool(re.search(r"[A-Z]", password))
+    has_digit = bool(re.search(r"\d", password))
+    has_special = bool(re.search(r"[!@#$%^&*()\-_=+\[\]{};:'\",.<>/?]", password))
+
+    score = 0
+
+    if length >= 8:
+        score += 1
+    if has_lower and has_upper:
+        score += 1
+    if has_digit:
+        score += 1
+    if has_special:
+        score += 1
+
+    if score <= 1:
+        return "Weak"
+    elif score == 2:
+        return "Medium"
+    else:
+        return "Strong"
@@ -1,4 +1,4 @@
-from app.data.db import connect_database
+from app.data.db import get_connection
 
 
 def check_users():
@@ -6,15 +6,15 @@ def check_users():
     # Connect to the SQLite database and retrieve all users
     # ------------------------------------------------------------
 
-    # Open database connection
-    conn = connect_database()
-    cursor = conn.cursor()
+    # Borrow a pooled database connection
+    with get_connection() as conn:
+        cursor = conn.cursor()
 
-    # Execute query to fetch user ID, username, and role
-    cursor.execute("SELECT id, username, role FROM users")
+        # Execute query to fetch user ID, username, and role
+        cursor.execute("SELECT id, username, role FROM users")
 
-    # Retrieve all matching rows
-    users = cursor.fetchall()
+        # Retrieve all matching rows
+        users = cursor.fetchall()
 
     # Display header
     print(" Users in database:")
@@ -28,9 +28,6 @@ def check_users():
     # Print total user count
     print(f"\nTotal users: {len(users)}")
 
-    # Close database connection
-    conn.close()
-
 
 # ------------------------------------------------------------
 # Run this script directly to list all users in the database
@@ -30,7 +30,24 @@ import pandas as pd
 # -----------------------------
 # Internal project imports
 # -----------------------------
-from app.data.db import connect_database
+from app.data.db import get_connection, pool_stats
+from app.services.sessions import revoke_session, validate_session
+from app.data.cache import cache_stats
+from app.data.dashboard import (
+    INCIDENT_COLUMNS,
+    DATASET_COLUMNS,
+    TICKET_COLUMNS,
+    count_by,
+    count_rows,
+    get_datasets_by_source,
+    get_distinct_values,
+    get_recent_rows,
+    get_top_datasets_by_records,
+    get_total_dataset_records,
+)
+from app.data.incidents import estimate_incident_count, get_incidents_page
+from app.data.tickets import estimate_ticket_count, get_tickets_page
+from app.data.pagination import estimate_row_count, fetch_page
 
 
 # ============================================================
@@ -41,6 +58,10 @@ def require_login():
     """
     Guard function to prevent unauthorized access.
 
+    The session token issued at login is validated on every rerun
+    (an LRU hit or one primary-key lookup); an unknown or expired
+    token logs the user out.
+
     If the user is not logged in, this function:
     - Displays an error message
     - Provides a button to return to the login page
@@ -51,6 +72,14 @@ def require_login():
     if "username" not in st.session_state:
         st.session_state.username = ""
 
+    if st.session_state.logged_in:
+        token = st.session_state.get("session_token")
+        if validate_session(token) != st.session_state.username:
+            st.session_state.logged_in = False
+            st.session_state.username = ""
+            st.session_state.session_token = None
+            st.warning("Your session has expired. Please log in again.")
+
     if not st.session_state.logged_in:
         st.error("You must be logged in to view the dashboard.")
         if st.button("Go to login page"):
@@ -58,62 +87,38 @@ def require_login():
         st.stop()
 
 
-def load_tables():
+def render_paged_table(key, load_page, total_estimate, page_size):
     """
-    Load all three domain tables from the SQLite database.
+    Show one table page by page (keyset pagination, newest first).
 
-    Returns:
-        tuple: (cybersecurity incidents, datasets metadata, IT tickets)
-               as pandas DataFrames
-    """
-    conn = connect_database()
-
-    # Cybersecurity incidents table
-    incidents_df = pd.read_sql_query(
-        """
-        SELECT id, date, incident_type, severity, status, description
-        FROM cyber_incidents
-        ORDER BY id DESC
-        """,
-        conn,
-    )
+    The cursors of the pages visited so far are kept in session state,
+    so "Previous" goes back without re-counting or re-reading anything.
 
-    # Data science datasets metadata table
-    datasets_df = pd.read_sql_query(
-        """
-        SELECT id, dataset_name, category, source, last_updated,
-               record_count, file_size_mb
-        FROM datasets_metadata
-        ORDER BY id DESC
-        """,
-        conn,
-    )
-
-    # IT operations tickets table
-    tickets_df = pd.read_sql_query(
-        """
-        SELECT id, priority, status, category, subject, description,
-               created_date, resolved_date, assigned_to
-        FROM it_tickets
-        ORDER BY id DESC
-        """,
-        conn,
-    )
-
-    conn.close()
-    return incidents_df, datasets_df, tickets_df
+    Args:
+        key (str): Unique widget/session-state key for this table
+        load_page (callable): load_page(cursor, page_size) -> (DataFrame, next cursor)
+        total_estimate (int): Approximate row count shown to the user
+        page_size (int): Rows per page
+    """
+    state_key = f"{key}_cursors"
+    if state_key not in st.session_state:
+        st.session_state[state_key] = [None]     # cursor of page 1
 
+    cursors = st.session_state[state_key]
+    page, next_cursor = load_page(cursors[-1], page_size)
 
-def safe_str_series(df, col):
-    """
-    Safely convert a DataFrame column to string type.
+    st.caption(f"Page {len(cursors)} • about {total_estimate:,} rows in total")
+    st.dataframe(page, use_container_width=True)
 
-    This avoids issues caused by NULL values or mixed data types
-    when applying filters in Streamlit widgets.
-    """
-    if col not in df.columns:
-        return pd.Series([], dtype="string")
-    return df[col].astype("string").fillna("")
+    prev_col, next_col = st.columns(2)
+    with prev_col:
+        if st.button("◀ Previous", key=f"{key}_prev", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with next_col:
+        if st.button("Next ▶", key=f"{key}_next", disabled=next_cursor is None):
+            cursors.append(next_cursor)
+            st.rerun()
 
 
 # ============================================================
@@ -129,9 +134,6 @@ st.set_page_config(
 # Enforce login before showing any data
 require_login()
 
-# Load all domain data
-incidents_df, datasets_df, tickets_df = load_tables()
-
 # Page title and user context
 st.title("Multi-Domain Intelligence Platform Dashboard")
 st.caption(f"Logged in as: {st.session_state.username}")
@@ -169,12 +171,12 @@ with st.sidebar:
     # -----------------------------
     st.subheader("Cybersecurity")
 
-    incident_severities = sorted(
-        safe_str_series(incidents_df, "severity").dropna().unique().tolist()
-    )
-    incident_statuses = sorted(
-        safe_str_series(incidents_df, "status").dropna().unique().tolist()
-    )
+    # Filter options come from SELECT DISTINCT (index-backed)
+    with get_connection() as conn:
+        incident_severities = get_distinct_values(conn, "cyber_incidents", "severity")
+        incident_statuses = get_distinct_values(conn, "cyber_incidents", "status")
+        ticket_priorities = get_distinct_values(conn, "it_tickets", "priority")
+        ticket_statuses = get_distinct_values(conn, "it_tickets", "status")
 
     selected_severity = st.multiselect(
         "Severity",
@@ -193,13 +195,6 @@ with st.sidebar:
     # -----------------------------
     st.subheader("IT Operations")
 
-    ticket_priorities = sorted(
-        safe_str_series(tickets_df, "priority").dropna().unique().tolist()
-    )
-    ticket_statuses = sorted(
-        safe_str_series(tickets_df, "status").dropna().unique().tolist()
-    )
-
     selected_ticket_priority = st.multiselect(
         "Ticket priority",
         options=ticket_priorities,
@@ -217,26 +212,51 @@ with st.sidebar:
 
     st.divider()
     if st.button("Log out", use_container_width=True):
+        if st.session_state.get("session_token"):
+            revoke_session(st.session_state.session_token)
+        st.session_state.session_token = None
         st.session_state.logged_in = False
         st.session_state.username = ""
         st.switch_page("Home.py")
 
 
 # ============================================================
-# Apply Filters
+# Apply Filters (pushed down into SQL)
 # ============================================================
 
-# Filter cybersecurity incidents
-filtered_incidents = incidents_df[
-    incidents_df["severity"].astype("string").isin(selected_severity)
-    & incidents_df["status"].astype("string").isin(selected_inc_status)
-].copy()
+# Filter state for each domain: {column: selected values}
+incident_filters = {
+    "severity": selected_severity,
+    "status": selected_inc_status,
+}
+ticket_filters = {
+    "priority": selected_ticket_priority,
+    "status": selected_ticket_status,
+}
+
+# Run every dashboard query on one pooled connection.
+# Only counts, GROUP BY aggregates and the 50 displayed rows come back;
+# severity/status/priority counts are read from the rollup tables.
+with get_connection() as conn:
+    incident_total = count_rows(conn, "cyber_incidents")
+    incident_filtered = count_rows(conn, "cyber_incidents", incident_filters)
+    sev_counts = count_by(conn, "cyber_incidents", "severity", incident_filters)
+    status_counts = count_by(conn, "cyber_incidents", "status", incident_filters)
+    recent_incidents = get_recent_rows(
+        conn, "cyber_incidents", INCIDENT_COLUMNS, incident_filters
+    )
+
+    dataset_total = count_rows(conn, "datasets_metadata")
+    total_records = get_total_dataset_records(conn)
+    top_records = get_top_datasets_by_records(conn)
+    source_counts = get_datasets_by_source(conn)
+    dataset_catalog = get_recent_rows(conn, "datasets_metadata", DATASET_COLUMNS)
 
-# Filter IT tickets
-filtered_tickets = tickets_df[
-    tickets_df["priority"].astype("string").isin(selected_ticket_priority)
-    & tickets_df["status"].astype("string").isin(selected_ticket_status)
-].copy()
+    ticket_total = count_rows(conn, "it_tickets")
+    ticket_filtered = count_rows(conn, "it_tickets", ticket_filters)
+    priority_counts = count_by(conn, "it_tickets", "priority", ticket_filters)
+    ticket_status_counts = count_by(conn, "it_tickets", "status", ticket_filters)
+    recent_tickets = get_recent_rows(conn, "it_tickets", TICKET_COLUMNS, ticket_filters)
 
 
 # ============================================================
@@ -246,23 +266,17 @@ filtered_tickets = tickets_df[
 k1, k2, k3, k4, k5, k6 = st.columns(6)
 
 with k1:
-    st.metric("Incidents", len(incidents_df))
+    st.metric("Incidents", incident_total)
 with k2:
-    st.metric("Incidents (filtered)", len(filtered_incidents))
+    st.metric("Incidents (filtered)", incident_filtered)
 with k3:
-    st.metric("Datasets", len(datasets_df))
+    st.metric("Datasets", dataset_total)
 with k4:
-    total_records = (
-        pd.to_numeric(datasets_df.get("record_count", pd.Series([])),
-                      errors="coerce")
-        .fillna(0)
-        .sum()
-    )
-    st.metric("Total records", int(total_records))
+    st.metric("Total records", total_records)
 with k5:
-    st.metric("Tickets", len(tickets_df))
+    st.metric("Tickets", ticket_total)
 with k6:
-    st.metric("Tickets (filtered)", len(filtered_tickets))
+    st.metric("Tickets (filtered)", ticket_filtered)
 
 st.divider()
 
@@ -278,12 +292,6 @@ c1, c2 = st.columns(2)
 
 with c1:
     st.subheader("Incidents by severity")
-    sev_counts = (
-        filtered_incidents["severity"].astype("string")
-        .value_counts()
-        .rename_axis("severity")
-        .reset_index(name="count")
-    )
     if sev_counts.empty:
         st.info("No incidents match the current filters.")
     else:
@@ -291,19 +299,13 @@ with c1:
 
 with c2:
     st.subheader("Incidents by status")
-    status_counts = (
-        filtered_incidents["status"].astype("string")
-        .value_counts()
-        .rename_axis("status")
-        .reset_index(name="count")
-    )
     if status_counts.empty:
         st.info("No incidents match the current filters.")
     else:
         st.bar_chart(status_counts.set_index("status"))
 
 st.subheader("Recent incidents")
-st.dataframe(filtered_incidents.head(50), use_container_width=True)
+st.dataframe(recent_incidents, use_container_width=True)
 
 
 # ============================================================
@@ -318,10 +320,6 @@ d1, d2 = st.columns(2)
 
 with d1:
     st.subheader("Top datasets by record count")
-    ds = datasets_df.copy()
-    ds["record_count"] = pd.to_numeric(ds["record_count"], errors="coerce").fillna(0)
-    top_records = ds.sort_values("record_count", ascending=False).head(10)
-
     if top_records.empty:
         st.info("No dataset metadata available.")
     else:
@@ -331,21 +329,13 @@ with d1:
 
 with d2:
     st.subheader("Datasets by source")
-    source_counts = (
-        datasets_df["source"].astype("string")
-        .fillna("Unknown")
-        .value_counts()
-        .rename_axis("source")
-        .reset_index(name="count")
-    )
-
     if source_counts.empty:
         st.info("No dataset sources found.")
     else:
         st.bar_chart(source_counts.set_index("source"))
 
 st.subheader("Dataset catalog")
-st.dataframe(datasets_df.head(50), use_container_width=True)
+st.dataframe(dataset_catalog, use_container_width=True)
 
 
 # ============================================================
@@ -360,12 +350,6 @@ t1, t2 = st.columns(2)
 
 with t1:
     st.subheader("Tickets by priority")
-    priority_counts = (
-        filtered_tickets["priority"].astype("string")
-        .value_counts()
-        .rename_axis("priority")
-        .reset_index(name="count")
-    )
     if priority_counts.empty:
         st.info("No tickets match the current filters.")
     else:
@@ -373,19 +357,13 @@ with t1:
 
 with t2:
     st.subheader("Tickets by status")
-    ticket_status_counts = (
-        filtered_tickets["status"].astype("string")
-        .value_counts()
-        .rename_axis("status")
-        .reset_index(name="count")
-    )
     if ticket_status_counts.empty:
         st.info("No tickets match the current filters.")
     else:
         st.bar_chart(ticket_status_counts.set_index("status"))
 
 st.subheader("Recent tickets")
-st.dataframe(filtered_tickets.head(50), use_container_width=True)
+st.dataframe(recent_tickets, use_container_width=True)
 
 
 # ============================================================
@@ -396,11 +374,64 @@ if show_raw:
     st.divider()
     st.subheader("Raw database tables")
 
+    # Server-side paging: each rerun reads one page, not the whole table
+    page_size = st.selectbox("Rows per page", [10, 50, 100, 500], index=1)
+
+    # A new page size starts every table again from page 1
+    if st.session_state.get("raw_page_size") != page_size:
+        st.session_state.raw_page_size = page_size
+        for name in ("raw_incidents", "raw_datasets", "raw_tickets"):
+            st.session_state.pop(f"{name}_cursors", None)
+
+    with get_connection() as conn:
+        incident_estimate = estimate_incident_count(conn)
+        dataset_estimate = estimate_row_count(conn, "datasets_metadata")
+
+    def load_incidents(cursor, size):
+        with get_connection() as conn:
+            return get_incidents_page(conn, cursor, size)
+
+    def load_datasets(cursor, size):
+        with get_connection() as conn:
+            return fetch_page(conn, "datasets_metadata", DATASET_COLUMNS, cursor, size)
+
     with st.expander("cyber_incidents"):
-        st.dataframe(incidents_df, use_container_width=True)
+        render_paged_table("raw_incidents", load_incidents, incident_estimate, page_size)
 
     with st.expander("datasets_metadata"):
-        st.dataframe(datasets_df, use_container_width=True)
+        render_paged_table("raw_datasets", load_datasets, dataset_estimate, page_size)
 
     with st.expander("it_tickets"):
-        st.dataframe(tickets_df, use_container_width=True)
+        render_paged_table(
+            "raw_tickets", get_tickets_page, estimate_ticket_count(), page_size
+        )
+
+
+# ============================================================
+# Query Cache and Connection Pool Metrics
+# ============================================================
+
+# Shown last so the numbers include this rerun's queries
+with st.sidebar:
+    st.divider()
+    st.subheader("Query cache")
+    stats = cache_stats()
+    m1, m2 = st.columns(2)
+    m1.metric("Hits", stats["hits"])
+    m2.metric("Misses", stats["misses"])
+    st.caption(
+        f"Hit rate {stats['hit_rate']:.0%} • {stats['entries']} entries • "
+        f"{stats['bytes'] / 1024:.0f} KB • {stats['evictions']} evictions"
+    )
+
+    st.subheader("Connection pool")
+    pool = pool_stats()
+    p1, p2 = st.columns(2)
+    p1.metric("In use", f"{pool['in_use']}/{pool['size']}")
+    p2.metric("Waits", pool["waits"])
+    st.caption(
+        f"Peak {pool['peak_in_use']} • {pool['open']} open • "
+        f"{pool['checkouts']} checkouts • {pool['replaced']} replaced"
+    )
+    if not pool["profile_ok"]:
+        st.warning(f"PRAGMA profile '{pool['profile']}' is not fully applied.")
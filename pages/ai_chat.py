@@ -10,7 +10,24 @@ if str(ROOT_DIR) not in sys.path:
     sys.path.append(str(ROOT_DIR))
 
 import streamlit as st
-from openai import OpenAI
+
+from app.data.chat_history import (
+    DEFAULT_HISTORY_PAGE,
+    append_message,
+    create_conversation,
+    get_latest_conversation,
+    get_messages_before,
+    get_recent_messages,
+    has_messages_before,
+)
+from app.data.db import get_connection
+from app.services.chat_cache import chat_cache_stats, stream_completion
+from app.services.chat_context import DEFAULT_BUDGET, ConversationWindow
+from app.services.llm_backends import LLMError, backend_from_settings
+from app.services.llm_scheduler import get_scheduler
+from app.services.retrieval import MODE_SOURCES, retrieve_context
+from app.services.sessions import revoke_session, validate_session
+from app.services.stream_renderer import StreamRenderer
 
 
 # -------------------------------------------------
@@ -32,6 +49,13 @@ if "logged_in" not in st.session_state:
 if "username" not in st.session_state:
     st.session_state.username = ""
 
+# The session token from login must still be valid (not expired/revoked)
+if st.session_state.logged_in:
+    if validate_session(st.session_state.get("session_token")) != st.session_state.username:
+        st.session_state.logged_in = False
+        st.session_state.username = ""
+        st.session_state.session_token = None
+
 # Block access if user is not authenticated
 if not st.session_state.logged_in:
     st.error("You must be logged in to use the AI Chat.")
@@ -41,12 +65,14 @@ if not st.session_state.logged_in:
 
 
 # -------------------------------------------------
-# OpenAI client setup
-# API key is securely loaded from Streamlit secrets
+# LLM backend setup
+# Settings are securely loaded from Streamlit secrets
 # -------------------------------------------------
 # secrets.toml example:
 # OPENAI_API_KEY = "your_api_key_here"
-client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
+# LLM_BASE_URL = "http://127.0.0.1:8765/v1"   # optional: any OpenAI-compatible
+#                                              # server, e.g. fake_llm_server
+llm_backend = backend_from_settings(st.secrets)
 
 
 # -------------------------------------------------
@@ -75,13 +101,49 @@ with st.sidebar:
         0.0, 2.0, 0.7, 0.1
     )
 
+    # Add matching incidents/tickets from the database to the prompt
+    use_records = st.checkbox(
+        "Ground answers in platform records",
+        value=True,
+        disabled=mode not in MODE_SOURCES,
+    )
+
+    # Prompt size limit; older turns are summarized to stay within it
+    context_budget = st.number_input(
+        "Context budget (tokens)",
+        min_value=1000, max_value=100000, value=DEFAULT_BUDGET, step=500,
+    )
+
     st.divider()
 
-    # Clear chat history button
+    # Start a new conversation (earlier ones stay in the database)
     if st.button("🗑 Clear chat", use_container_width=True):
+        st.session_state.conversation_id = None
         st.session_state.chat_messages = []
+        st.session_state.chat_older = []
+        st.session_state.chat_window = ConversationWindow()
         st.rerun()
 
+    # Answers at temperature 0 are cached and shared between analysts
+    st.divider()
+    st.subheader("Response cache")
+    response_stats = chat_cache_stats()
+    st.caption(
+        f"{response_stats['entries']} answers stored • "
+        f"hit rate {response_stats['hit_rate']:.0%} • "
+        f"{response_stats['in_flight']} in flight"
+    )
+    if temperature > 0:
+        st.caption("Set temperature to 0 to use cached answers.")
+
+    # Shared outbound queue (all sessions of this server)
+    scheduler_stats = get_scheduler().stats()
+    st.caption(
+        f"AI queue: {scheduler_stats['queue_depth']} waiting • "
+        f"{scheduler_stats['active']}/{scheduler_stats['max_concurrency']} active • "
+        f"wait p95 {scheduler_stats['wait_p95_ms']:.0f} ms"
+    )
+
 
 # -------------------------------------------------
 # System prompts per assistant mode
@@ -116,21 +178,70 @@ st.caption(
 
 # -------------------------------------------------
 # Chat session state
-# Stores conversation history for the current session
+# The conversation is stored in the database (chat_history); the session
+# only holds the turns of this visit plus any earlier pages the user
+# asked to see, so reruns do not get slower as a conversation grows.
 # -------------------------------------------------
-if "chat_messages" not in st.session_state:
-    st.session_state.chat_messages = []
+# Messages rendered on every rerun (older ones via "Load earlier")
+RECENT_WINDOW = 20
+
+# Stored messages before the recent window read on resume to rebuild the
+# rolling summary (its token cap keeps only the newest lines anyway)
+SUMMARY_SEED_MESSAGES = 100
+
+if st.session_state.get("chat_owner") != st.session_state.username:
+    # First visit, or another user logged in: resume their latest conversation
+    try:
+        conversation_id = get_latest_conversation(st.session_state.username)
+    except RuntimeError as e:
+        # Database not migrated yet (see app/data/migrations.py)
+        st.error(str(e))
+        st.stop()
+    st.session_state.chat_owner = st.session_state.username
+    st.session_state.conversation_id = conversation_id
+    st.session_state.chat_messages = (
+        get_recent_messages(conversation_id, RECENT_WINDOW) if conversation_id else []
+    )
+    st.session_state.chat_older = []
+
+    # Turns before the recent window go straight into the summary
+    st.session_state.chat_window = ConversationWindow()
+    resumed = st.session_state.chat_messages
+    if resumed:
+        st.session_state.chat_window.seed_summary(
+            get_messages_before(conversation_id, resumed[0]["id"], SUMMARY_SEED_MESSAGES)
+        )
 
-# Build message list sent to OpenAI
-# System prompt is always the first message
-api_messages = [{"role": "system", "content": SYSTEM_PROMPTS[mode]}]
-api_messages += st.session_state.chat_messages
+# Token-budgeted window over the history (system prompt, rolling
+# summary of older turns, newest turns verbatim)
+if "chat_window" not in st.session_state:
+    st.session_state.chat_window = ConversationWindow()
+
+chat_window = st.session_state.chat_window
+chat_window.budget = int(context_budget)
+chat_window.model = model
 
 
 # -------------------------------------------------
 # Display previous chat messages
+# Only the recent window, plus earlier pages loaded on request
 # -------------------------------------------------
-for msg in st.session_state.chat_messages:
+conversation_id = st.session_state.conversation_id
+visible_messages = (
+    st.session_state.chat_older + st.session_state.chat_messages[-RECENT_WINDOW:]
+)
+
+if conversation_id and visible_messages and has_messages_before(
+    conversation_id, visible_messages[0]["id"]
+):
+    if st.button("⬆ Load earlier messages"):
+        earlier = get_messages_before(
+            conversation_id, visible_messages[0]["id"], DEFAULT_HISTORY_PAGE
+        )
+        st.session_state.chat_older = earlier + st.session_state.chat_older
+        st.rerun()
+
+for msg in visible_messages:
     with st.chat_message(msg["role"]):
         st.markdown(msg["content"])
 
@@ -141,9 +252,18 @@ for msg in st.session_state.chat_messages:
 prompt = st.chat_input("Type a message...")
 
 if prompt:
+    # New conversations are created with their first message
+    if conversation_id is None:
+        conversation_id = create_conversation(st.session_state.username, mode)
+        st.session_state.conversation_id = conversation_id
+
+    # A new turn collapses the view back to the recent window
+    st.session_state.chat_older = []
+
     # Store and display user message immediately
+    message_id = append_message(conversation_id, "user", prompt)
     st.session_state.chat_messages.append(
-        {"role": "user", "content": prompt}
+        {"id": message_id, "role": "user", "content": prompt}
     )
     with st.chat_message("user"):
         st.markdown(prompt)
@@ -152,36 +272,82 @@ if prompt:
     with st.chat_message("assistant"):
         placeholder = st.empty()
         full_reply = ""
+        failed = False
+
+        # Relevant records (local BM25 index) go into the system prompt
+        system_prompt = SYSTEM_PROMPTS[mode]
+        record_hits = []
+        if use_records and mode in MODE_SOURCES:
+            with get_connection() as conn:
+                records_block, record_hits = retrieve_context(conn, mode, prompt, model=model)
+            if records_block:
+                system_prompt = f"{system_prompt}\n\n{records_block}"
+
+        # System prompt first, then the summary and recent turns in budget
+        request_messages = chat_window.build(
+            system_prompt, st.session_state.chat_messages
+        )
+        context_stats = chat_window.last_stats
+
+        def live_deltas():
+            # Live backend stream, queued fairly per user behind the shared
+            # concurrency cap / rate limit and retried on 429/5xx.
+            # This is the page's only path to llm_backend, for every mode
+            # and temperature: stream_completion calls it directly when
+            # temperature > 0, on a cache miss, or when a coalesced
+            # request has to take over from a cancelled one.
+            return get_scheduler().stream(
+                st.session_state.username, llm_backend,
+                request_messages, model, temperature,
+            )
 
         try:
-            stream = client.chat.completions.create(
-                model=model,
-                messages=api_messages + [
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=temperature,
-                stream=True,
+            # Cached answers and coalesced duplicates arrive as a stream too
+            deltas, source = stream_completion(
+                system_prompt,
+                request_messages[1:],
+                model,
+                temperature,
+                live_deltas,
             )
 
-            # Stream response chunk-by-chunk
-            for chunk in stream:
-                delta = chunk.choices[0].delta
-                if delta and delta.content:
-                    full_reply += delta.content
-                    placeholder.markdown(full_reply + "▌")
+            # Stream response, re-rendering at most ~20 times per second;
+            # the final text is rendered without the cursor
+            renderer = StreamRenderer(placeholder)
+            full_reply = renderer.consume(deltas)
+            if source == "cache":
+                st.caption("⚡ Answer served from the response cache")
+
+            # Per-request prompt size (estimated unless tiktoken is installed)
+            approx = "" if context_stats["exact"] else "~"
+            st.caption(
+                f"Prompt: {approx}{context_stats['prompt_tokens']} tokens • "
+                f"{context_stats['recent_turns']} recent messages • "
+                f"{context_stats['summarized_turns']} earlier messages summarized"
+                + (f" • {len(record_hits)} records attached" if record_hits else "")
+            )
 
-            # Final response without cursor
-            placeholder.markdown(full_reply)
+        except LLMError as e:
+            # Still failing after retries, or the queue is full
+            failed = True
+            if e.status == 429 or e.status == 503:
+                placeholder.warning("⚠️ The AI service is busy right now. Please try again in a moment.")
+            else:
+                placeholder.error(f"⚠️ Error: {e}")
 
         except Exception as e:
             # Graceful error handling
-            full_reply = f"⚠️ Error: {e}"
-            placeholder.markdown(full_reply)
+            failed = True
+            placeholder.error(f"⚠️ Error: {e}")
 
-    # Save assistant reply to session history
-    st.session_state.chat_messages.append(
-        {"role": "assistant", "content": full_reply}
-    )
+    # Save the assistant reply to the stored and session history. Errors
+    # are shown only: stored, they would be replayed on resume and sent
+    # back to the model as if it had said them.
+    if not failed:
+        message_id = append_message(conversation_id, "assistant", full_reply)
+        st.session_state.chat_messages.append(
+            {"id": message_id, "role": "assistant", "content": full_reply}
+        )
 
 
 # -------------------------------------------------
@@ -196,6 +362,9 @@ with col1:
 
 with col2:
     if st.button("🚪 Log out"):
+        if st.session_state.get("session_token"):
+            revoke_session(st.session_state.session_token)
+        st.session_state.session_token = None
         st.session_state.logged_in = False
         st.session_state.username = ""
         st.switch_page("Home.py")
@@ -0,0 +1,48 @@
+"""
+Shared pytest fixtures.
+
+Every test that touches the database gets its own SQLite file under
+pytest's tmp_path; the shared connection pool in app.data.db is pointed
+at it, so the committed DATA/intelligence_platform.db is never opened.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.data import db
+from app.data.migrations import apply_migrations
+from app.data.schema import create_all_tables
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "test.db"
+
+
+@pytest.fixture
+def pool(db_path, monkeypatch):
+    """
+    Shared pool (get_connection) redirected to a fresh database file.
+    """
+    test_pool = db.ConnectionPool(db_path, size=4, timeout=2.0)
+    monkeypatch.setattr(db, "_pool", test_pool)
+    yield test_pool
+    test_pool.close_all()
+
+
+@pytest.fixture
+def conn(db_path, pool):
+    """
+    Direct connection to a database with all tables and migrations.
+    """
+    connection = db.connect_database(db_path)
+    create_all_tables(connection)
+    apply_migrations(connection)
+    yield connection
+    connection.close()
@@ -0,0 +1,121 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from app.data import cache
+from app.data.cache import QueryCache, cached_query, mark_tables_changed
+from app.data.db import connect_database
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    cache.query_cache.clear()
+    yield
+    cache.query_cache.clear()
+
+
+def _counting_loader(calls):
+    def loader(conn, sql, params):
+        calls.append(sql)
+        return conn.execute(sql, params).fetchone()[0]
+    return loader
+
+
+def _insert_incident(conn, incident_id):
+    conn.execute(
+        "INSERT INTO cyber_incidents (incident_id, date, incident_type, severity, status) "
+        "VALUES (?, '2024-01-01', 'Phishing', 'Low', 'Open')",
+        (incident_id,),
+    )
+    conn.commit()
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    qc = QueryCache(max_entries=2, ttl=10)
+
+    qc.put("a", 1)
+    qc.put("b", 2)
+    assert qc.get("a") == (True, 1)        # "a" is now most recently used
+    qc.put("c", 3)                         # evicts "b"
+
+    assert qc.get("b") == (False, None)
+    assert qc.stats()["evictions"] == 1
+
+    now[0] += 11
+    assert qc.get("a") == (False, None)
+    assert qc.stats()["entries"] == 1
+
+
+def test_memory_cap_evicts_and_skips_oversized_values():
+    frame = pd.DataFrame({"x": range(1000)})
+    size = cache.estimate_size(frame)
+    qc = QueryCache(max_bytes=size * 2 + size // 2)
+
+    qc.put("one", frame)
+    qc.put("two", frame.copy())
+    qc.put("three", frame.copy())
+    assert qc.stats()["entries"] == 2
+    assert qc.stats()["bytes"] <= qc.max_bytes
+
+    qc.put("huge", pd.DataFrame({"x": range(10_000)}))
+    assert qc.get("huge") == (False, None)
+
+
+def test_local_write_invalidates_only_its_table(conn, db_path):
+    calls = []
+    loader = _counting_loader(calls)
+    incidents_sql = "SELECT COUNT(*) FROM cyber_incidents"
+    tickets_sql = "SELECT COUNT(*) FROM it_tickets"
+
+    cached_query(conn, incidents_sql, tables=("cyber_incidents",), loader=loader)
+    cached_query(conn, tickets_sql, tables=("it_tickets",), loader=loader)
+
+    # Written through a different connection, as the pool would
+    writer = connect_database(db_path)
+    _insert_incident(writer, "1")
+    mark_tables_changed("cyber_incidents")
+    writer.close()
+
+    assert cached_query(conn, incidents_sql, tables=("cyber_incidents",),
+                        loader=loader) == 1
+    cached_query(conn, tickets_sql, tables=("it_tickets",), loader=loader)
+
+    assert calls == [incidents_sql, tickets_sql, incidents_sql]
+
+
+def test_external_write_is_detected_without_marks(conn, db_path):
+    calls = []
+    loader = _counting_loader(calls)
+    sql = "SELECT COUNT(*) FROM cyber_incidents"
+
+    assert cached_query(conn, sql, tables=("cyber_incidents",), loader=loader) == 0
+
+    # Another process: no mark_tables_changed() call
+    other = sqlite3.connect(str(db_path))
+    _insert_incident(other, "7")
+    other.close()
+
+    assert cached_query(conn, sql, tables=("cyber_incidents",), loader=loader) == 1
+    assert cached_query(conn, sql, tables=("cyber_incidents",), loader=loader) == 1
+    assert len(calls) == 2
+
+
+def test_new_connection_reuses_cached_results(conn, db_path):
+    calls = []
+    loader = _counting_loader(calls)
+    sql = "SELECT COUNT(*) FROM it_tickets"
+
+    first = connect_database(db_path)
+    cached_query(first, sql, tables=("it_tickets",), loader=loader)
+    first.close()
+
+    # A fresh connection (possibly with a recycled id) is not a reason to
+    # throw the cache away
+    second = connect_database(db_path)
+    cached_query(second, sql, tables=("it_tickets",), loader=loader)
+    second.close()
+
+    assert len(calls) == 1
@@ -0,0 +1,135 @@
+import pytest
+
+from app.services import chat_cache
+from app.services.chat_cache import ResponseCache, stream_completion
+
+
+@pytest.fixture
+def response_cache(tmp_path, monkeypatch):
+    cache = ResponseCache(tmp_path / "chat_cache.db", max_bytes=100)
+    monkeypatch.setattr(chat_cache, "_cache", cache)
+    monkeypatch.setattr(chat_cache, "_in_flight", {})
+    return cache
+
+
+def _source(deltas, calls, name, fail_after=None):
+    def create_stream():
+        calls.append(name)
+
+        def stream():
+            for i, delta in enumerate(deltas):
+                if fail_after is not None and i == fail_after:
+                    raise RuntimeError("upstream error")
+                yield delta
+        return stream()
+    return create_stream
+
+
+def _ask(create_stream, temperature=0):
+    return stream_completion("system", [{"role": "user", "content": "hi"}],
+                             "model", temperature, create_stream)
+
+
+def test_running_size_total_matches_the_table(response_cache, tmp_path, monkeypatch):
+    monkeypatch.setattr(chat_cache, "LAST_USED_RESOLUTION", 0)  # every hit counts
+    response_cache.put("a", "x" * 40)
+    response_cache.put("b", "y" * 40)
+    response_cache.put("a", "z" * 10)       # replaces, does not add
+    response_cache.get("b")
+    response_cache.put("c", "w" * 60)       # over the cap: "a" is evicted
+
+    stats = response_cache.stats()
+    assert (stats["entries"], stats["bytes"]) == (2, 100)
+    assert response_cache.get("a") is None
+
+    reopened = ResponseCache(tmp_path / "chat_cache.db", max_bytes=100)
+    assert reopened.stats()["bytes"] == 100
+
+
+def test_identical_requests_share_one_api_call(response_cache):
+    calls = []
+    leader, source = _ask(_source(["Hello ", "world"], calls, "first"))
+    assert source == "api"
+    assert next(leader) == "Hello "
+
+    follower, source = _ask(_source(["Hello ", "world"], calls, "second"))
+    assert source == "coalesced"
+    assert list(leader) == ["world"]
+    assert "".join(follower) == "Hello world"
+
+    replay, source = _ask(_source([], calls, "third"))
+    assert (source, "".join(replay)) == ("cache", "Hello world")
+    assert calls == ["first"]
+
+
+def test_follower_takes_over_a_cancelled_leader(response_cache):
+    calls = []
+    answer = ["Hello ", "big ", "world"]
+    leader, _ = _ask(_source(answer, calls, "leader"))
+    next(leader)
+
+    first, _ = _ask(_source(answer, calls, "first"))
+    second, _ = _ask(_source(answer, calls, "second"))
+    assert next(first) == "Hello "
+    assert next(second) == "Hello "
+
+    leader.close()                          # e.g. a Streamlit rerun
+
+    # One follower restarts the request, the other follows it; neither
+    # repeats the text it already showed
+    assert next(first) == "big "
+    assert next(second) == "big "
+    assert list(first) == ["world"]
+    assert list(second) == ["world"]
+    assert calls == ["leader", "first"]
+    assert chat_cache._in_flight == {}
+
+
+def test_follower_takes_over_a_stalled_leader(response_cache, monkeypatch):
+    monkeypatch.setattr(chat_cache, "FOLLOW_TIMEOUT", 0.05)
+    calls = []
+    answer = ["Hello ", "world"]
+    _ask(_source(answer, calls, "leader"))          # stream never read
+
+    follower, source = _ask(_source(answer, calls, "follower"))
+    assert source == "coalesced"
+    assert "".join(follower) == "Hello world"
+    assert calls == ["leader", "follower"]
+    assert chat_cache._in_flight == {}
+
+    replay, source = _ask(_source([], calls, "later"))
+    assert (source, "".join(replay)) == ("cache", "Hello world")
+
+
+def test_hits_refresh_recency_at_most_once_per_interval(response_cache, monkeypatch):
+    response_cache.put("a", "answer")
+    writes = response_cache._conn.total_changes
+
+    assert response_cache.get("a") == "answer"
+    assert response_cache._conn.total_changes == writes
+
+    monkeypatch.setattr(chat_cache, "LAST_USED_RESOLUTION", 0)
+    response_cache.get("a")
+    assert response_cache._conn.total_changes == writes + 1
+
+
+def test_api_errors_reach_the_followers(response_cache):
+    calls = []
+    leader, _ = _ask(_source(["Hello ", "world"], calls, "leader", fail_after=1))
+    next(leader)
+    follower, _ = _ask(_source(["Hello ", "world"], calls, "follower"))
+
+    with pytest.raises(RuntimeError, match="upstream error"):
+        list(leader)
+    with pytest.raises(RuntimeError, match="upstream error"):
+        list(follower)
+
+    assert calls == ["leader"]
+    assert response_cache.stats()["entries"] == 0
+
+
+def test_sampled_requests_bypass_the_cache(response_cache):
+    calls = []
+    stream, source = _ask(_source(["a"], calls, "x"), temperature=0.7)
+    assert (source, list(stream)) == ("api", ["a"])
+    assert response_cache.stats()["misses"] == 0
@@ -0,0 +1,58 @@
+from app.services.chat_context import ConversationWindow, count_message_tokens, summarize_turn
+
+
+def _turns(count, start=0, words=40):
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant",
+         "content": f"Turn {i} says something. " + "filler " * words}
+        for i in range(start, start + count)
+    ]
+
+
+def test_recent_turns_fit_the_budget_and_the_rest_is_summarized():
+    window = ConversationWindow(budget=600, summary_budget=200)
+    history = _turns(30)
+
+    messages = window.build("You are helpful.", history)
+
+    assert count_message_tokens(messages) <= window.budget
+    assert messages[0]["role"] == "system"
+    assert messages[1]["content"].startswith("Summary of the earlier conversation:")
+    assert messages[-1]["content"] == history[-1]["content"]
+    stats = window.last_stats
+    assert stats["summarized_turns"] + stats["recent_turns"] == len(history)
+
+
+def test_summary_stays_within_its_cap():
+    window = ConversationWindow(budget=400, summary_budget=60)
+    window.build("sys", _turns(50))
+
+    summary = window._summary_message()
+    assert count_message_tokens([summary]) <= 60
+    # Oldest lines go first
+    assert "Turn 0 " not in summary["content"]
+
+
+def test_seeded_summary_keeps_context_on_resume():
+    stored = _turns(40)
+    earlier, resumed = stored[:20], stored[20:]
+
+    window = ConversationWindow(budget=4000, summary_budget=500)
+    window.seed_summary(earlier)
+    messages = window.build("sys", resumed)
+
+    summary = messages[1]["content"]
+    assert summarize_turn(earlier[-1]) in summary
+    assert [m["content"] for m in messages[2:]] == [m["content"] for m in resumed]
+    # The seeded turns count as summarized (shown in the page caption)
+    assert window.last_stats["summarized_turns"] == 20
+
+
+def test_new_history_resets_the_summary():
+    window = ConversationWindow(budget=400, summary_budget=100)
+    window.build("sys", _turns(30))
+
+    messages = window.build("sys", _turns(1))
+
+    assert len(messages) == 2
+    assert window.summary_lines == []
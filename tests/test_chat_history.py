@@ -0,0 +1,69 @@
+import sqlite3
+
+import pytest
+
+from app.data import chat_history
+from app.data.db import connect_database
+from app.data.migrations import MIGRATIONS, apply_migrations, schema_version
+from app.data.schema import create_all_tables
+
+
+def test_migrations_record_the_schema_version(conn):
+    latest = max(version for version, _, _ in MIGRATIONS)
+    assert schema_version(conn) == latest
+
+    # Databases migrated before user_version was kept are caught up
+    conn.execute("PRAGMA user_version = 0")
+    assert apply_migrations(conn) == []
+    assert schema_version(conn) == latest
+
+
+def test_unmigrated_database_fails_with_a_clear_error(db_path, pool):
+    bare = connect_database(db_path)
+    create_all_tables(bare)
+    bare.close()
+
+    with pytest.raises(RuntimeError, match="python -m app.data.migrations"):
+        chat_history.create_conversation("alice")
+
+    # Nothing was created behind the caller's back
+    check = connect_database(db_path)
+    assert check.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'chat_messages'"
+    ).fetchone() is None
+    check.close()
+
+
+def test_latest_conversation_and_keyset_pages(conn):
+    older = chat_history.create_conversation("alice", "General")
+    chat_history.append_message(older, "user", "old question")
+    conversation = chat_history.create_conversation("alice", "Cybersecurity")
+    chat_history.create_conversation("bob")
+
+    ids = [chat_history.append_message(conversation, "user" if i % 2 == 0 else "assistant",
+                                       f"message {i}")
+           for i in range(7)]
+
+    assert chat_history.get_latest_conversation("alice") == conversation
+    assert chat_history.get_latest_conversation("nobody") is None
+
+    recent = chat_history.get_recent_messages(conversation, limit=3)
+    assert [m["content"] for m in recent] == ["message 4", "message 5", "message 6"]
+
+    page = chat_history.get_messages_before(conversation, recent[0]["id"], limit=3)
+    assert [m["id"] for m in page] == ids[1:4]
+    assert chat_history.has_messages_before(conversation, page[0]["id"])
+    assert not chat_history.has_messages_before(conversation, ids[0])
+
+    listed = chat_history.list_conversations("alice")
+    assert [c["id"] for c in listed] == [conversation, older]
+
+
+def test_messages_are_append_only(conn):
+    conversation = chat_history.create_conversation("alice")
+    message_id = chat_history.append_message(conversation, "user", "hello")
+
+    with pytest.raises(sqlite3.IntegrityError, match="append-only"):
+        conn.execute("UPDATE chat_messages SET content = 'edited' WHERE id = ?", (message_id,))
+    with pytest.raises(sqlite3.IntegrityError, match="append-only"):
+        conn.execute("DELETE FROM chat_messages WHERE id = ?", (message_id,))
@@ -0,0 +1,133 @@
+import pandas as pd
+import pytest
+
+from app.data import cache
+from app.data.dashboard import (
+    INCIDENT_COLUMNS,
+    build_where,
+    count_by,
+    count_rows,
+    get_datasets_by_source,
+    get_distinct_values,
+    get_recent_rows,
+    get_top_datasets_by_records,
+    get_total_dataset_records,
+)
+from app.data.rollups import find_rollup
+
+
+SEVERITIES = ["Low", "Medium", "High", "Critical"]
+STATUSES = ["Open", "Investigating", "Resolved"]
+TYPES = ["Phishing", "Malware", "DDoS"]
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    cache.query_cache.clear()
+    yield
+    cache.query_cache.clear()
+
+
+@pytest.fixture
+def data(conn):
+    conn.executemany(
+        "INSERT INTO cyber_incidents (date, incident_type, severity, status, description) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [(f"2024-01-{i % 28 + 1:02d}", TYPES[i % 3], SEVERITIES[i % 4],
+          STATUSES[(i // 2) % 3], f"incident {i}") for i in range(60)],
+    )
+    conn.executemany(
+        "INSERT INTO datasets_metadata (dataset_name, source, record_count) VALUES (?, ?, ?)",
+        [(f"set {i}", [None, "api", "upload"][i % 3], None if i == 4 else i * 100)
+         for i in range(12)],
+    )
+    conn.commit()
+    return conn
+
+
+def _incidents_df(conn):
+    # What the page used to load on every rerun
+    return pd.read_sql_query("SELECT * FROM cyber_incidents", conn)
+
+
+def _filtered(df, filters):
+    mask = pd.Series(True, index=df.index)
+    for column, values in filters.items():
+        mask &= df[column].astype("string").isin(values)
+    return df[mask]
+
+
+def _as_dict(frame, column):
+    return dict(zip(frame[column], frame["count"]))
+
+
+def test_build_where():
+    assert build_where(None) == ("", [])
+    assert build_where({"severity": None}) == ("", [])
+    assert build_where({"severity": ["High", "Low"], "status": ["Open"]}) == (
+        " WHERE severity IN (?, ?) AND status IN (?)", ["High", "Low", "Open"],
+    )
+    # Nothing selected matches nothing, like isin([])
+    assert build_where({"severity": []}) == (" WHERE 0", [])
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"severity": ["High", "Critical"], "status": ["Open", "Resolved"]},
+    {"severity": ["Low"], "status": []},
+])
+def test_counts_match_the_pandas_computation(data, filters):
+    df = _filtered(_incidents_df(data), filters)
+
+    assert count_rows(data, "cyber_incidents", filters) == len(df)
+    for column in ("severity", "status", "incident_type"):
+        expected = df[column].value_counts().to_dict()
+        assert _as_dict(count_by(data, "cyber_incidents", column, filters), column) == expected
+
+
+def test_counts_covered_by_a_rollup_are_read_from_it(data):
+    filters = {"severity": ["High"], "status": ["Open", "Resolved"]}
+    assert find_rollup("cyber_incidents", ["severity", "status"]) == \
+        "incident_severity_status_counts"
+    assert find_rollup("cyber_incidents", ["incident_type", "severity"]) is None
+
+    before = _as_dict(count_by(data, "cyber_incidents", "status", filters), "status")
+    by_type = _as_dict(count_by(data, "cyber_incidents", "incident_type", filters),
+                       "incident_type")
+
+    # Skew the rollup only: rollup-backed counts change, base-table ones do not
+    data.execute("UPDATE incident_severity_status_counts SET count = count + 100")
+    data.commit()
+    cache.query_cache.clear()
+
+    after = _as_dict(count_by(data, "cyber_incidents", "status", filters), "status")
+    assert after == {status: count + 100 for status, count in before.items()}
+    assert _as_dict(count_by(data, "cyber_incidents", "incident_type", filters),
+                    "incident_type") == by_type
+
+
+def test_recent_rows_and_distinct_values(data):
+    filters = {"severity": ["High", "Medium"], "status": ["Open"]}
+    df = _filtered(_incidents_df(data), filters)
+
+    recent = get_recent_rows(data, "cyber_incidents", INCIDENT_COLUMNS, filters, limit=5)
+    expected = df.sort_values("id", ascending=False).head(5)[INCIDENT_COLUMNS]
+    pd.testing.assert_frame_equal(recent.reset_index(drop=True),
+                                  expected.reset_index(drop=True))
+
+    assert get_distinct_values(data, "cyber_incidents", "severity") == \
+        sorted(_incidents_df(data)["severity"].dropna().unique())
+
+
+def test_dataset_aggregates_match_the_pandas_computation(data):
+    df = pd.read_sql_query("SELECT * FROM datasets_metadata", data)
+    df["record_count"] = pd.to_numeric(df["record_count"], errors="coerce").fillna(0)
+
+    assert get_total_dataset_records(data) == int(df["record_count"].sum())
+
+    top = get_top_datasets_by_records(data, limit=3)
+    assert top["dataset_name"].tolist() == \
+        df.sort_values("record_count", ascending=False).head(3)["dataset_name"].tolist()
+
+    by_source = _as_dict(get_datasets_by_source(data), "source")
+    assert by_source == df["source"].fillna("Unknown").value_counts().to_dict()
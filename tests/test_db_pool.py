@@ -0,0 +1,157 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from app.data import db
+
+
+class _BrokenConnection:
+    # Stands in for a connection whose rollback fails
+    in_transaction = True
+
+    def rollback(self):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    def close(self):
+        pass
+
+
+def test_connections_are_reused(db_path):
+    pool = db.ConnectionPool(db_path, size=2)
+
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+
+    assert first is second
+    assert pool.stats()["open"] == 1
+    pool.close_all()
+
+
+def test_nested_checkout_uses_one_slot(db_path):
+    pool = db.ConnectionPool(db_path, size=1, timeout=0.2)
+
+    with pool.connection() as outer:
+        with pool.connection() as inner:
+            assert inner is outer
+            assert pool.stats()["in_use"] == 1
+
+    assert pool.stats()["in_use"] == 0
+    pool.close_all()
+
+
+def test_exhausted_pool_times_out(db_path):
+    pool = db.ConnectionPool(db_path, size=1, timeout=0.2)
+    held = threading.Event()
+    done = threading.Event()
+
+    def holder():
+        with pool.connection():
+            held.set()
+            done.wait(5)
+
+    thread = threading.Thread(target=holder)
+    thread.start()
+    held.wait(5)
+
+    with pytest.raises(TimeoutError):
+        with pool.connection():
+            pass
+
+    done.set()
+    thread.join()
+    assert pool.stats()["waits"] == 1
+    pool.close_all()
+
+
+def test_uncommitted_work_is_rolled_back_on_release(db_path):
+    pool = db.ConnectionPool(db_path, size=1)
+
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.commit()
+        conn.execute("INSERT INTO t VALUES (1)")
+
+    with pool.connection() as conn:
+        assert not conn.in_transaction
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+    pool.close_all()
+
+
+def test_failed_rollback_frees_the_slot(db_path):
+    pool = db.ConnectionPool(db_path, size=1, timeout=0.2)
+    with pool._cond:
+        pool._created = 1
+        pool._in_use = 1
+
+    pool._release(_BrokenConnection())
+
+    stats = pool.stats()
+    assert stats["in_use"] == 0
+    assert stats["open"] == 0
+    assert stats["replaced"] == 1
+
+    # The freed slot can be used again instead of timing out
+    with pool.connection() as conn:
+        assert conn.execute("SELECT 1").fetchone() == (1,)
+    pool.close_all()
+
+
+def test_slow_connect_does_not_hold_the_lock(db_path, monkeypatch):
+    pool = db.ConnectionPool(db_path, size=2)
+    real_connect = db.connect_database
+    connecting = threading.Event()
+
+    def slow_connect(*args, **kwargs):
+        connecting.set()
+        time.sleep(0.5)
+        return real_connect(*args, **kwargs)
+
+    monkeypatch.setattr(db, "connect_database", slow_connect)
+
+    def borrow():
+        with pool.connection():
+            pass
+
+    thread = threading.Thread(target=borrow)
+    thread.start()
+    connecting.wait(5)
+
+    started = time.perf_counter()
+    pool.stats()
+    assert time.perf_counter() - started < 0.2
+
+    thread.join()
+    pool.close_all()
+
+
+def test_new_connections_are_checked_against_the_profile(db_path):
+    pool = db.ConnectionPool(db_path, size=1)
+
+    with pool.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    assert pool.stats()["profile_ok"] is True
+    pool.close_all()
+
+
+def test_profile_mismatch_is_reported(db_path, monkeypatch, capsys):
+    # Connections open with SQLite defaults, as if every PRAGMA failed
+    monkeypatch.setattr(db, "apply_pragma_profile", lambda conn, profile: None)
+    pool = db.ConnectionPool(db_path, size=2)
+
+    # Two connections open at once, so two PRAGMA checks fail
+    first = pool._acquire()
+    second = pool._acquire()
+    pool._release(first)
+    pool._release(second)
+
+    assert pool.stats()["open"] == 2
+    assert pool.stats()["profile_ok"] is False
+    output = capsys.readouterr().out
+    assert output.count("PRAGMA profile 'oltp' not applied") == 1
+    assert "journal_mode" in output
+    pool.close_all()
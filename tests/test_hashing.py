@@ -0,0 +1,71 @@
+import time
+
+import bcrypt
+import pytest
+
+from app.services import hashing
+from app.services.hashing import HashingExecutor, HashQueueFullError
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    """
+    Small spawn pool used as the shared executor.
+    """
+    test_executor = HashingExecutor(workers=1, max_pending=2)
+    monkeypatch.setattr(hashing, "_executor", test_executor)
+    yield test_executor
+    test_executor.shutdown()
+
+
+def _settle(executor):
+    # Counters and slots are updated by the futures' done callbacks,
+    # which may run just after result() returns
+    deadline = time.monotonic() + 5
+    while executor.stats()["queue_depth"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_hash_and_verify_round_trip(executor):
+    password_hash = hashing.hash_password("Str0ng!pass", rounds=4)
+
+    assert bcrypt.checkpw(b"Str0ng!pass", password_hash.encode("utf-8"))
+    assert hashing.verify_password("Str0ng!pass", password_hash) is True
+    assert hashing.verify_password("wrong", password_hash) is False
+    _settle(executor)
+    assert executor.stats()["completed"] == 3
+
+
+def test_full_queue_rejects_and_frees_slots(executor):
+    first = executor.submit(time.sleep, 0.5)
+    second = executor.submit(time.sleep, 0)
+
+    with pytest.raises(HashQueueFullError):
+        executor.submit(time.sleep, 0)
+    assert executor.stats()["rejected"] == 1
+    assert executor.stats()["queue_depth"] == 2
+
+    first.result(timeout=30)
+    second.result(timeout=30)
+    _settle(executor)
+    executor.submit(time.sleep, 0).result(timeout=30)
+
+
+def test_slow_result_times_out(executor):
+    executor.submit(time.sleep, 0).result(timeout=30)     # start the worker
+
+    password_hash = bcrypt.hashpw(b"Str0ng!pass", bcrypt.gensalt(12)).decode("utf-8")
+    with pytest.raises(TimeoutError):
+        hashing.verify_password("Str0ng!pass", password_hash, timeout=0.001)
+
+
+def test_latency_percentiles():
+    executor = HashingExecutor(workers=1, max_pending=1)
+    assert executor.stats()["p95_ms"] == 0.0
+
+    executor._latencies.extend(ms / 1000 for ms in range(1, 101))
+    stats = executor.stats()
+
+    assert stats["p50_ms"] == pytest.approx(51)
+    assert stats["p95_ms"] == pytest.approx(96)
+    assert stats["p99_ms"] == pytest.approx(100)
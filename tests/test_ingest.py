@@ -0,0 +1,127 @@
+import pandas as pd
+import pytest
+
+from app.data.incidents import get_incidents_by_type_count
+from app.data.ingest import (
+    INCIDENTS_SOURCE,
+    TICKETS_SOURCE,
+    incremental_load_csv,
+    upsert_dataframe,
+)
+from app.data.rollups import check_rollups
+
+
+def _write_incidents(path, rows):
+    pd.DataFrame(
+        rows,
+        columns=["incident_id", "timestamp", "severity", "category", "status", "description"],
+    ).to_csv(path, index=False)
+
+
+def _incident_rows(count):
+    return [
+        (1000 + i, f"2024-01-{i % 28 + 1:02d} 10:00:00", "High" if i % 2 else "Low",
+         "Phishing" if i % 3 else "Malware", "Open", f"incident {i}")
+        for i in range(count)
+    ]
+
+
+def test_reload_is_idempotent_and_counts_changes(conn, tmp_path):
+    rows = _incident_rows(20)
+    _write_incidents(tmp_path / "cyber_incidents.csv", rows)
+
+    first = incremental_load_csv(conn, INCIDENTS_SOURCE, data_dir=tmp_path)
+    assert (first["inserted"], first["updated"], first["unchanged"]) == (20, 0, 0)
+
+    second = incremental_load_csv(conn, INCIDENTS_SOURCE, data_dir=tmp_path)
+    assert (second["inserted"], second["updated"], second["unchanged"]) == (0, 0, 20)
+
+    # Changed copy: 3 rows edited, 2 new rows
+    changed = list(rows)
+    for i in (0, 5, 7):
+        changed[i] = changed[i][:4] + ("Resolved",) + changed[i][5:]
+    changed += [(2000, "2024-02-01 09:00:00", "Low", "DDoS", "Open", "new"),
+                (2001, "2024-02-02 09:00:00", "High", "DDoS", "Open", "new")]
+    _write_incidents(tmp_path / "cyber_incidents.csv", changed)
+
+    third = incremental_load_csv(conn, INCIDENTS_SOURCE, data_dir=tmp_path)
+    assert (third["inserted"], third["updated"], third["unchanged"]) == (2, 3, 17)
+
+    assert conn.execute("SELECT COUNT(*) FROM cyber_incidents").fetchone()[0] == 22
+    assert conn.execute(
+        "SELECT COUNT(*) FROM cyber_incidents WHERE status = 'Resolved'"
+    ).fetchone()[0] == 3
+
+
+def test_counts_add_up_to_the_keyed_rows(conn, tmp_path):
+    rows = _incident_rows(10)
+    # A key repeated inside one file: inserted once, then updated
+    rows.append((1003, "2024-03-01 10:00:00", "Low", "Malware", "Closed", "dup"))
+    _write_incidents(tmp_path / "cyber_incidents.csv", rows)
+
+    report = incremental_load_csv(conn, INCIDENTS_SOURCE, data_dir=tmp_path)
+
+    assert (report["inserted"], report["updated"], report["unchanged"]) == (10, 1, 0)
+    assert report["inserted"] + report["updated"] + report["unchanged"] == len(rows)
+
+
+def test_rows_without_a_key_are_inserted(conn):
+    mapped = pd.DataFrame(
+        [("1", "2024-01-01", "Phishing", "Low", "Open", "a", None),
+         (None, "2024-01-02", "Malware", "High", "Open", "b", None)],
+        columns=list(INCIDENTS_SOURCE["columns"]),
+    ).astype(object)
+    mapped = mapped.where(mapped.notna(), None)
+
+    summary = upsert_dataframe(conn, mapped, "cyber_incidents", "incident_id")
+
+    assert summary == {"inserted": 1, "updated": 0, "unchanged": 0, "unkeyed": 1}
+
+
+def _write_csvs(data_dir, incidents, tickets):
+    pd.DataFrame(
+        incidents,
+        columns=["incident_id", "timestamp", "severity", "category", "status", "description"],
+    ).to_csv(data_dir / "cyber_incidents.csv", index=False)
+    pd.DataFrame(
+        tickets,
+        columns=["ticket_id", "priority", "status", "description", "created_at", "assigned_to"],
+    ).to_csv(data_dir / "it_tickets.csv", index=False)
+
+
+def test_keyed_csv_load_counts_and_rollups_with_triggers(conn, tmp_path):
+    # Regression: the rollup triggers' own writes must not leak into
+    # the inserted/updated/unchanged counts
+    incidents = [
+        (100 + i, f"2024-01-{i % 5 + 1:02d} 10:00:00", ["High", "Low"][i % 2],
+         ["Phishing", "Malware", None][i % 3], "Open", f"incident {i}")
+        for i in range(12)
+    ]
+    tickets = [
+        (900 + i, ["High", "Medium"][i % 2], "Open", f"ticket {i}",
+         f"2024-02-{i % 3 + 1:02d} 09:00:00", "it")
+        for i in range(8)
+    ]
+    _write_csvs(tmp_path, incidents, tickets)
+
+    for source, rows in ((INCIDENTS_SOURCE, 12), (TICKETS_SOURCE, 8)):
+        report = incremental_load_csv(conn, source, data_dir=tmp_path)
+        assert (report["inserted"], report["updated"], report["unchanged"]) == (rows, 0, 0)
+    assert all(not diffs for diffs in check_rollups(conn).values())
+
+    # Changed copy: 4 incidents change status/type, 1 ticket changes priority
+    incidents = [
+        row[:3] + ("Ransomware",) + ("Closed",) + row[5:] if i < 4 else row
+        for i, row in enumerate(incidents)
+    ]
+    tickets[0] = (900, "Low") + tickets[0][2:]
+    _write_csvs(tmp_path, incidents, tickets)
+
+    report = incremental_load_csv(conn, INCIDENTS_SOURCE, data_dir=tmp_path)
+    assert (report["inserted"], report["updated"], report["unchanged"]) == (0, 4, 8)
+    report = incremental_load_csv(conn, TICKETS_SOURCE, data_dir=tmp_path)
+    assert (report["inserted"], report["updated"], report["unchanged"]) == (0, 1, 7)
+
+    assert all(not diffs for diffs in check_rollups(conn).values())
+    by_type = dict(get_incidents_by_type_count(conn).itertuples(index=False))
+    assert by_type["Ransomware"] == 4
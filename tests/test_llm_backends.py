@@ -0,0 +1,113 @@
+import http.client
+import io
+
+import pytest
+
+from app.services import chat_loadtest, llm_backends
+from app.services.fake_llm_server import fake_answer_tokens, start_in_background
+from app.services.llm_backends import HTTPBackend, LLMError
+
+
+MESSAGES = [{"role": "user", "content": "Triage a phishing report"}]
+
+
+@pytest.fixture
+def fake_server():
+    """
+    Start a fake server with the given settings; stopped after the test.
+    """
+    servers = []
+
+    def start(**settings):
+        settings.setdefault("ttft", 0)
+        settings.setdefault("token_delay", 0)
+        server, base_url = start_in_background(**settings)
+        servers.append(server)
+        return base_url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _answer(backend):
+    return "".join(backend.stream_chat(MESSAGES, "fake-model", 0.0))
+
+
+def test_streamed_answer(fake_server):
+    backend = HTTPBackend(fake_server(tokens=8))
+
+    deltas = list(backend.stream_chat(MESSAGES, "fake-model", 0.0))
+
+    assert deltas == fake_answer_tokens(MESSAGES, 8)
+
+
+def test_non_streamed_answer(fake_server):
+    backend = HTTPBackend(fake_server(tokens=8), stream=False)
+
+    deltas = list(backend.stream_chat(MESSAGES, "fake-model", 0.0))
+
+    assert deltas == ["".join(fake_answer_tokens(MESSAGES, 8))]
+
+
+def test_rate_limit_carries_the_status(fake_server):
+    backend = HTTPBackend(fake_server(error_rate=1.0))
+
+    with pytest.raises(LLMError) as info:
+        _answer(backend)
+    assert info.value.status == 429
+
+
+def test_timeout_mid_stream_is_an_llm_error(fake_server):
+    backend = HTTPBackend(fake_server(tokens=5, token_delay=2), timeout=0.3)
+
+    with pytest.raises(LLMError) as info:
+        _answer(backend)
+    assert info.value.status is None
+
+
+class _TruncatedResponse(io.BytesIO):
+    # Headers of an event stream, then the connection drops
+    headers = http.client.parse_headers(io.BytesIO(b"Content-Type: text/event-stream\r\n\r\n"))
+
+    def __iter__(self):
+        yield b'data: {"choices": [{"delta": {"content": "partial "}}]}\n'
+        raise http.client.IncompleteRead(b"")
+
+
+def test_dropped_connection_is_an_llm_error(monkeypatch):
+    monkeypatch.setattr(llm_backends.urllib.request, "urlopen",
+                        lambda request, timeout: _TruncatedResponse())
+    backend = HTTPBackend("http://fake.invalid/v1")
+
+    received = []
+    with pytest.raises(LLMError, match="IncompleteRead") as info:
+        for delta in backend.stream_chat(MESSAGES, "fake-model", 0.0):
+            received.append(delta)
+    assert received == ["partial "]
+    assert info.value.status is None
+
+
+class _UnfinishedResponse(_TruncatedResponse):
+    # Connection closed cleanly, but before the "[DONE]" event
+
+    def __iter__(self):
+        yield b'data: {"choices": [{"delta": {"content": "partial "}}]}\n'
+
+
+def test_stream_without_end_marker_is_an_llm_error(monkeypatch):
+    monkeypatch.setattr(llm_backends.urllib.request, "urlopen",
+                        lambda request, timeout: _UnfinishedResponse())
+
+    with pytest.raises(LLMError, match="before \\[DONE\\]"):
+        _answer(HTTPBackend("http://fake.invalid/v1"))
+
+
+def test_load_test_counts_failures_without_losing_requests(fake_server):
+    backend = HTTPBackend(fake_server(tokens=3, error_rate=1.0))
+
+    summary = chat_loadtest.run_load_test(backend, sessions=3, turns=2)
+
+    assert summary["requests"] == 6
+    assert summary["errors"] == 6
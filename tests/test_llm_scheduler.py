@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import deque
+
+import pytest
+
+from app.services import llm_scheduler
+from app.services.llm_backends import LLMBackend, LLMError
+from app.services.llm_scheduler import LLMScheduler, SchedulerBusyError, _Ticket
+
+
+class _ScriptedBackend(LLMBackend):
+    # Each call plays the next script: a list of deltas, or an LLMError
+    # (raised before any delta), or (deltas, error) to fail mid-stream
+    def __init__(self, *scripts):
+        self.scripts = list(scripts)
+        self.calls = 0
+
+    def stream_chat(self, messages, model, temperature):
+        script = self.scripts[self.calls]
+        self.calls += 1
+        if isinstance(script, LLMError):
+            raise script
+        deltas, error = script if isinstance(script, tuple) else (script, None)
+        yield from deltas
+        if error is not None:
+            raise error
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(llm_scheduler, "backoff_delay", lambda attempt: 0)
+
+
+def _run(scheduler, backend, user="alice"):
+    return "".join(scheduler.stream(user, backend, [], "model", 0))
+
+
+def test_retryable_errors_are_retried_before_streaming():
+    scheduler = LLMScheduler(rate=1000, burst=1000)
+    backend = _ScriptedBackend(LLMError("slow down", status=429),
+                               LLMError("bad gateway", status=502),
+                               ["Hello ", "world"])
+
+    assert _run(scheduler, backend) == "Hello world"
+
+    stats = scheduler.stats()
+    assert (stats["retries"], stats["completed"], stats["failed"]) == (2, 1, 0)
+    assert stats["active"] == 0
+
+
+def test_client_errors_and_exhausted_retries_are_raised():
+    scheduler = LLMScheduler(rate=1000, burst=1000, max_retries=1)
+
+    with pytest.raises(LLMError, match="bad request"):
+        _run(scheduler, _ScriptedBackend(LLMError("bad request", status=400)))
+
+    with pytest.raises(LLMError, match="down"):
+        _run(scheduler, _ScriptedBackend(LLMError("down", status=503),
+                                         LLMError("down", status=503)))
+
+    stats = scheduler.stats()
+    assert (stats["failed"], stats["retries"], stats["active"]) == (2, 1, 0)
+
+
+def test_no_retry_once_text_was_streamed():
+    scheduler = LLMScheduler(rate=1000, burst=1000)
+    backend = _ScriptedBackend((["partial "], LLMError("reset", status=None)), ["unused"])
+
+    with pytest.raises(LLMError, match="reset"):
+        _run(scheduler, backend)
+    assert backend.calls == 1
+
+
+def test_full_queue_rejects_without_waiting():
+    # No slots at all, so the first request stays queued
+    scheduler = LLMScheduler(max_concurrency=0, max_queue=1, queue_timeout=0.5)
+    waiter = threading.Thread(target=lambda: pytest.raises(SchedulerBusyError,
+                                                           scheduler.acquire, "alice"))
+    waiter.start()
+    while scheduler.stats()["queue_depth"] == 0:
+        time.sleep(0.01)
+
+    started = time.monotonic()
+    with pytest.raises(SchedulerBusyError, match="busy"):
+        scheduler.acquire("bob")
+    assert time.monotonic() - started < 0.1
+
+    waiter.join()
+    assert scheduler.stats()["rejected"] == 2
+
+
+def test_waiting_request_times_out_while_slots_are_busy():
+    scheduler = LLMScheduler(max_concurrency=1, rate=1000, burst=1000, queue_timeout=0.2)
+    holder = scheduler.stream("alice", _ScriptedBackend(["a", "b"]), [], "model", 0)
+    next(holder)
+
+    with pytest.raises(SchedulerBusyError, match="Timed out"):
+        _run(scheduler, _ScriptedBackend(["x"]), user="bob")
+
+    holder.close()
+    assert _run(scheduler, _ScriptedBackend(["x"]), user="bob") == "x"
+
+
+def test_waiting_users_are_served_round_robin():
+    # No slots, so the dispatcher leaves the queue alone
+    scheduler = LLMScheduler(max_concurrency=0)
+
+    with scheduler._cond:
+        for user in ["alice", "alice", "alice", "bob", "carol"]:
+            scheduler._queues.setdefault(user, deque()).append(_Ticket(user))
+            scheduler._waiting += 1
+        order = [scheduler._next_ticket().user for _ in range(5)]
+
+    assert order == ["alice", "bob", "carol", "alice", "alice"]
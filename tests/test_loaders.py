@@ -0,0 +1,95 @@
+import os
+
+import pandas as pd
+import pytest
+
+from app.data import loaders
+from app.data.loaders import get_checkpoint, iter_csv_batches, stream_csv_to_table
+
+
+def _write_csv(path, count, start=0):
+    pd.DataFrame(
+        {"n": range(start, start + count), "label": [f"row {i}" for i in range(count)]}
+    ).to_csv(path, index=False)
+
+
+def _stored(conn):
+    return [row[0] for row in conn.execute("SELECT n FROM numbers ORDER BY rowid")]
+
+
+def test_batches_skip_committed_rows_in_bounded_chunks(tmp_path):
+    path = tmp_path / "numbers.csv"
+    _write_csv(path, 250)
+
+    chunks = list(iter_csv_batches(path, chunksize=40, max_memory_mb=None, skip_rows=95))
+
+    assert pd.concat(chunks)["n"].tolist() == list(range(95, 250))
+    assert max(len(chunk) for chunk in chunks) <= 40
+    assert list(iter_csv_batches(path, chunksize=40, skip_rows=1000)) == []
+
+
+def test_progress_is_reported_per_chunk(conn, tmp_path):
+    path = tmp_path / "numbers.csv"
+    _write_csv(path, 100)
+    calls = []
+
+    inserted = stream_csv_to_table(
+        conn, path, "numbers", chunksize=30, max_memory_mb=None,
+        progress=lambda done, rows, elapsed: calls.append((done, rows)),
+    )
+
+    assert inserted == 100
+    assert calls == [(30, 30), (60, 30), (90, 30), (100, 10)]
+    assert get_checkpoint(conn, path.name, "numbers") == 0     # cleared when done
+
+
+def test_resume_after_failure_loads_each_row_once(conn, tmp_path, monkeypatch):
+    path = tmp_path / "numbers.csv"
+    _write_csv(path, 100)
+
+    insert = loaders.insert_dataframe
+    calls = []
+
+    def failing_insert(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 3:
+            raise RuntimeError("disk full")
+        return insert(*args, **kwargs)
+
+    monkeypatch.setattr(loaders, "insert_dataframe", failing_insert)
+    with pytest.raises(RuntimeError, match="disk full"):
+        stream_csv_to_table(conn, path, "numbers", chunksize=25, max_memory_mb=None)
+
+    assert get_checkpoint(conn, path.name, "numbers") == 50
+    assert _stored(conn) == list(range(50))
+
+    monkeypatch.setattr(loaders, "insert_dataframe", insert)
+    assert stream_csv_to_table(conn, path, "numbers", chunksize=25, max_memory_mb=None) == 50
+    assert _stored(conn) == list(range(100))
+
+
+def test_checkpoint_of_another_file_with_the_same_name_is_ignored(conn, tmp_path, monkeypatch):
+    path = tmp_path / "numbers.csv"
+    _write_csv(path, 60)
+
+    insert = loaders.insert_dataframe
+    calls = []
+
+    def failing_insert(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError("interrupted")
+        return insert(*args, **kwargs)
+
+    monkeypatch.setattr(loaders, "insert_dataframe", failing_insert)
+    with pytest.raises(RuntimeError):
+        stream_csv_to_table(conn, path, "numbers", chunksize=20, max_memory_mb=None)
+    monkeypatch.setattr(loaders, "insert_dataframe", insert)
+
+    # A different export under the same name (new size and mtime)
+    _write_csv(path, 30, start=1000)
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert stream_csv_to_table(conn, path, "numbers", chunksize=20, max_memory_mb=None) == 30
+    assert _stored(conn) == list(range(20)) + list(range(1000, 1030))
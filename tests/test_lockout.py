@@ -0,0 +1,108 @@
+import pytest
+
+from app.services import lockout
+from app.services.lockout import (
+    LOCKOUT_LIMIT,
+    LOCKOUT_TIME,
+    SlidingWindowLimiter,
+    clear_failed_attempts,
+    is_account_locked,
+    record_failed_attempt,
+    sweep_expired,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_lockout(pool, monkeypatch):
+    # Each test gets its own database, so the table must be created again
+    monkeypatch.setattr(lockout, "_table_ready", False)
+    monkeypatch.setattr(lockout, "_last_sweep", 0.0)
+
+
+def _stored(pool, username):
+    with pool.connection() as conn:
+        return conn.execute(
+            "SELECT attempts, last_attempt FROM login_failures WHERE username = ?",
+            (username,),
+        ).fetchone()
+
+
+def test_locks_after_the_threshold():
+    now = 1_000_000.0
+    for i in range(LOCKOUT_LIMIT - 1):
+        record_failed_attempt("alice", now=now + i)
+        assert is_account_locked("alice", now=now + i) == (False, 0)
+
+    record_failed_attempt("alice", now=now + 10)
+
+    locked, remaining = is_account_locked("alice", now=now + 10)
+    assert locked
+    assert remaining == LOCKOUT_TIME
+
+
+def test_lock_expires_after_lockout_time():
+    now = 1_000_000.0
+    for _ in range(LOCKOUT_LIMIT):
+        record_failed_attempt("bob", now=now)
+
+    assert is_account_locked("bob", now=now + LOCKOUT_TIME - 1)[0]
+    assert is_account_locked("bob", now=now + LOCKOUT_TIME) == (False, 0)
+
+
+def test_old_failures_restart_the_count(pool):
+    now = 1_000_000.0
+    for _ in range(LOCKOUT_LIMIT - 1):
+        record_failed_attempt("carol", now=now)
+
+    # Next failure after the window: counting starts over at 1
+    record_failed_attempt("carol", now=now + LOCKOUT_TIME + 1)
+
+    assert _stored(pool, "carol")[0] == 1
+    assert not is_account_locked("carol", now=now + LOCKOUT_TIME + 1)[0]
+
+
+def test_clear_forgets_failures(pool):
+    for _ in range(LOCKOUT_LIMIT):
+        record_failed_attempt("dave", now=1_000_000.0)
+
+    clear_failed_attempts("dave")
+
+    assert _stored(pool, "dave") is None
+    assert is_account_locked("dave", now=1_000_000.0) == (False, 0)
+
+
+def test_sweep_removes_only_expired_rows(pool):
+    now = 1_000_000.0
+    record_failed_attempt("old", now=now - LOCKOUT_TIME - 5)
+    record_failed_attempt("recent", now=now - 5)
+
+    assert sweep_expired(now=now) == 1
+    assert _stored(pool, "old") is None
+    assert _stored(pool, "recent") is not None
+
+
+def test_failures_trigger_a_periodic_sweep(pool, monkeypatch):
+    sweeps = []
+    monkeypatch.setattr(lockout, "sweep_expired", lambda now=None: sweeps.append(now))
+    now = 1_000_000.0
+
+    record_failed_attempt("erin", now=now)
+    record_failed_attempt("erin", now=now + lockout.SWEEP_INTERVAL - 1)
+    record_failed_attempt("erin", now=now + lockout.SWEEP_INTERVAL)
+
+    assert sweeps == [now, now + lockout.SWEEP_INTERVAL]
+
+
+def test_sliding_window_rejects_bursts_and_recovers():
+    limiter = SlidingWindowLimiter(max_events=3, window=60)
+
+    for t in (0, 1, 2):
+        assert limiter.hit("ip", now=t) == (True, 0)
+
+    allowed, retry_after = limiter.hit("ip", now=10)
+    assert not allowed
+    assert retry_after == 51
+
+    # The first attempt leaves the window at t=60
+    assert limiter.hit("ip", now=60) == (True, 0)
+    assert limiter.hit("other", now=10) == (True, 0)
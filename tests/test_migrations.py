@@ -0,0 +1,104 @@
+import pytest
+
+from app.data import migrations
+from app.data.db import connect_database
+from app.data.migrations import (
+    MIGRATIONS,
+    apply_migrations,
+    check_query_plans,
+    get_applied_versions,
+    require_schema,
+    schema_version,
+)
+from app.data.schema import create_all_tables
+
+
+LATEST = max(version for version, _, _ in MIGRATIONS)
+
+
+@pytest.fixture
+def base_conn(db_path):
+    """
+    Database with the base tables only (no migrations applied yet).
+    """
+    connection = connect_database(db_path)
+    create_all_tables(connection)
+    yield connection
+    connection.close()
+
+
+def _indexes(conn):
+    return {row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'"
+    )}
+
+
+def test_second_run_is_a_no_op(base_conn):
+    applied = apply_migrations(base_conn)
+    assert [version for version, _ in applied] == sorted(v for v, _, _ in MIGRATIONS)
+
+    before = base_conn.execute("SELECT version, applied_at FROM schema_migrations").fetchall()
+    assert apply_migrations(base_conn) == []
+    assert base_conn.execute(
+        "SELECT version, applied_at FROM schema_migrations"
+    ).fetchall() == before
+
+
+def test_dry_run_writes_nothing(base_conn):
+    indexes = _indexes(base_conn)
+
+    pending = apply_migrations(base_conn, dry_run=True)
+
+    assert len(pending) == len(MIGRATIONS)
+    assert get_applied_versions(base_conn) == set()
+    assert schema_version(base_conn) == 0
+    assert _indexes(base_conn) == indexes
+
+
+def test_user_version_advances_per_migration(base_conn, monkeypatch):
+    for upto in (1, 3, LATEST):
+        monkeypatch.setattr(migrations, "MIGRATIONS",
+                            [m for m in MIGRATIONS if m[0] <= upto])
+        apply_migrations(base_conn)
+        assert schema_version(base_conn) == upto
+        assert get_applied_versions(base_conn) == set(range(1, upto + 1))
+
+
+def test_failing_migration_rolls_back(base_conn, monkeypatch):
+    apply_migrations(base_conn)
+    broken = (LATEST + 1, "broken", [
+        "CREATE TABLE half_done (x INTEGER)",
+        "SELECT * FROM no_such_table",
+    ])
+    monkeypatch.setattr(migrations, "MIGRATIONS", MIGRATIONS + [broken])
+
+    with pytest.raises(Exception, match="no_such_table"):
+        apply_migrations(base_conn)
+
+    assert schema_version(base_conn) == LATEST
+    assert LATEST + 1 not in get_applied_versions(base_conn)
+    assert base_conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'half_done'"
+    ).fetchone() is None
+
+
+def test_require_schema(base_conn):
+    with pytest.raises(RuntimeError, match="needs schema migration 3.*python -m app.data.migrations"):
+        require_schema(base_conn, 3, "Chat history")
+
+    apply_migrations(base_conn)
+    require_schema(base_conn, LATEST, "Everything")
+
+
+def test_hot_queries_use_their_indexes(base_conn):
+    apply_migrations(base_conn)
+
+    plans = check_query_plans(base_conn)
+    assert set(plans) == {name for name, _, _ in migrations.HOT_QUERIES}
+    assert any("idx_incidents_severity_status" in line
+               for line in plans["incidents filtered by severity and status"])
+
+    unindexed = [("incidents by description",
+                  "SELECT id FROM cyber_incidents WHERE description = ?", ("x",))]
+    with pytest.raises(RuntimeError, match="incidents by description"):
+        check_query_plans(base_conn, unindexed)
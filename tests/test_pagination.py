@@ -0,0 +1,82 @@
+from app.data.incidents import get_incidents_page, insert_incident
+from app.data.pagination import MAX_PAGE_SIZE, estimate_row_count, fetch_page
+
+
+def _all_pages(conn, limit, order_by):
+    ids, cursor, pages = [], None, 0
+    while True:
+        page, cursor = get_incidents_page(conn, after=cursor, limit=limit, order_by=order_by)
+        ids.extend(int(i) for i in page["id"])
+        pages += 1
+        if cursor is None:
+            return ids, pages
+
+
+def _seed(conn):
+    # 11 incidents over a few dates, some sharing a date, two undated
+    dates = ["2024-03-01", "2024-01-15", None, "2024-03-01", "2024-02-10",
+             "2024-01-15", None, "2024-03-02", "2024-02-10", "2024-01-01",
+             "2024-03-01"]
+    for i, date in enumerate(dates):
+        insert_incident(conn, date, "Phishing", "High", "Open", f"incident {i}")
+
+
+def test_id_order_visits_every_row_once(conn):
+    _seed(conn)
+    ids, pages = _all_pages(conn, limit=4, order_by="id")
+
+    assert ids == list(range(11, 0, -1))
+    assert pages == 3
+
+
+def test_date_order_pages_through_dated_then_undated_rows(conn):
+    _seed(conn)
+    expected = [
+        row[0] for row in conn.execute(
+            "SELECT id FROM cyber_incidents WHERE date IS NOT NULL "
+            "ORDER BY date DESC, id DESC"
+        )
+    ] + [7, 3]
+
+    # Page sizes that split ties, the dated/undated boundary and the tail
+    for limit in (1, 2, 3, 9, 10, 11, 50):
+        ids, _ = _all_pages(conn, limit=limit, order_by="date")
+        assert ids == expected, limit
+
+
+def test_last_page_has_no_cursor(conn):
+    insert_incident(conn, "2024-01-01", "Malware", "Low", "Open", "only")
+
+    page, cursor = get_incidents_page(conn, limit=1)
+    assert len(page) == 1 and cursor is None
+
+    page, cursor = get_incidents_page(conn, order_by="date", limit=5)
+    assert len(page) == 1 and cursor is None
+
+
+def test_page_size_is_clamped_and_columns_completed(conn):
+    for i in range(3):
+        insert_incident(conn, None, "Malware", "Low", "Open", f"incident {i}")
+
+    page, cursor = fetch_page(conn, "cyber_incidents", ["description"], limit=-5)
+    assert list(page.columns) == ["description", "id"]
+    assert len(page) == 1 and cursor == 3
+
+    page, _ = fetch_page(conn, "cyber_incidents", ["id"], limit=MAX_PAGE_SIZE * 10)
+    assert len(page) == 3
+
+
+def test_row_count_estimate(conn):
+    assert estimate_row_count(conn, "cyber_incidents") == 0
+
+    for i in range(5):
+        insert_incident(conn, None, "Malware", "Low", "Open", f"incident {i}")
+    conn.execute("DELETE FROM cyber_incidents WHERE id = 3")
+    conn.commit()
+
+    # Without ANALYZE: the id range, which still counts the deleted row
+    assert estimate_row_count(conn, "cyber_incidents") == 5
+
+    conn.execute("ANALYZE")
+    conn.commit()
+    assert estimate_row_count(conn, "cyber_incidents") == 4
@@ -0,0 +1,87 @@
+import json
+from concurrent.futures import Future
+
+import pytest
+
+from app.data.users import get_user_by_username, insert_user, update_user_password_hash
+from app.services import password_policy, user_service
+
+
+@pytest.fixture
+def policy(tmp_path, monkeypatch):
+    """
+    Fresh policy state with the saved cost kept under tmp_path.
+    """
+    monkeypatch.setattr(password_policy, "POLICY_PATH", tmp_path / "bcrypt_policy.json")
+    monkeypatch.setattr(password_policy, "_policy", None)
+    monkeypatch.delenv("BCRYPT_ROUNDS", raising=False)
+    monkeypatch.delenv("BCRYPT_RECALIBRATE", raising=False)
+    return password_policy
+
+
+def _calibrates_to(monkeypatch, rounds, calls=None):
+    def fake(*args, **kwargs):
+        if calls is not None:
+            calls.append(rounds)
+        return rounds, 100.0
+    monkeypatch.setattr(password_policy, "calibrate_rounds", fake)
+
+
+def test_only_lower_costs_need_a_rehash(policy, monkeypatch):
+    monkeypatch.setenv("BCRYPT_ROUNDS", "12")
+
+    assert policy.needs_rehash("$2b$11$" + "a" * 53)
+    assert not policy.needs_rehash("$2b$12$" + "a" * 53)
+    assert not policy.needs_rehash("$2b$13$" + "a" * 53)
+    assert policy.needs_rehash("not-a-bcrypt-hash")
+
+
+def test_calibration_is_saved_and_reused(policy, monkeypatch):
+    calls = []
+    _calibrates_to(monkeypatch, 12, calls)
+
+    assert policy.get_policy()["source"] == "benchmark"
+    assert json.loads(policy.POLICY_PATH.read_text())["rounds"] == 12
+
+    # Next start: the saved cost is used without benchmarking again
+    monkeypatch.setattr(password_policy, "_policy", None)
+    _calibrates_to(monkeypatch, 10, calls)
+    restarted = policy.get_policy()
+
+    assert (restarted["rounds"], restarted["source"]) == (12, "saved")
+    assert calls == [12]
+
+
+def test_recalibration_never_lowers_the_cost(policy, monkeypatch):
+    policy.save_rounds(13, 200.0, policy.POLICY_PATH)
+    monkeypatch.setenv("BCRYPT_RECALIBRATE", "1")
+    _calibrates_to(monkeypatch, 11)
+
+    assert policy.get_policy()["rounds"] == 13
+    assert policy.load_saved_rounds(policy.POLICY_PATH) == 13
+
+
+def test_unreadable_saved_policy_is_ignored(policy, monkeypatch):
+    policy.POLICY_PATH.write_text("{not json")
+    _calibrates_to(monkeypatch, 11)
+
+    assert policy.get_policy()["rounds"] == 11
+
+
+def test_rehash_write_back_does_not_overwrite_a_password_change(conn, monkeypatch):
+    insert_user("ana", "old-cost-hash")
+    pending = Future()
+    monkeypatch.setattr(user_service, "needs_rehash", lambda stored_hash: True)
+    monkeypatch.setattr(user_service, "submit_hash", lambda password: pending)
+
+    user_service.upgrade_password_hash("ana", "Str0ng!pass", "old-cost-hash")
+    update_user_password_hash("ana", "changed-password-hash")   # meanwhile
+    pending.set_result("upgraded-hash")
+
+    assert get_user_by_username("ana")[2] == "changed-password-hash"
+
+    # Without a concurrent change the upgrade is written
+    pending = Future()
+    user_service.upgrade_password_hash("ana", "N3w!pass", "changed-password-hash")
+    pending.set_result("upgraded-hash")
+    assert get_user_by_username("ana")[2] == "upgraded-hash"
@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+
+from app.data.ingest import INCIDENTS_SOURCE, TICKETS_SOURCE
+from app.data.pipeline import run_ingest_pipeline
+
+
+def _write_tickets(path, count):
+    pd.DataFrame(
+        [(5000 + i, "High" if i % 2 else "Low", "Open", f"ticket {i}",
+          f"2024-01-{i % 28 + 1:02d} 08:00:00", "it-support")
+         for i in range(count)],
+        columns=["ticket_id", "priority", "status", "description", "created_at",
+                 "assigned_to"],
+    ).to_csv(path, index=False)
+
+
+def _write_incidents(path, count):
+    pd.DataFrame(
+        [(1000 + i, f"2024-01-{i % 28 + 1:02d} 10:00:00", "Low", "Phishing", "Open",
+          f"incident {i}")
+         for i in range(count)],
+        columns=["incident_id", "timestamp", "severity", "category", "status",
+                 "description"],
+    ).to_csv(path, index=False)
+
+
+def test_chunks_flow_through_a_small_queue(conn, tmp_path):
+    _write_incidents(tmp_path / "cyber_incidents.csv", 95)
+    _write_tickets(tmp_path / "it_tickets.csv", 42)
+    sources = (INCIDENTS_SOURCE, TICKETS_SOURCE)
+
+    # 10-row chunks through a one-slot queue: workers must wait on the writer
+    result = run_ingest_pipeline(conn, sources, max_workers=2, batch_size=10,
+                                 max_pending_batches=1, data_dir=tmp_path)
+
+    incidents = result["tables"]["cyber_incidents"]
+    tickets = result["tables"]["it_tickets"]
+    assert (incidents["rows"], incidents["inserted"]) == (95, 95)
+    assert (tickets["rows"], tickets["inserted"]) == (42, 42)
+    assert conn.execute("SELECT COUNT(*) FROM cyber_incidents").fetchone()[0] == 95
+    assert conn.execute("SELECT COUNT(*) FROM it_tickets").fetchone()[0] == 42
+    assert result["rows"] == 137 and result["rows_per_sec"] > 0
+    assert incidents["rows_per_sec"] > 0
+
+    again = run_ingest_pipeline(conn, sources, max_workers=2, batch_size=10,
+                                max_pending_batches=1, data_dir=tmp_path)
+    assert again["tables"]["cyber_incidents"]["unchanged"] == 95
+    assert again["tables"]["it_tickets"]["inserted"] == 0
+
+
+def test_missing_csv_is_skipped(conn, tmp_path):
+    _write_incidents(tmp_path / "cyber_incidents.csv", 5)
+
+    result = run_ingest_pipeline(conn, (INCIDENTS_SOURCE, TICKETS_SOURCE),
+                                 max_workers=1, data_dir=tmp_path)
+
+    assert result["tables"]["cyber_incidents"]["inserted"] == 5
+    assert result["tables"]["it_tickets"]["rows"] == 0
+
+
+def test_parse_error_is_raised_after_shutdown(conn, tmp_path):
+    pd.DataFrame({"incident_id": [1, 2]}).to_csv(tmp_path / "cyber_incidents.csv",
+                                                 index=False)
+
+    with pytest.raises(KeyError, match="missing expected column"):
+        run_ingest_pipeline(conn, (INCIDENTS_SOURCE,), max_workers=1,
+                            data_dir=tmp_path)
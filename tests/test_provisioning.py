@@ -0,0 +1,88 @@
+from concurrent.futures import Future
+
+import pytest
+
+from app.services import hashing, provisioning
+from app.services.validation import check_password_strength, validate_password, validate_username
+
+
+@pytest.fixture
+def fast_hashing(monkeypatch):
+    # The bcrypt process pool is covered elsewhere; keep these tests quick
+    monkeypatch.setattr(provisioning, "_hash_all",
+                        lambda passwords: [(f"hash:{p}", None) for p in passwords])
+
+
+def test_validation_rules():
+    assert validate_username("ana_01") == (True, "")
+    assert not validate_username("ab")[0]
+    assert not validate_username("bad-name")[0]
+
+    assert validate_password("Str0ng!pass") == (True, "")
+    assert "uppercase" in validate_password("weak1!pass")[1]
+    assert "special" in validate_password("NoSpecial123")[1]
+
+    assert check_password_strength("abc") == "Weak"
+    assert check_password_strength("Str0ng!pass") == "Strong"
+
+
+def test_auth_reexports_the_shared_validators():
+    import auth
+
+    assert auth.validate_username is validate_username
+    assert auth.validate_password is validate_password
+
+
+def test_provision_reports_every_row(conn, fast_hashing):
+    conn.execute("INSERT INTO users (username, password_hash, role) "
+                 "VALUES ('taken', 'x', 'user')")
+    conn.commit()
+
+    rows = [
+        {"username": "alice", "password": "Str0ng!pass", "role": "analyst"},
+        {"username": "bob", "password": "short", "role": "user"},
+        {"username": "alice", "password": "Str0ng!pass", "role": "user"},
+        {"username": "taken", "password": "Str0ng!pass", "role": "user"},
+        {"username": "carol", "password": "Str0ng!pass", "role": "wizard"},
+    ]
+
+    report, summary = provisioning.provision_users(rows)
+
+    assert [r["status"] for r in report] == [
+        "created", "invalid", "duplicate", "exists", "invalid",
+    ]
+    assert conn.execute(
+        "SELECT password_hash, role FROM users WHERE username = 'alice'"
+    ).fetchone() == ("hash:Str0ng!pass", "analyst")
+
+
+def test_hashing_failures_only_affect_their_row(conn, monkeypatch):
+    attempts = {}
+
+    def submit_hash(password):
+        attempts[password] = attempts.get(password, 0) + 1
+        future = Future()
+        if password.startswith("Busy") and attempts[password] == 1:
+            raise hashing.HashQueueFullError("Password hashing queue is full")
+        if password.startswith("Slow"):
+            future.set_exception(TimeoutError())
+        else:
+            future.set_result(f"hash:{password}")
+        return future
+
+    monkeypatch.setattr(hashing, "submit_hash", submit_hash)
+    monkeypatch.setattr(provisioning, "HASH_RETRY_DELAY", 0)
+
+    rows = [
+        {"username": "alice", "password": "Str0ng!pass", "role": "user"},
+        {"username": "bob", "password": "Slow!pass1", "role": "user"},
+        {"username": "carol", "password": "Busy!pass1", "role": "user"},
+    ]
+
+    report, summary = provisioning.provision_users(rows)
+
+    assert [r["status"] for r in report] == ["created", "error", "created"]
+    assert report[1]["message"] == "Hashing failed: TimeoutError"
+    assert attempts["Busy!pass1"] == 2
+    assert summary["created"] == 2
+    assert conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 2
@@ -0,0 +1,135 @@
+import sqlite3
+
+from app.services import retrieval
+from app.services.retrieval import (
+    BM25Index,
+    RecordIndex,
+    build_context_block,
+    format_record,
+    retrieve_context,
+)
+
+
+def _add_incident(conn, incident_type, description, severity="High"):
+    cursor = conn.execute(
+        "INSERT INTO cyber_incidents (date, incident_type, severity, status, description) "
+        "VALUES ('2024-01-01', ?, ?, 'Open', ?)",
+        (incident_type, severity, description),
+    )
+    conn.commit()
+    return cursor.lastrowid
+
+
+def test_bm25_ranks_matching_documents_first():
+    index = BM25Index()
+    index.add(1, "phishing email stole credentials")
+    index.add(2, "printer out of paper")
+    index.add(3, "phishing phishing link in email")
+
+    hits = index.search("phishing email", k=2)
+    assert [doc_id for doc_id, _ in hits] == [3, 1]
+
+    index.remove(3)
+    assert [doc_id for doc_id, _ in index.search("phishing")] == [1]
+    assert index.search("nothing matches") == []
+
+
+def test_refresh_rereads_only_changed_rows(conn, db_path):
+    first = _add_incident(conn, "Phishing", "credential phishing email")
+    second = _add_incident(conn, "Malware", "ransomware on laptop")
+    _add_incident(conn, "DDoS", "traffic flood on web server")
+
+    index = RecordIndex()
+    assert index.refresh(conn) == 3
+    assert index.refresh(conn) == 0
+
+    # Another process edits, deletes and adds rows (no cache marks)
+    other = sqlite3.connect(str(db_path))
+    other.execute("UPDATE cyber_incidents SET description = 'worm spreading' WHERE id = ?",
+                  (second,))
+    other.execute("DELETE FROM cyber_incidents WHERE id = ?", (first,))
+    other.commit()
+    other.close()
+    _add_incident(conn, "Phishing", "fake invoice email")
+
+    # Two changed rows are read; the deleted one is dropped
+    assert index.refresh(conn) == 2
+    assert ("incidents", first) not in index.records
+    assert index.search("worm")[0]["id"] == second
+    assert [hit["description"] for hit in index.search("email")] == ["fake invoice email"]
+    assert index.refresh(conn) == 0
+
+
+def _log_size(conn):
+    return conn.execute("SELECT COUNT(*) FROM record_changes").fetchone()[0]
+
+
+def test_change_log_is_trimmed_and_lagging_indexes_reload(conn, monkeypatch):
+    monkeypatch.setattr(retrieval, "CHANGE_LOG_KEEP", 2)
+    first = _add_incident(conn, "Phishing", "credential phishing email")
+    second = _add_incident(conn, "Malware", "ransomware on laptop")
+
+    lagging = RecordIndex()
+    lagging.refresh(conn)
+
+    conn.execute("UPDATE cyber_incidents SET description = 'worm spreading' WHERE id = ?",
+                 (second,))
+    conn.execute("DELETE FROM cyber_incidents WHERE id = ?", (first,))
+    conn.commit()
+    for i in range(3):
+        _add_incident(conn, "DDoS", f"traffic flood {i}")
+
+    current = RecordIndex()
+    assert current.refresh(conn) == 4
+    assert _log_size(conn) == 2
+
+    # The update and delete were trimmed from the log; the lagging
+    # index notices it is too far behind and re-reads the table
+    assert lagging.refresh(conn) == 4
+    assert set(lagging.records) == set(current.records)
+    assert lagging.search("worm")[0]["id"] == second
+    assert lagging.search("phishing") == []
+
+
+def test_source_filter_is_applied_while_scoring(conn):
+    conn.executemany(
+        "INSERT INTO it_tickets (priority, status, category, subject, description) "
+        "VALUES ('High', 'Open', 'Hardware', ?, 'printer printer printer jammed')",
+        [(f"printer {i}",) for i in range(20)],
+    )
+    conn.commit()
+    incident = _add_incident(conn, "Malware", "malware spread through a shared printer driver")
+
+    index = RecordIndex()
+    index.refresh(conn)
+
+    hits = index.search("printer", sources=["incidents"], k=3)
+    assert [(hit["source"], hit["id"]) for hit in hits] == [("incidents", incident)]
+    assert len(index.search("printer", k=3)) == 3
+    assert {hit["source"] for hit in index.search("printer", sources=["tickets"], k=20)} == \
+        {"tickets"}
+
+
+def test_context_block_reports_how_many_hits_fit():
+    hits = [
+        {"source": "incidents", "id": i, "date": "2024-01-01", "incident_type": "Phishing",
+         "severity": "High", "status": "Open", "description": "x" * 200, "score": 1.0}
+        for i in range(5)
+    ]
+    line_tokens = len(format_record(hits[0])) // 4
+
+    block, included = build_context_block(hits, max_tokens=20 + 2 * line_tokens + 10)
+    assert included == 2
+    assert block.count("\n") == 2
+
+    assert build_context_block(hits, max_tokens=5) == ("", 0)
+
+
+def test_retrieve_context_returns_the_included_hits(conn):
+    _add_incident(conn, "Phishing", "phishing email\nwith a multi-line description")
+
+    block, hits = retrieve_context(conn, "Cybersecurity", "phishing email")
+
+    assert len(hits) == 1
+    assert f"#{hits[0]['id']}" in block
+    assert retrieve_context(conn, "General", "phishing") == ("", [])
@@ -0,0 +1,76 @@
+from app.data.db import connect_database
+from app.data.incidents import (
+    delete_incident,
+    get_high_severity_by_status,
+    get_incidents_by_type_count,
+    insert_incident,
+    update_incident_status,
+)
+from app.data.migrations import apply_migrations
+from app.data.rollups import check_rollups, rebuild_rollups
+from app.data.schema import create_all_tables
+
+
+def _no_drift(conn):
+    return all(not diffs for diffs in check_rollups(conn).values())
+
+
+def test_crud_keeps_rollups_consistent(conn):
+    first = insert_incident(conn, "2024-03-01", "Phishing", "High", "Open", "a")
+    second = insert_incident(conn, "2024-03-01", "Phishing", "High", "Open", "b")
+    insert_incident(conn, None, None, "Low", "Open", "no date or type")
+
+    update_incident_status(conn, first, "Closed")
+    high = dict(get_high_severity_by_status(conn).itertuples(index=False))
+    assert high == {"Open": 1, "Closed": 1}
+
+    delete_incident(conn, second)
+    assert _no_drift(conn)
+
+    # A group whose last row is gone disappears from the rollup
+    high = dict(get_high_severity_by_status(conn).itertuples(index=False))
+    assert high == {"Closed": 1}
+
+
+def test_check_finds_drift_and_rebuild_repairs_it(conn):
+    insert_incident(conn, "2024-03-01", "Phishing", "High", "Open", "a")
+    conn.execute("UPDATE incident_type_counts SET count = 7")
+    conn.execute("DELETE FROM ticket_daily_counts")
+    conn.commit()
+
+    report = check_rollups(conn)
+    assert report["incident_type_counts"] == [(("Phishing",), 1, 7)]
+
+    groups = rebuild_rollups(conn)
+    assert groups["incident_type_counts"] == 1
+    assert _no_drift(conn)
+
+
+def test_null_and_empty_keys_share_one_group(conn):
+    insert_incident(conn, None, None, "Low", "Open", "no type")
+    insert_incident(conn, None, "", "Low", "Open", "empty type")
+
+    assert _no_drift(conn)
+    groups = rebuild_rollups(conn)
+    assert groups["incident_type_counts"] == 1
+    assert _no_drift(conn)
+    assert conn.execute("SELECT count FROM incident_type_counts").fetchall() == [(2,)]
+
+
+def test_backfill_groups_null_and_empty_keys(db_path):
+    connection = connect_database(db_path)
+    create_all_tables(connection)
+    connection.executemany(
+        "INSERT INTO cyber_incidents (incident_type, severity, status) VALUES (?, ?, ?)",
+        [(None, "Low", ""), ("", "Low", None), ("Phishing", "High", "Open")],
+    )
+    connection.commit()
+
+    apply_migrations(connection)
+
+    assert _no_drift(connection)
+    stored = connection.execute(
+        "SELECT incident_type, count FROM incident_type_counts ORDER BY count DESC"
+    ).fetchall()
+    assert stored == [(None, 2), ("Phishing", 1)]
+    connection.close()
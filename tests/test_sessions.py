@@ -0,0 +1,152 @@
+import hashlib
+
+import pytest
+
+from app.services import sessions
+from app.services.sessions import (
+    create_session,
+    revoke_session,
+    revoke_user_sessions,
+    sweep_expired_sessions,
+    validate_session,
+)
+
+
+class _FakeThread:
+    started = []
+
+    def __init__(self, target, args, name, daemon):
+        self.target, self.args, self.name, self.daemon = target, args, name, daemon
+
+    def start(self):
+        _FakeThread.started.append(self)
+
+
+@pytest.fixture(autouse=True)
+def fresh_sessions(pool, monkeypatch):
+    monkeypatch.setattr(sessions, "_table_ready", False)
+    monkeypatch.setattr(sessions, "_hot_sessions", type(sessions._hot_sessions)())
+    # A placeholder "already running" sweeper: no real thread in tests
+    monkeypatch.setattr(sessions, "_sweeper", object())
+
+
+def _rows(pool):
+    with pool.connection() as conn:
+        return conn.execute("SELECT token_hash, username FROM sessions").fetchall()
+
+
+def test_only_the_token_hash_is_stored(pool):
+    token = create_session("alice")
+
+    rows = _rows(pool)
+    assert rows == [(hashlib.sha256(token.encode()).hexdigest(), "alice")]
+    assert token not in rows[0]
+    assert validate_session(token) == "alice"
+
+
+def test_unknown_and_empty_tokens_are_rejected():
+    assert validate_session("not-a-token") is None
+    assert validate_session("") is None
+
+
+def test_expired_session_is_rejected_and_removed(pool, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(sessions.time, "time", lambda: now[0])
+    token = create_session("bob", ttl=60)
+
+    now[0] += 59
+    assert validate_session(token) == "bob"
+
+    now[0] += 1
+    assert validate_session(token) is None
+    assert _rows(pool) == []
+
+
+def test_lru_evicts_the_least_recently_used(pool, monkeypatch):
+    monkeypatch.setattr(sessions, "LRU_SIZE", 2)
+    first = create_session("a")
+    second = create_session("b")
+
+    validate_session(first)             # "a" is now most recently used
+    create_session("c")
+
+    hot = list(sessions._hot_sessions)
+    assert hashlib.sha256(second.encode()).hexdigest() not in hot
+    assert len(hot) == 2
+
+    # Evicted sessions are still valid; they come back from the table
+    assert validate_session(second) == "b"
+
+
+def test_revoke_ends_sessions(pool):
+    token = create_session("carol")
+    create_session("dave")
+    create_session("dave")
+
+    revoke_session(token)
+    assert validate_session(token) is None
+
+    assert revoke_user_sessions("dave") == 2
+    assert _rows(pool) == []
+
+
+def test_revocation_by_another_process_is_seen_after_the_recheck(pool, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(sessions.time, "time", lambda: now[0])
+    token = create_session("erin")
+    assert validate_session(token) == "erin"
+
+    # Another process logs the user out: its LRU is not ours
+    with pool.connection() as conn:
+        conn.execute("DELETE FROM sessions WHERE username = 'erin'")
+        conn.commit()
+
+    now[0] += sessions.LRU_RECHECK - 1
+    assert validate_session(token) == "erin"        # still trusted
+
+    now[0] += 1
+    assert validate_session(token) is None
+    assert sessions._hot_sessions == {}
+
+
+def test_sweep_removes_expired_rows_and_lru_entries(pool, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(sessions.time, "time", lambda: now[0])
+    create_session("short", ttl=10)
+    keep = create_session("long", ttl=1000)
+
+    assert sweep_expired_sessions(now=now[0] + 10) == 1
+    assert [user for _, user in _rows(pool)] == ["long"]
+    assert len(sessions._hot_sessions) == 1
+    assert validate_session(keep) == "long"
+
+
+def test_sweeper_starts_once_and_survives_errors(monkeypatch):
+    monkeypatch.setattr(sessions, "_sweeper", None)
+    monkeypatch.setattr(sessions.threading, "Thread", _FakeThread)
+    _FakeThread.started.clear()
+
+    sessions.start_session_sweeper(interval=5)
+    sessions.start_session_sweeper(interval=5)
+    assert len(_FakeThread.started) == 1
+    thread = _FakeThread.started[0]
+    assert thread.daemon and thread.args == (5,)
+
+    # Run the loop body: one failing sweep, one good one, then stop
+    calls = []
+
+    def sweep():
+        calls.append(len(calls))
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+
+    def sleep(seconds):
+        if len(calls) == 2:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(sessions, "sweep_expired_sessions", sweep)
+    monkeypatch.setattr(sessions.time, "sleep", sleep)
+    with pytest.raises(KeyboardInterrupt):
+        thread.target(*thread.args)
+
+    assert calls == [0, 1]
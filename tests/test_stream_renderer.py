@@ -0,0 +1,74 @@
+import pytest
+
+from app.services.stream_renderer import CURSOR, StreamRenderer, _CountingPlaceholder
+
+
+class _Placeholder(_CountingPlaceholder):
+    # Also keeps the last rendered text
+    def markdown(self, text):
+        super().markdown(text)
+        self.last = text
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _renderer(fps=10, char_threshold=50):
+    placeholder = _Placeholder()
+    clock = _Clock()
+    return StreamRenderer(placeholder, fps=fps, char_threshold=char_threshold,
+                          clock=clock), placeholder, clock
+
+
+def test_renders_once_per_frame_interval():
+    renderer, placeholder, clock = _renderer(fps=10)
+
+    renderer.write("a")                 # first delta renders straight away
+    for _ in range(5):
+        clock.now += 0.01
+        renderer.write("b")
+    assert placeholder.calls == 1
+
+    clock.now = 0.1                     # one frame (1/10 s) later
+    renderer.write("c")
+    assert placeholder.calls == 2
+    assert placeholder.last == "abbbbbc" + CURSOR
+
+
+def test_renders_early_when_enough_characters_arrive():
+    renderer, placeholder, _ = _renderer(char_threshold=50)
+
+    renderer.write("x")
+    renderer.write("y" * 49)
+    assert placeholder.calls == 1
+    renderer.write("z")                 # 50 characters since the last frame
+    assert placeholder.calls == 2
+
+
+def test_final_text_is_rendered_without_cursor():
+    renderer, placeholder, _ = _renderer()
+
+    text = renderer.consume(["Hello ", "big ", "world"])
+
+    assert text == "Hello big world"
+    assert placeholder.last == "Hello big world"
+    assert placeholder.calls == 2       # first delta + final frame
+
+
+def test_partial_text_is_rendered_when_the_stream_fails():
+    renderer, placeholder, _ = _renderer()
+
+    def stream():
+        yield "Hello "
+        yield "wor"
+        raise ConnectionError("stream dropped")
+
+    with pytest.raises(ConnectionError):
+        renderer.consume(stream())
+
+    assert placeholder.last == "Hello wor"
@@ -0,0 +1,73 @@
+import time
+
+import pytest
+
+from app.data import users
+from app.data.users import (
+    clear_user_cache,
+    get_user_by_username,
+    insert_user,
+    update_user_password_hash,
+    update_user_role,
+    user_cache_stats,
+)
+
+
+@pytest.fixture
+def lookups(conn, monkeypatch):
+    """
+    Count the database round trips made by the user lookups.
+    """
+    clear_user_cache()
+    calls = []
+    get_connection = users.get_connection
+
+    def counting_get_connection():
+        calls.append(1)
+        return get_connection()
+
+    monkeypatch.setattr(users, "get_connection", counting_get_connection)
+    yield calls
+    clear_user_cache()
+
+
+def test_unknown_usernames_are_served_from_the_cache(lookups):
+    assert get_user_by_username("ghost") is None
+    assert get_user_by_username("ghost") is None
+
+    assert len(lookups) == 1
+    assert user_cache_stats()["missing"]["hits"] == 1
+
+
+def test_cached_miss_expires_after_its_ttl(lookups, monkeypatch):
+    monkeypatch.setattr(users._missing_users, "ttl", 0.05)
+
+    get_user_by_username("ghost")
+    time.sleep(0.1)
+    get_user_by_username("ghost")
+
+    assert len(lookups) == 2
+
+
+def test_registering_a_user_clears_the_cached_miss(lookups):
+    assert get_user_by_username("ana") is None
+
+    insert_user("ana", "hash-1", "analyst")
+
+    user = get_user_by_username("ana")
+    assert user[1:4] == ("ana", "hash-1", "analyst")
+
+
+def test_updates_refresh_the_cached_user(lookups):
+    insert_user("ana", "hash-1")
+    get_user_by_username("ana")
+    calls = len(lookups)
+
+    assert get_user_by_username("ana")[2] == "hash-1"
+    assert len(lookups) == calls                # served from the cache
+
+    update_user_password_hash("ana", "hash-2")
+    assert get_user_by_username("ana")[2] == "hash-2"
+
+    update_user_role("ana", "admin")
+    assert get_user_by_username("ana")[3] == "admin"